@@ -0,0 +1,79 @@
+"""
+Compara el armado de la tabla de sgRNAs fila a fila (pd.concat por guía) con el
+almacén columnar de `paq1_soporte`, para regiones objetivo de distinta longitud.
+
+Uso:
+    python -m benchmarks.bench_acumulador --longitudes 1000 5000 20000 50000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+import pandas as pd
+
+from sgRNA.paq1_soporte import _recolectar_candidatos, _filtrar_gc, _construir_tabla, gc_content
+
+
+def construir_tabla_concat(candidatos, eficiencias):
+    """Camino anterior: un DataFrame de una fila y un pd.concat por cada guía aceptada."""
+    df_sgRNA = pd.DataFrame(columns=["gRNA", "PAM", "GC_content", "position"])
+    for (candidate, pam_seq, position, hebra, _), eficiencia in zip(candidatos, eficiencias):
+        gc_content_ = gc_content(candidate)
+
+        if 40 <= gc_content_ <= 80:
+            new_row = pd.DataFrame([{
+                "gRNA": candidate,
+                "PAM": pam_seq,
+                "GC_content": gc_content_,
+                "position": position,
+                "hebra": hebra,
+                "Eficiencia": round(eficiencia, 2)
+            }])
+            df_sgRNA = pd.concat([df_sgRNA, new_row], ignore_index=True)
+    return df_sgRNA
+
+
+def construir_tabla_columnar(candidatos, eficiencias):
+    """Camino actual: filtro GC vectorizado y almacén columnar."""
+    gc, aceptados = _filtrar_gc(candidatos)
+    return _construir_tabla(candidatos, gc, aceptados, eficiencias[aceptados])
+
+
+def medir(funcion, *args, repeticiones=3):
+    """Devuelve el mejor tiempo (s) de `repeticiones` ejecuciones y el último resultado."""
+    mejor = float("inf")
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(*args)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del armado de la tabla de candidatos.")
+    parser.add_argument("--longitudes", type=int, nargs="+", default=[1000, 5000, 20000, 50000],
+                        help="Longitudes de región a evaluar")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por medición")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador aleatorio")
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    print(f"{'longitud':>10} {'candidatos':>11} {'concat (s)':>11} {'columnar (s)':>13} {'aceleración':>12}")
+    for longitud in args.longitudes:
+        region = "".join(rng.choice("ACGT") for _ in range(longitud))
+        candidatos = _recolectar_candidatos(region)
+        eficiencias = np.array([rng.random() * 100 for _ in candidatos], dtype=np.float32)
+
+        t_concat, df_concat = medir(construir_tabla_concat, candidatos, eficiencias, repeticiones=args.repeticiones)
+        t_columnar, df_columnar = medir(construir_tabla_columnar, candidatos, eficiencias, repeticiones=args.repeticiones)
+
+        # Ambos caminos deben producir exactamente las mismas filas
+        assert df_concat.values.tolist() == df_columnar.values.tolist()
+
+        print(f"{longitud:>10} {len(candidatos):>11} {t_concat:>11.4f} {t_columnar:>13.4f} {t_concat / t_columnar:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Compara el diseño con la biblioteca de guías precalculada (`paq1_biblioteca`) con el diseño
+completo (extracción, escaneo de PAM y puntuación de cada región) sobre un genoma sintético
+(ver `benchmarks.sintetico`):
+
+- construcción de la biblioteca (una sola vez por genoma y modelo) y su tamaño en disco;
+- regiones al azar por coordenadas: consulta por rango frente a extraer, escanear y puntuar;
+- targets FASTA de varios registros: `design_sgRNAs_multi` con y sin biblioteca (ambos alinean);
+- el mismo genoma con tramos de N: la biblioteca se construye sin las guías que los cruzan.
+
+Comprueba que las tablas son idénticas a las del genoma empaquetado (en el genoma con N, también
+en las regiones con N: ambos caminos descartan las guías que cruzan un tramo de N).
+
+Uso:
+    python -m benchmarks.bench_biblioteca --largo 5000000 --registros 2 --regiones 200 --modelo xgb
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from Bio import SeqIO
+
+from benchmarks.sintetico import escribir_fasta, generar_conjunto
+from sgRNA.paq1_biblioteca import construir_biblioteca
+from sgRNA.paq1_nucleasa import NUCLEASAS, obtener_nucleasas
+from sgRNA.paq1_soporte import _disenar_region, design_sgRNAs_multi, design_sgRNAs_rango, extract_range_fasta
+
+
+def cronometrar(funcion):
+    """Ejecuta `funcion` y devuelve (segundos, resultado)."""
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return time.perf_counter() - inicio, resultado
+
+
+def disenar_regiones(gen_file, regiones, modelo, nucleasas):
+    """Referencia: extrae cada región del genoma empaquetado, la escanea y puntúa sus guías."""
+    return [_disenar_region(extract_range_fasta(gen_file, inicio, fin, record=registro, empaquetado=True),
+                            modelo, nucleasas=nucleasas)
+            for registro, inicio, fin in regiones]
+
+
+def agregar_tramos_n(gen_file, destino, rng, cantidad, largo):
+    """Copia el genoma en `destino` reemplazando `cantidad` tramos de `largo` bases por N."""
+    registros = []
+    for registro in SeqIO.parse(gen_file, "fasta"):
+        secuencia = bytearray(str(registro.seq).encode("ascii"))
+        for inicio in rng.integers(0, len(secuencia) - largo, size=cantidad):
+            secuencia[inicio:inicio + largo] = b"N" * largo
+        registros.append((registro.id, secuencia.decode("ascii")))
+    escribir_fasta(destino, registros)
+    return destino
+
+
+def comparar_con_n(gen_file, directorio, args, nucleasas, rng):
+    """Construye la biblioteca del genoma con tramos de N y la compara con el diseño completo."""
+    gen_n = agregar_tramos_n(gen_file, os.path.join(directorio, "genoma_n.fa"), rng, args.tramos_n, args.largo_n)
+    t_construir, biblioteca = cronometrar(lambda: construir_biblioteca(gen_n, args.modelo, nucleasas,
+                                                                     destino=os.path.join(directorio, "biblioteca_n"),
+                                                                     workers=args.workers))
+    regiones = [(registro, inicio, inicio + args.largo_region - 1)
+                for registro, (_, largo) in biblioteca.genoma.registros.items()
+                for inicio in range(1, largo - args.largo_region, args.largo_region)]
+    con_n = 0
+    for region, esperada in zip(regiones, disenar_regiones(gen_n, regiones, args.modelo, nucleasas)):
+        obtenida = design_sgRNAs_rango(biblioteca, *region)
+        assert obtenida["gRNA"].str.fullmatch("[ACGT]+").all(), f"Guías con N en {region}"
+        pd.testing.assert_frame_equal(esperada, obtenida)
+        con_n += "N" in extract_range_fasta(gen_n, *region[1:], record=region[0], empaquetado=True)
+    print(f"genoma con {args.tramos_n} tramos de N por registro: {len(biblioteca)} guías en {t_construir:.2f} s; "
+          f"{len(regiones)} regiones idénticas ({con_n} con N)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la biblioteca de guías precalculada.")
+    parser.add_argument("--largo", type=int, default=2_000_000, help="Longitud total del genoma")
+    parser.add_argument("--registros", type=int, default=2, help="Número de cromosomas")
+    parser.add_argument("--regiones", type=int, default=100, help="Regiones consultadas al azar")
+    parser.add_argument("--largo-region", type=int, default=2000, help="Longitud de cada región")
+    parser.add_argument("--targets", type=int, default=20, help="Targets FASTA del diseño multi-target")
+    parser.add_argument("--modelo", default="xgb", help="Modelo de eficiencia")
+    parser.add_argument("--nucleasas", nargs="+", default=None, help=f"Nucleasas ({', '.join(NUCLEASAS)} o PAM:lado:largo[:corte])")
+    parser.add_argument("--tramos-n", type=int, default=20, help="Tramos de N por registro en el genoma con N")
+    parser.add_argument("--largo-n", type=int, default=50, help="Longitud de cada tramo de N")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos para puntuar al construir la biblioteca")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador aleatorio")
+    args = parser.parse_args()
+
+    nucleasas = obtener_nucleasas(args.nucleasas) if args.nucleasas else None
+    rng = np.random.default_rng(args.semilla)
+    with tempfile.TemporaryDirectory() as directorio:
+        gen_file, target_file = generar_conjunto(directorio, args.largo, args.registros, args.targets,
+                                                 semilla=args.semilla)
+        destino = os.path.join(directorio, "biblioteca")
+        t_construir, biblioteca = cronometrar(lambda: construir_biblioteca(gen_file, args.modelo, nucleasas, destino=destino,
+                                                                         workers=args.workers))
+        tamano = sum(os.path.getsize(os.path.join(destino, nombre)) for nombre in os.listdir(destino))
+        print(f"construcción: {len(biblioteca)} guías en {t_construir:.2f} s, {tamano / 1e6:.1f} MB "
+              f"({tamano / len(biblioteca):.1f} bytes por guía)")
+
+        regiones = []
+        for _ in range(args.regiones):
+            registro = list(biblioteca.genoma.registros)[int(rng.integers(args.registros))]
+            inicio = int(rng.integers(1, biblioteca.genoma.registros[registro][1] - args.largo_region))
+            regiones.append((registro, inicio, inicio + args.largo_region - 1))
+        t_diseno, esperadas = cronometrar(lambda: disenar_regiones(gen_file, regiones, args.modelo, nucleasas))
+        t_consulta, obtenidas = cronometrar(lambda: [design_sgRNAs_rango(biblioteca, *region) for region in regiones])
+        for esperada, obtenida in zip(esperadas, obtenidas):
+            pd.testing.assert_frame_equal(esperada, obtenida)
+        print(f"{args.regiones} regiones de {args.largo_region} pb: diseño completo {t_diseno * 1000 / args.regiones:.2f} ms "
+              f"por región, biblioteca {t_consulta * 1000 / args.regiones:.2f} ms por región "
+              f"(la construcción se amortiza en {t_construir / max(t_diseno - t_consulta, 1e-9) * args.regiones:.0f} regiones)")
+
+        t_diseno, esperada = cronometrar(lambda: design_sgRNAs_multi(gen_file, target_file, args.modelo, alineador="exacto",
+                                                                     empaquetado=True, nucleasas=nucleasas))
+        t_consulta, obtenida = cronometrar(lambda: design_sgRNAs_multi(gen_file, target_file, args.modelo, alineador="exacto",
+                                                                       nucleasas=nucleasas, biblioteca=biblioteca))
+        pd.testing.assert_frame_equal(esperada, obtenida)
+        print(f"{args.targets} targets FASTA ({len(obtenida)} guías): diseño completo {t_diseno:.3f} s, "
+              f"biblioteca {t_consulta:.3f} s")
+
+        comparar_con_n(gen_file, directorio, args, nucleasas, rng)
+    print("Resultados idénticos.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Compara la representación empaquetada del genoma (`paq1_genoma`, 2 bits por base) con la lectura
+del FASTA sobre un genoma sintético con tramos de N (ver `benchmarks.sintetico`):
+
+- construcción y apertura (memoria mapeada) frente a `load_file`, y memoria por base;
+- extracción de rangos al azar frente a `paq1_fasta.extraer_rango` (índice .fai);
+- escaneo de PAM de un cromosoma completo con `iter_pam_sites`;
+- conteo de off-targets con el índice sobre el genoma empaquetado frente a un arreglo de un
+  byte por base.
+
+En cada caso comprueba que los resultados son idénticos.
+
+Uso:
+    python -m benchmarks.bench_genoma --largo 20000000 --registros 4
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.sintetico import escribir_fasta, generar_genoma
+from sgRNA.paq1_fasta import extraer_rango, iter_rango
+from sgRNA.paq1_genoma import GenomaEmpaquetado, construir_genoma_empaquetado, ruta_genoma_empaquetado
+from sgRNA.paq1_offtarget import cargar_indice_offtarget, contar_offtargets, k_para_mismatches
+from sgRNA.paq1_secuencia import CODIGO_INVALIDO
+from sgRNA.paq1_soporte import iter_pam_sites, load_file
+
+
+def genoma_con_n(rng, largo, registros, tramos_n=50, largo_n=5000):
+    """Genoma sintético con tramos de N al azar (como los huecos de un ensamblado)."""
+    genoma = []
+    for nombre, secuencia in generar_genoma(rng, largo, registros):
+        secuencia = bytearray(secuencia.encode())
+        for inicio in rng.integers(0, len(secuencia), size=tramos_n // registros):
+            secuencia[inicio:inicio + largo_n] = b"N" * len(secuencia[inicio:inicio + largo_n])
+        genoma.append((nombre, secuencia.decode()))
+    return genoma
+
+
+def cronometrar(funcion):
+    """Ejecuta `funcion` y devuelve (segundos, resultado)."""
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del genoma empaquetado.")
+    parser.add_argument("--largo", type=int, default=10_000_000, help="Longitud total del genoma")
+    parser.add_argument("--registros", type=int, default=4, help="Número de cromosomas")
+    parser.add_argument("--rangos", type=int, default=2000, help="Rangos extraídos al azar")
+    parser.add_argument("--guias", type=int, default=2000, help="Guías para el conteo de off-targets")
+    parser.add_argument("--mismatches", type=int, default=1, help="Mismatches del conteo de off-targets")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador aleatorio")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.semilla)
+    with tempfile.TemporaryDirectory() as directorio:
+        gen_file = os.path.join(directorio, "genoma.fa")
+        escribir_fasta(gen_file, genoma_con_n(rng, args.largo, args.registros))
+
+        t_texto, registros = cronometrar(lambda: load_file(gen_file))
+        bytes_texto = sum(len(secuencia) for secuencia in registros)
+        del registros
+        t_construir, _ = cronometrar(lambda: construir_genoma_empaquetado(gen_file))
+        t_abrir, genoma = cronometrar(lambda: GenomaEmpaquetado.cargar(ruta_genoma_empaquetado(gen_file)))
+        print(f"load_file: {t_texto:.3f} s, {bytes_texto / 1e6:.1f} MB de texto")
+        print(f"empaquetado: construcción {t_construir:.3f} s, apertura {t_abrir * 1000:.2f} ms, "
+              f"{genoma.bytes_en_memoria() / 1e6:.1f} MB ({genoma.bytes_en_memoria() / len(genoma):.3f} bytes por base)")
+
+        # Extracción de rangos al azar
+        nombres = list(genoma.registros)
+        consultas = []
+        for _ in range(args.rangos):
+            nombre = nombres[rng.integers(len(nombres))]
+            inicio = int(rng.integers(1, genoma.registros[nombre][1]))
+            consultas.append((nombre, inicio, inicio + int(rng.integers(100, 5000))))
+        t_fai, esperados = cronometrar(lambda: [extraer_rango(gen_file, *consulta) for consulta in consultas])
+        t_emp, obtenidos = cronometrar(lambda: [genoma.extraer_rango(*consulta) for consulta in consultas])
+        assert obtenidos == esperados, "La extracción no coincide con el FASTA"
+        print(f"{args.rangos} rangos: .fai {t_fai:.3f} s, empaquetado {t_emp:.3f} s")
+
+        # Escaneo de PAM de un cromosoma completo
+        nombre = nombres[0]
+        t_fai, esperados = cronometrar(lambda: list(iter_pam_sites(iter_rango(gen_file, nombre))))
+        t_emp, obtenidos = cronometrar(lambda: list(iter_pam_sites(genoma.iter_fragmentos(nombre))))
+        assert obtenidos == esperados, "El escaneo de PAM no coincide con el FASTA"
+        print(f"escaneo de PAM de {nombre} ({len(esperados)} sitios): .fai {t_fai:.3f} s, empaquetado {t_emp:.3f} s")
+
+        # Off-targets: mismo índice, genoma de un byte por base o empaquetado
+        k = k_para_mismatches(args.mismatches)
+        indice = cargar_indice_offtarget(gen_file, k)
+        codigos = genoma[0:len(genoma)]
+        en_bytes = dict(indice, genoma=codigos)
+        guias = []
+        while len(guias) < args.guias:
+            inicio = int(rng.integers(0, len(codigos) - 20))
+            ventana = codigos[inicio:inicio + 20]
+            if (ventana != CODIGO_INVALIDO).all():
+                guias.append("".join("ACGT"[c] for c in ventana))
+        t_bytes, esperados = cronometrar(lambda: contar_offtargets(guias, en_bytes, args.mismatches))
+        t_emp, obtenidos = cronometrar(lambda: contar_offtargets(guias, indice, args.mismatches))
+        assert (obtenidos == esperados).all(), "Los conteos de off-targets no coinciden"
+        print(f"off-targets de {args.guias} guías ({args.mismatches} mismatches): 1 byte por base {t_bytes:.3f} s "
+              f"({codigos.nbytes / 1e6:.1f} MB), empaquetado {t_emp:.3f} s ({genoma.bytes_en_memoria() / 1e6:.1f} MB)")
+    print("Resultados idénticos.")
+
+
+if __name__ == "__main__":
+    main()
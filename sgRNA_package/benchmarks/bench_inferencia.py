@@ -0,0 +1,109 @@
+"""
+Compara los motores de inferencia propios de `paq1_inferencia` con las bibliotecas originales:
+tiempo de carga, equivalencia numérica y rendimiento (guías por segundo) para distintos tamaños
+de lote. Los modelos cuya biblioteca o archivo no están disponibles se omiten con un aviso.
+
+Uso:
+    python -m benchmarks.bench_inferencia --lotes 1 64 4096 --repeticiones 5
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from sgRNA.paq1_inferencia import RedDensaNumpy, RUTA_RED_KERAS, RUTA_RED_NUMPY, cargar_arboles
+from sgRNA.paq1_percent import ruta_modelo
+
+
+def matriz_one_hot(rng, n):
+    """Matriz one-hot (n, 80) de guías aleatorias."""
+    X = np.zeros((n, 80), dtype=np.float32)
+    X[np.arange(n)[:, None], 4 * np.arange(20) + rng.integers(0, 4, size=(n, 20))] = 1
+    return X
+
+
+def cronometrar(funcion):
+    """Ejecuta `funcion` y devuelve (segundos, resultado)."""
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return time.perf_counter() - inicio, resultado
+
+
+def cargar_red():
+    """Pares (biblioteca, motor propio) para la red neuronal, con sus funciones de predicción."""
+    import tensorflow as tf
+    t_biblioteca, keras = cronometrar(lambda: tf.keras.models.load_model(RUTA_RED_KERAS, compile=False))
+    t_propio, red = cronometrar(lambda: RedDensaNumpy.cargar(RUTA_RED_NUMPY))
+    return (t_biblioteca, lambda X: keras.predict(X, batch_size=len(X), verbose=0)[:, 0],
+            t_propio, lambda X: red.predict(X)[:, 0], 1e-4)
+
+
+def cargar_ensamble(nombre):
+    """Pares (biblioteca, motor propio) para un ensamble de árboles (rf o xgb); la predicción debe ser idéntica."""
+    def cargar():
+        import joblib
+        ruta = ruta_modelo(nombre)
+        if not os.path.exists(ruta):
+            raise FileNotFoundError(ruta)
+        t_biblioteca, modelo = cronometrar(lambda: joblib.load(ruta))
+        t_propio, ensamble = cronometrar(lambda: cargar_arboles(ruta))
+        return t_biblioteca, modelo.predict, t_propio, ensamble.predict, 0.0
+    return cargar
+
+
+# Modelo -> función que devuelve (carga biblioteca, predict biblioteca, carga propia, predict propio, tolerancia)
+COMPARACIONES = {
+    "nn": cargar_red,
+    "rf": cargar_ensamble("rf"),
+    "xgb": cargar_ensamble("xgb"),
+}
+
+
+def medir(predict, X, lote, repeticiones):
+    """Mejor rendimiento (guías/s) de `predict` recorriendo X en lotes de `lote` guías."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for i in range(0, len(X), lote):
+            predict(X[i:i + lote])
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return len(X) / mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los motores de inferencia propios.")
+    parser.add_argument("--modelos", nargs="+", default=list(COMPARACIONES), help="Modelos a comparar")
+    parser.add_argument("--guias", type=int, default=20000, help="Guías para la verificación y los lotes grandes")
+    parser.add_argument("--lotes", type=int, nargs="+", default=[1, 64, 4096], help="Tamaños de lote a medir")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por medición")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador aleatorio")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.semilla)
+    X = matriz_one_hot(rng, args.guias)
+
+    for modelo in args.modelos:
+        try:
+            t_biblioteca, biblioteca, t_propio, propio, tolerancia = COMPARACIONES[modelo]()
+        except (ImportError, FileNotFoundError) as e:
+            print(f"{modelo}: se omite ({type(e).__name__}: {e})\n")
+            continue
+
+        diferencia = float(np.abs(biblioteca(X) - propio(X)).max())
+        assert diferencia <= tolerancia, f"{modelo}: diferencia {diferencia} mayor que la tolerancia {tolerancia}"
+        print(f"{modelo}: carga {t_biblioteca:.3f} s (biblioteca) / {t_propio:.3f} s (propio); "
+              f"diferencia máxima {diferencia:.3g}")
+
+        print(f"{'lote':>8} {'biblioteca (guías/s)':>22} {'propio (guías/s)':>18} {'aceleración':>12}")
+        for lote in args.lotes:
+            # Con lotes pequeños se mide sobre un subconjunto para acotar la duración
+            muestra = X[:min(len(X), max(lote * 50, 2000))]
+            v_biblioteca = medir(biblioteca, muestra, lote, args.repeticiones)
+            v_propio = medir(propio, muestra, lote, args.repeticiones)
+            print(f"{lote:>8} {v_biblioteca:>22.0f} {v_propio:>18.0f} {v_propio / v_biblioteca:>11.1f}x")
+        print()
+
+
+if __name__ == "__main__":
+    main()
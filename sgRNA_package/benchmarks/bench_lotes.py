@@ -0,0 +1,85 @@
+"""
+Mide el ahorro del diseño por lotes reanudable (`paq1_lotes.ejecutar_lote`) sobre un genoma
+sintético (ver `benchmarks.sintetico`):
+
+- corrida completa desde cero;
+- corrida interrumpida a la mitad y reanudada (solo se diseñan los targets que faltan);
+- repetición sin cambios (todo sale del manifiesto);
+- lista de targets ampliada (solo se diseñan los nuevos).
+
+En cada caso comprueba que el resultado es idéntico al de `design_sgRNAs_multi`.
+
+Uso:
+    python -m benchmarks.bench_lotes --largo 2000000 --targets 200 --modelo xgb
+"""
+import argparse
+import os
+import tempfile
+import time
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.sintetico import escribir_fasta, generar_conjunto, muestrear_targets
+from sgRNA.paq1_lotes import ManifiestoLotes, ejecutar_lote
+from sgRNA.paq1_soporte import design_sgRNAs_multi, leer_targets
+
+
+def correr(gen_file, target_file, manifiesto, modelo, limite=None):
+    """Ejecuta el lote (o sus primeros `limite` targets, simulando una interrupción) y devuelve (segundos, tabla)."""
+    inicio = time.perf_counter()
+    tablas = ejecutar_lote(gen_file, target_file, manifiesto, modelo, alineador="exacto")
+    tablas = list(islice(tablas, limite))
+    segundos = time.perf_counter() - inicio
+    return segundos, pd.concat(tablas, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del diseño por lotes con manifiesto.")
+    parser.add_argument("--largo", type=int, default=1_000_000, help="Longitud del genoma sintético")
+    parser.add_argument("--targets", type=int, default=100, help="Número de targets")
+    parser.add_argument("--largo-target", type=int, default=2000, help="Longitud de cada target")
+    parser.add_argument("--modelo", default="xgb", help="Modelo de eficiencia")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador aleatorio")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        gen_file, target_file = generar_conjunto(directorio, args.largo, targets=args.targets,
+                                                 largo_target=args.largo_target, semilla=args.semilla)
+        esperado = design_sgRNAs_multi(gen_file, target_file, args.modelo, alineador="exacto")
+
+        # Lista ampliada con un 10% de targets nuevos
+        rng = np.random.default_rng(args.semilla + 1)
+        genoma = leer_targets(gen_file)
+        nuevos = [(f"nuevo{i}", secuencia) for i, (_, secuencia)
+                  in enumerate(muestrear_targets(rng, genoma, max(1, args.targets // 10), args.largo_target))]
+        ampliado_file = os.path.join(directorio, "ampliado.fa")
+        escribir_fasta(ampliado_file, leer_targets(target_file) + nuevos)
+        esperado_ampliado = design_sgRNAs_multi(gen_file, ampliado_file, args.modelo, alineador="exacto")
+
+        manifiesto = ManifiestoLotes(os.path.join(directorio, "completo.sqlite"))
+        t_completo, tabla = correr(gen_file, target_file, manifiesto, args.modelo)
+        pd.testing.assert_frame_equal(tabla, esperado)
+        t_repetido, tabla = correr(gen_file, target_file, manifiesto, args.modelo)
+        pd.testing.assert_frame_equal(tabla, esperado)
+        t_ampliado, tabla = correr(gen_file, ampliado_file, manifiesto, args.modelo)
+        pd.testing.assert_frame_equal(tabla, esperado_ampliado)
+        manifiesto.cerrar()
+
+        manifiesto = ManifiestoLotes(os.path.join(directorio, "interrumpido.sqlite"))
+        t_mitad, _ = correr(gen_file, target_file, manifiesto, args.modelo, limite=args.targets // 2)
+        t_reanudado, tabla = correr(gen_file, target_file, manifiesto, args.modelo)
+        pd.testing.assert_frame_equal(tabla, esperado)
+        manifiesto.cerrar()
+
+    print(f"\n{'corrida':<32} {'segundos':>9}")
+    for nombre, segundos in [("completa", t_completo), ("interrumpida a la mitad", t_mitad),
+                             ("reanudada", t_reanudado), ("repetida sin cambios", t_repetido),
+                             (f"ampliada (+{len(nuevos)} targets)", t_ampliado)]:
+        print(f"{nombre:<32} {segundos:>9.3f}")
+    print("Resultados idénticos a design_sgRNAs_multi.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compara el escáner compilado de varias nucleasas (`paq1_nucleasa.EscanerPAM`, una sola pasada por
+la secuencia) con una búsqueda por expresiones regulares que recorre la secuencia dos veces por
+nucleasa (PAM y su complemento inverso), sobre una secuencia sintética (ver `benchmarks.sintetico`):
+
+- solo la ubicación de los PAM (sin armar los candidatos);
+- los candidatos completos (guía y PAM de cada sitio).
+
+Comprueba que los sitios encontrados son idénticos.
+
+Uso:
+    python -m benchmarks.bench_nucleasa --largo 5000000 --nucleasas SpCas9 SaCas9 Cas12a
+"""
+import argparse
+import re
+import time
+
+import numpy as np
+
+from benchmarks.sintetico import secuencia_aleatoria
+from sgRNA.paq1_nucleasa import NUCLEASAS, EscanerPAM, obtener_nucleasas, regex_iupac
+from sgRNA.paq1_secuencia import complemento_inverso
+from sgRNA.paq1_soporte import iter_sitios_nucleasas
+
+
+def sitios_regex(secuencia, nucleasas):
+    """Referencia: dos búsquedas por expresiones regulares (con lookahead) por nucleasa."""
+    sitios = []
+    for indice, nucleasa in enumerate(nucleasas):
+        largo, largo_pam = nucleasa.largo_guia, len(nucleasa.pam)
+        for orden, (hebra, pam) in enumerate((("+", nucleasa.pam), ("-", nucleasa.pam_inverso))):
+            en_5 = (nucleasa.lado == "5") == (hebra == "+")  # La guía está a la derecha del PAM
+            for m in re.finditer(f"(?=({regex_iupac(pam)}))", secuencia):
+                inicio = m.start() + largo_pam if en_5 else m.start() - largo
+                if inicio < 0 or inicio + largo > len(secuencia):
+                    continue
+                guia, pam_seq = secuencia[inicio:inicio + largo], m.group(1)
+                if hebra == "-":
+                    guia, pam_seq = complemento_inverso(guia), complemento_inverso(pam_seq)
+                sitios.append((min(inicio, m.start()), orden, indice, nucleasa, hebra, inicio, guia, pam_seq))
+    sitios.sort()
+    return [sitio[3:] for sitio in sitios]
+
+
+def posiciones_regex(secuencia, nucleasas):
+    """Solo las posiciones de los PAM, con dos búsquedas por expresiones regulares por nucleasa."""
+    return [[m.start() for m in re.finditer(f"(?={regex_iupac(pam)})", secuencia)]
+            for nucleasa in nucleasas for pam in (nucleasa.pam, nucleasa.pam_inverso)]
+
+
+def cronometrar(funcion):
+    """Ejecuta `funcion` y devuelve (segundos, resultado)."""
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del escáner de PAM de varias nucleasas.")
+    parser.add_argument("--largo", type=int, default=2_000_000, help="Longitud de la secuencia")
+    parser.add_argument("--nucleasas", nargs="+", default=list(NUCLEASAS), help="Nucleasas o especificaciones PAM:lado:largo[:corte]")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador aleatorio")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.semilla)
+    secuencia = secuencia_aleatoria(rng, args.largo)
+    nucleasas = obtener_nucleasas(args.nucleasas)
+    escaner = EscanerPAM(nucleasas)
+
+    t_regex, _ = cronometrar(lambda: posiciones_regex(secuencia, nucleasas))
+    t_escaner, _ = cronometrar(lambda: escaner.posiciones(secuencia))
+    print(f"ubicación de los PAM de {len(nucleasas)} nucleasas en {args.largo} bases: "
+          f"regex ({2 * len(nucleasas)} pasadas) {t_regex:.3f} s, escáner compilado {t_escaner:.3f} s")
+
+    t_regex, esperados = cronometrar(lambda: sitios_regex(secuencia, nucleasas))
+    t_escaner, obtenidos = cronometrar(lambda: list(iter_sitios_nucleasas(secuencia, nucleasas)))
+    assert obtenidos == esperados, "Los sitios no coinciden con la búsqueda por expresiones regulares"
+    print(f"candidatos ({len(obtenidos)} sitios): regex {t_regex:.3f} s, escáner compilado {t_escaner:.3f} s")
+    for nucleasa in nucleasas:
+        print(f"  {nucleasa.nombre:<12} {nucleasa.especificacion():<16} "
+              f"{sum(1 for sitio in obtenidos if sitio[0] is nucleasa)} sitios")
+    print("Resultados idénticos.")
+
+
+if __name__ == "__main__":
+    main()
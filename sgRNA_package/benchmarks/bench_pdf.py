@@ -0,0 +1,95 @@
+"""
+Mide la generación del reporte PDF (`crr_pdf.create_pdf`) para tablas de distinto tamaño, con
+todas las guías y en modo resumen (`top_k`), y comprueba la paginación: cada guía aparece una
+sola vez, dentro de los márgenes y sin filas superpuestas en una misma página. También genera
+el reporte a partir de un iterador de bloques para verificar que produce las mismas páginas.
+
+Uso:
+    python -m benchmarks.bench_pdf --filas 1000 10000 100000 --top-k 500
+"""
+import argparse
+import base64
+import os
+import re
+import tempfile
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from sgRNA.crr_pdf import create_pdf
+
+# Texto de una celda de la columna gRNA dentro del flujo de contenido de una página
+_CELDA_GRNA = re.compile(r"1 0 0 1 40 ([\d.]+) Tm \(([ACGT]+)\)")
+
+
+def tabla_sintetica(rng, n):
+    """Tabla de resultados aleatoria con las columnas de los design_sgRNAs_*."""
+    return pd.DataFrame({
+        "gRNA": ["".join(fila) for fila in np.array(list("ACGT"))[rng.integers(0, 4, size=(n, 20))]],
+        "PAM": "AGG",
+        "GC_content": rng.integers(40, 81, size=n).astype(float),
+        "position": np.arange(n),
+        "hebra": rng.choice(["+", "-"], size=n),
+        "Eficiencia": np.round(rng.random(n) * 100, 2),
+    })
+
+
+def paginas(ruta):
+    """Contenido de texto de cada página del PDF (los flujos de reportlab van en ASCII85 + Flate)."""
+    datos = open(ruta, "rb").read()
+    contenidos = []
+    for flujo in re.findall(rb"stream\r?\n(.*?)endstream", datos, re.S):
+        flujo = flujo.strip()
+        if flujo.endswith(b"~>"):
+            flujo = flujo[:-2]
+        contenidos.append(zlib.decompress(base64.a85decode(flujo)).decode("latin-1"))
+    return [contenido for contenido in contenidos if "Tm (" in contenido and "gina" in contenido]
+
+
+def verificar(ruta, esperadas):
+    """Comprueba que las guías `esperadas` aparecen en orden, una vez cada una y bien paginadas."""
+    guias = []
+    for contenido in paginas(ruta):
+        celdas = _CELDA_GRNA.findall(contenido)
+        alturas = [float(y) for y, _ in celdas]
+        assert len(set(alturas)) == len(alturas), "Filas superpuestas en una página"
+        assert all(50 <= y <= 750 for y in alturas), "Fila fuera de los márgenes"
+        guias += [guia for _, guia in celdas]
+    assert guias == list(esperadas), "Las guías del PDF no coinciden con la tabla"
+
+
+def cronometrar(funcion):
+    inicio = time.perf_counter()
+    funcion()
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del reporte PDF.")
+    parser.add_argument("--filas", type=int, nargs="+", default=[1000, 10000, 50000], help="Tamaños de tabla")
+    parser.add_argument("--top-k", type=int, default=500, help="Guías del modo resumen")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador aleatorio")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.semilla)
+    print(f"{'filas':>8} {'completo (s)':>13} {'páginas':>8} {'top-k (s)':>10} {'iterador (s)':>13}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for n in args.filas:
+            df = tabla_sintetica(rng, n)
+            completo, resumen, bloques = (os.path.join(directorio, nombre) for nombre in ("completo", "resumen", "bloques"))
+
+            t_completo = cronometrar(lambda: create_pdf(df, completo))
+            t_resumen = cronometrar(lambda: create_pdf(df, resumen, top_k=args.top_k))
+            t_bloques = cronometrar(lambda: create_pdf((df.iloc[i:i + 997] for i in range(0, n, 997)), bloques))
+
+            verificar(f"{completo}.pdf", df["gRNA"])
+            verificar(f"{bloques}.pdf", df["gRNA"])
+            verificar(f"{resumen}.pdf", df.nlargest(args.top_k, "Eficiencia")["gRNA"])
+            print(f"{n:>8} {t_completo:>13.3f} {len(paginas(f'{completo}.pdf')):>8} {t_resumen:>10.3f} {t_bloques:>13.3f}")
+    print("Paginación verificada.")
+
+
+if __name__ == "__main__":
+    main()
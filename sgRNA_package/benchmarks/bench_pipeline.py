@@ -0,0 +1,213 @@
+"""
+Benchmark del pipeline de diseño completo sobre genomas sintéticos (ver `benchmarks.sintetico`).
+
+Mide por separado cada etapa (alineamiento, extracción, escaneo de PAM, filtro GC, puntuación y
+escritura del reporte) para cada tamaño de genoma, e informa el tiempo, el rendimiento en guías
+por segundo y el pico de memoria. Por defecto usa un modelo de prueba (`stub`), de modo que corre
+sin los modelos entrenados; antes de medir se comprueba que el pipeline por etapas produce la
+misma tabla que `design_sgRNAs_multi`.
+
+Los resultados se pueden guardar en JSON para comparar ejecuciones.
+
+Uso:
+    python -m benchmarks.bench_pipeline --tamanos 100000 1000000 --targets 20 --json resultados.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.sintetico import generar_conjunto
+from sgRNA.crr_pdf import create_pdf
+from sgRNA.paq1_alineamiento import BACKENDS_ALINEAMIENTO, alinear
+from sgRNA.paq1_percent import predecir_eficiencia_batch, registrar_modelo, DEFAULT_BATCH_SIZE
+from sgRNA.paq1_soporte import _construir_tabla, _filtrar_gc, _recolectar_candidatos, design_sgRNAs_multi, extract_range_fasta
+
+ETAPAS = ["alineamiento", "extraccion", "escaneo_pam", "filtro_gc", "puntuacion", "reporte"]
+
+
+class ModeloStub:
+    """
+    Modelo de prueba: una regresión logística con pesos aleatorios fijos sobre la codificación
+    one-hot. Es determinista y barato, y tiene la misma interfaz `predict` que los modelos reales.
+    """
+
+    def __init__(self, semilla=0):
+        rng = np.random.default_rng(semilla)
+        self.pesos = rng.normal(0, 0.3, size=80).astype(np.float32)
+
+    def predict(self, X):
+        return 1 / (1 + np.exp(-(X @ self.pesos)))
+
+
+registrar_modelo("stub", lambda ruta: ModeloStub(), descripcion="Stub de benchmark")
+
+
+class Medidor:
+    """Registra el tiempo y, opcionalmente, el pico de memoria (tracemalloc) de cada etapa."""
+
+    def __init__(self, memoria=False):
+        self.memoria = memoria
+        self.segundos = {}
+        self.pico_mb = {}
+
+    @contextmanager
+    def etapa(self, nombre):
+        if self.memoria:
+            tracemalloc.reset_peak()
+        inicio = time.perf_counter()
+        yield
+        self.segundos[nombre] = time.perf_counter() - inicio
+        if self.memoria:
+            self.pico_mb[nombre] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+
+
+def ejecutar_pipeline(gen_file, target_file, modelo, alineador, window_size, batch_size, salida, pdf, medidor):
+    """
+    Ejecuta el diseño etapa por etapa, con la misma lógica que `design_sgRNAs_multi`.
+
+    Retorna:
+        tuple[pd.DataFrame, int]: Tabla final y número de candidatos (guías antes del filtro GC).
+    """
+    with medidor.etapa("alineamiento"):
+        primeras = alinear(gen_file, target_file, alineador).drop_duplicates("sacc").reset_index(drop=True)
+
+    with medidor.etapa("extraccion"):
+        regiones = [extract_range_fasta(gen_file, int(fila.qstart) - window_size, int(fila.qend) + window_size,
+                                        record=fila.qacc)
+                    for fila in primeras.itertuples()]
+
+    with medidor.etapa("escaneo_pam"):
+        grupos = [_recolectar_candidatos(region, window_size) for region in regiones]
+
+    # Como en el motor de diseño, el filtro GC va antes de la puntuación
+    with medidor.etapa("filtro_gc"):
+        filtrados = [_filtrar_gc(candidatos) for candidatos in grupos]
+        aceptadas = [candidatos[i][0] for candidatos, (_, aceptados) in zip(grupos, filtrados) for i in aceptados]
+
+    with medidor.etapa("puntuacion"):
+        eficiencias = predecir_eficiencia_batch(aceptadas, modelo, batch_size)
+
+    with medidor.etapa("reporte"):
+        tablas, inicio = [], 0
+        for target, candidatos, (gc, aceptados) in zip(primeras["sacc"], grupos, filtrados):
+            tabla = _construir_tabla(candidatos, gc, aceptados, eficiencias[inicio:inicio + len(aceptados)])
+            tabla.insert(0, "target", target)
+            tablas.append(tabla)
+            inicio += len(aceptados)
+        df_sgRNA = pd.concat(tablas, ignore_index=True)
+        df_sgRNA.to_csv(f"{salida}.csv", index=False)
+        if pdf:
+            create_pdf(df_sgRNA, salida)
+
+    return df_sgRNA, sum(len(candidatos) for candidatos in grupos)
+
+
+def medir_tamano(args, largo, directorio):
+    """Genera el conjunto sintético de un tamaño y devuelve la lista de resultados por etapa."""
+    gen_file, target_file = generar_conjunto(os.path.join(directorio, str(largo)), largo, args.registros,
+                                             args.targets, args.largo_target, args.gc, args.semilla)
+    salida = os.path.join(directorio, str(largo), "resultado")
+    parametros = (gen_file, target_file, args.modelo, args.alineador, args.window_size, args.batch_size,
+                  salida, not args.sin_pdf)
+
+    # Equivalencia con la función pública (además calienta el índice .fai y el modelo)
+    esperado = design_sgRNAs_multi(gen_file, target_file, args.modelo, args.window_size, args.batch_size,
+                                   alineador=args.alineador)
+    df_sgRNA, candidatos = ejecutar_pipeline(*parametros, Medidor())
+    assert df_sgRNA.equals(esperado), "El pipeline por etapas no coincide con design_sgRNAs_multi"
+
+    # Mejor tiempo de cada etapa
+    mejores = dict.fromkeys(ETAPAS, float("inf"))
+    for _ in range(args.repeticiones):
+        medidor = Medidor()
+        ejecutar_pipeline(*parametros, medidor)
+        for etapa in ETAPAS:
+            mejores[etapa] = min(mejores[etapa], medidor.segundos[etapa])
+
+    # Una ejecución adicional con tracemalloc para el pico de memoria (sin afectar los tiempos)
+    picos = {}
+    if not args.sin_memoria:
+        tracemalloc.start()
+        medidor = Medidor(memoria=True)
+        ejecutar_pipeline(*parametros, medidor)
+        tracemalloc.stop()
+        picos = medidor.pico_mb
+
+    resultados = []
+    for etapa in ETAPAS + ["total"]:
+        segundos = sum(mejores.values()) if etapa == "total" else mejores[etapa]
+        resultados.append({
+            "largo_genoma": largo,
+            "etapa": etapa,
+            "segundos": segundos,
+            "candidatos": candidatos,
+            "guias_aceptadas": len(df_sgRNA),
+            "guias_por_segundo": candidatos / segundos if segundos > 0 else None,
+            "pico_memoria_mb": max(picos.values()) if etapa == "total" and picos else picos.get(etapa),
+        })
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark por etapas del pipeline de diseño de sgRNAs.")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[100_000, 1_000_000],
+                        help="Longitudes de genoma a evaluar")
+    parser.add_argument("--registros", type=int, default=1, help="Número de cromosomas del genoma sintético")
+    parser.add_argument("--targets", type=int, default=10, help="Número de targets")
+    parser.add_argument("--largo-target", type=int, default=1000, help="Longitud de cada target")
+    parser.add_argument("--gc", type=float, default=0.5, help="Fracción esperada de G y C")
+    parser.add_argument("--modelo", default="stub", help="Modelo de eficiencia (stub, rf, nn, xgb o combined)")
+    parser.add_argument("--alineador", choices=list(BACKENDS_ALINEAMIENTO), default="exacto",
+                        help="Backend de alineamiento")
+    parser.add_argument("--window-size", type=int, default=20, help="Longitud de la guía")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Guías por llamada a predict")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por medición")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador aleatorio")
+    parser.add_argument("--sin-pdf", action="store_true", help="No escribir el PDF en la etapa de reporte")
+    parser.add_argument("--sin-memoria", action="store_true", help="No medir el pico de memoria con tracemalloc")
+    parser.add_argument("--directorio", default=None, help="Directorio de trabajo (por defecto, uno temporal)")
+    parser.add_argument("--json", default=None, metavar="RUTA", help="Guarda los resultados en un archivo JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporal:
+        directorio = args.directorio or temporal
+        resultados = [fila for largo in args.tamanos for fila in medir_tamano(args, largo, directorio)]
+
+    print(f"\n{'genoma':>10} {'etapa':<13} {'tiempo (s)':>11} {'guías/s':>12} {'pico (MB)':>10}")
+    for fila in resultados:
+        pico = "-" if fila["pico_memoria_mb"] is None else f"{fila['pico_memoria_mb']:.1f}"
+        print(f"{fila['largo_genoma']:>10} {fila['etapa']:<13} {fila['segundos']:>11.4f} "
+              f"{fila['guias_por_segundo'] or 0:>12.0f} {pico:>10}")
+
+    # ru_maxrss está en KiB en Linux y en bytes en macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+    print(f"\nMemoria residente máxima del proceso: {rss:.1f} MB")
+
+    if args.json:
+        informe = {
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "plataforma": platform.platform(),
+            "parametros": {clave: valor for clave, valor in vars(args).items() if clave not in ("json", "directorio")},
+            "rss_maximo_mb": rss,
+            "resultados": resultados,
+        }
+        with open(args.json, "w") as file:
+            json.dump(informe, file, indent=2)
+        print(f"Resultados guardados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Mide la escritura por bloques (`paq1_salida.EscritorResultados`) y la carga (`leer_resultados`)
+de la tabla de resultados en cada formato de salida, frente al CSV, e informa el tamaño de cada
+archivo. Comprueba que la tabla leída es igual a la escrita con los tipos de `compactar`, también
+cuando el primer bloque no tiene filas (un target sin guías).
+Los formatos que necesitan pyarrow se omiten con un aviso si no está instalado.
+
+Uso:
+    python -m benchmarks.bench_salida --filas 100000 1000000 --bloque 20000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_pdf import tabla_sintetica
+from sgRNA.paq1_salida import FORMATOS, compactar, escribir_resultados, leer_resultados, ruta_salida
+
+
+def tabla_resultados(rng, n, targets=50):
+    """Tabla sintética con las columnas de design_sgRNAs_multi y de los off-targets."""
+    df = tabla_sintetica(rng, n)
+    df.insert(0, "target", np.sort(rng.integers(0, targets, size=n)).astype(str))
+    df["target"] = "target_" + df["target"]
+    for mismatches in range(3):
+        df[f"OT_{mismatches}"] = rng.integers(0, 5, size=n)
+    df["off_targets"] = df[[f"OT_{m}" for m in range(3)]].sum(axis=1)
+    df["especificidad"] = np.round(100 / (1 + df["off_targets"]), 2)
+    return df
+
+
+def cronometrar(funcion):
+    """Ejecuta `funcion` y devuelve (segundos, resultado)."""
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los formatos de salida.")
+    parser.add_argument("--filas", type=int, nargs="+", default=[100000, 1000000], help="Tamaños de tabla")
+    parser.add_argument("--bloque", type=int, default=20000, help="Filas por bloque escrito")
+    parser.add_argument("--formatos", nargs="+", default=list(FORMATOS), help="Formatos a medir")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador aleatorio")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.semilla)
+    with tempfile.TemporaryDirectory() as directorio:
+        for n in args.filas:
+            df = tabla_resultados(rng, n)
+            esperado = compactar(df)
+            print(f"{n} filas, bloques de {args.bloque}")
+            print(f"{'formato':>8} {'escritura (s)':>14} {'carga (s)':>10} {'carga 2 col. (s)':>17} {'tamaño (MB)':>12}")
+            t_csv = None
+            for formato in args.formatos:
+                ruta = ruta_salida(os.path.join(directorio, "resultados"), formato)
+                # El primer bloque es el de un target sin guías: sin filas y con columnas sin tipo
+                vacio = pd.DataFrame({columna: np.zeros(0) for columna in df.columns})
+                bloques = [vacio] + [df.iloc[i:i + args.bloque] for i in range(0, n, args.bloque)]
+                try:
+                    t_escritura, _ = cronometrar(lambda: escribir_resultados(bloques, ruta, formato))
+                except ImportError as e:
+                    print(f"{formato:>8} se omite ({e})")
+                    continue
+                t_carga, leido = cronometrar(lambda: leer_resultados(ruta))
+                t_columnas, _ = cronometrar(lambda: leer_resultados(ruta, columnas=["gRNA", "Eficiencia"]))
+
+                # El CSV y el JSONL son texto: los flotantes se comparan con la precisión de float32
+                pd.testing.assert_frame_equal(leido, esperado, check_categorical=False)
+                if formato == "csv":
+                    t_csv = t_carga
+                relativo = f" ({t_csv / t_carga:.1f}x)" if t_csv else ""
+                print(f"{formato:>8} {t_escritura:>14.3f} {t_carga:>10.3f} {t_columnas:>17.3f} "
+                      f"{os.path.getsize(ruta) / 1e6:>12.1f}{relativo}")
+            print()
+    print("Tablas leídas iguales a las escritas.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Microbenchmarks de las primitivas de secuencia vectorizadas de `paq1_secuencia` frente a las
+implementaciones anteriores basadas en bucles de Python. Antes de medir se comprueba que ambas
+versiones producen exactamente los mismos resultados.
+
+Uso:
+    python -m benchmarks.bench_secuencia --guias 100000 --region 1000000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from sgRNA.paq1_percent import predecir_eficiencia_guia, predecir_eficiencia_guia_batch
+from sgRNA.paq1_secuencia import complemento_inverso, gc_lote, gc_ventanas, one_hot_encode, one_hot_encode_batch
+
+
+# Implementaciones anteriores, como referencia
+def complemento_inverso_anterior(seq):
+    complementos = {'A': 'T', 'T': 'A', 'C': 'G', 'G': 'C'}
+    return "".join(complementos[base] for base in reversed(seq))
+
+
+def one_hot_encode_anterior(seq):
+    mapping = {'A': [1,0,0,0], 'C': [0,1,0,0], 'G': [0,0,1,0], 'T': [0,0,0,1]}
+    return np.array([mapping[nuc] for nuc in seq]).flatten()
+
+
+def gc_content_anterior(sequence):
+    gc_count = sequence.count('G') + sequence.count('C')
+    return round((gc_count / len(sequence)) * 100, 2)
+
+
+def medir(nombre, anterior, nueva, repeticiones):
+    """Imprime el mejor tiempo de cada versión y la aceleración obtenida."""
+    tiempos = []
+    for funcion in (anterior, nueva):
+        mejor = float("inf")
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            mejor = min(mejor, time.perf_counter() - inicio)
+        tiempos.append(mejor)
+    print(f"{nombre:<32} {tiempos[0]:>12.4f} {tiempos[1]:>12.4f} {tiempos[0] / tiempos[1]:>11.1f}x")
+
+
+def comprobar_equivalencia(rng):
+    """Compara las versiones nuevas con las anteriores en casos aleatorios y de borde."""
+    for longitud in (1, 4, 19, 20, 21, 23, 100):
+        secuencias = ["".join(rng.choice("ACGT") for _ in range(longitud)) for _ in range(200)]
+        secuencias += ["G" * longitud, "A" * longitud, ("GC" * longitud)[:longitud]]
+
+        for seq in secuencias:
+            assert complemento_inverso(seq) == complemento_inverso_anterior(seq)
+            assert (one_hot_encode(seq) == one_hot_encode_anterior(seq)).all()
+        assert gc_lote(secuencias).tolist() == [gc_content_anterior(seq) for seq in secuencias]
+        assert (one_hot_encode_batch(secuencias, longitud) ==
+                np.array([one_hot_encode_anterior(seq) for seq in secuencias])).all()
+
+        region = "".join(secuencias)
+        esperado = [gc_content_anterior(region[i:i + longitud]) for i in range(len(region) - longitud + 1)]
+        assert gc_ventanas(region, longitud).tolist() == esperado
+
+    # Heurística de eficiencia: guías aleatorias, extremos de GC, palíndromos y bases inválidas
+    guias = ["".join(rng.choice("ACGT") for _ in range(20)) for _ in range(5000)]
+    guias += ["".join(rng.choice(bases) for _ in range(20)) for bases in ("GC", "AT", "CG", "ACG") for _ in range(500)]
+    guias += ["GCGC" * 5, "AATT" * 5, "G" * 20, "T" * 20, "ACGTNACGTACGTACGTACG"]
+    assert predecir_eficiencia_guia_batch(guias).tolist() == [predecir_eficiencia_guia(g) for g in guias]
+    print("Equivalencia verificada con las implementaciones anteriores.\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks de las primitivas de secuencia.")
+    parser.add_argument("--guias", type=int, default=100000, help="Número de guías de 20 nt")
+    parser.add_argument("--region", type=int, default=1000000, help="Longitud de la región para GC por ventanas")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Repeticiones por medición")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador aleatorio")
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    comprobar_equivalencia(rng)
+
+    guias = ["".join(rng.choice("ACGT") for _ in range(20)) for _ in range(args.guias)]
+    region = "".join(rng.choice("ACGT") for _ in range(args.region))
+    buffer = np.empty((len(guias), 80), dtype=np.float32)
+
+    print(f"{'primitiva':<32} {'anterior (s)':>12} {'nueva (s)':>12} {'aceleración':>12}")
+    medir("complemento_inverso (región)",
+          lambda: complemento_inverso_anterior(region), lambda: complemento_inverso(region), args.repeticiones)
+    medir("gc_content (lote de guías)",
+          lambda: [gc_content_anterior(g) for g in guias], lambda: gc_lote(guias), args.repeticiones)
+    medir("gc_content (ventanas de región)",
+          lambda: [gc_content_anterior(region[i:i + 20]) for i in range(len(region) - 19)],
+          lambda: gc_ventanas(region, 20), args.repeticiones)
+    medir("one_hot_encode (lote de guías)",
+          lambda: np.array([one_hot_encode_anterior(g) for g in guias]),
+          lambda: one_hot_encode_batch(guias, out=buffer), args.repeticiones)
+    medir("predecir_eficiencia_guia (lote)",
+          lambda: [predecir_eficiencia_guia(g) for g in guias],
+          lambda: predecir_eficiencia_guia_batch(guias), args.repeticiones)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Prueba de carga del servicio `sgRNA-serve` con el cliente local.
+
+Levanta el servidor en un hilo de este mismo proceso (por TCP en un puerto libre o por un
+socket Unix), envía solicitudes concurrentes de puntuación y de diseño, comprueba que las
+respuestas coinciden con las funciones del paquete llamadas directamente e informa las
+solicitudes por segundo y el tamaño medio de los micro-lotes. Por defecto usa el modelo de
+prueba de `benchmarks.bench_pipeline`.
+
+Uso:
+    python -m benchmarks.bench_servidor --clientes 32 --solicitudes 500 --guias 16 --latencia-ms 5
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import benchmarks.bench_pipeline  # noqa: F401  (registra el modelo "stub")
+from benchmarks.sintetico import generar_conjunto
+from sgRNA.paq1_percent import predecir_eficiencia_batch
+from sgRNA.paq1_servidor import ClienteSgRNA, ServidorSgRNA
+from sgRNA.paq1_soporte import design_sgRNAs_multi
+
+
+def iniciar_en_hilo(servidor):
+    """Ejecuta el servidor en un hilo con su propio bucle de eventos; devuelve el bucle y la dirección."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    direccion = asyncio.run_coroutine_threadsafe(servidor.iniciar(), loop).result()
+    return loop, direccion
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del servicio de sgRNAs.")
+    parser.add_argument("--modelo", default="stub", help="Modelo de eficiencia")
+    parser.add_argument("--clientes", type=int, default=32, help="Solicitudes concurrentes")
+    parser.add_argument("--solicitudes", type=int, default=500, help="Solicitudes de puntuación en total")
+    parser.add_argument("--guias", type=int, default=16, help="Guías por solicitud")
+    parser.add_argument("--max-lote", type=int, default=4096, help="Guías máximas por llamada a predict")
+    parser.add_argument("--latencia-ms", type=float, default=5.0, help="Presupuesto de latencia de los micro-lotes")
+    parser.add_argument("--unix", action="store_true", help="Usar un socket Unix en lugar de TCP")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador aleatorio")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.semilla)
+    bases = np.array(list("ACGT"))
+    lotes = [["".join(g) for g in bases[rng.integers(0, 4, size=(args.guias, 20))]] for _ in range(args.solicitudes)]
+
+    with tempfile.TemporaryDirectory() as directorio:
+        socket_unix = os.path.join(directorio, "sgRNA.sock") if args.unix else None
+        servidor = ServidorSgRNA(puerto=0, socket_unix=socket_unix, modelos=[args.modelo],
+                                 max_lote=args.max_lote, latencia_ms=args.latencia_ms)
+        loop, direccion = iniciar_en_hilo(servidor)
+        cliente = ClienteSgRNA(socket_unix=socket_unix) if args.unix else ClienteSgRNA(direccion)
+        print(f"Servidor en {direccion}")
+
+        # Puntuación concurrente
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clientes) as pool:
+            respuestas = list(pool.map(lambda guias: cliente.puntuar(guias, args.modelo), lotes))
+        segundos = time.perf_counter() - inicio
+
+        esperado = predecir_eficiencia_batch([g for lote in lotes for g in lote], args.modelo)
+        assert np.allclose(np.concatenate(respuestas), esperado, rtol=0, atol=1e-4), "Las eficiencias no coinciden"
+        estadisticas = cliente.salud()["lotes"]
+        print(f"Puntuación: {args.solicitudes} solicitudes en {segundos:.3f} s "
+              f"({args.solicitudes / segundos:.0f} solicitudes/s, {args.solicitudes * args.guias / segundos:.0f} guías/s)")
+        print(f"Micro-lotes: {estadisticas['lotes']} llamadas a predict, {estadisticas['lote_medio']:.1f} guías por lote")
+
+        # Diseño concurrente sobre un genoma sintético
+        gen_file, target_file = generar_conjunto(directorio, 200_000, targets=4, semilla=args.semilla)
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            tablas = list(pool.map(lambda _: cliente.disenar(gen_file, target_file, args.modelo, alineador="exacto"),
+                                   range(4)))
+        segundos = time.perf_counter() - inicio
+        directo = design_sgRNAs_multi(gen_file, target_file, args.modelo, alineador="exacto")
+        for tabla in tablas:
+            assert tabla["gRNA"].tolist() == directo["gRNA"].tolist()
+            assert np.allclose(tabla["Eficiencia"], directo["Eficiencia"], rtol=0, atol=1e-4)
+        print(f"Diseño: 4 solicitudes concurrentes en {segundos:.3f} s ({len(directo)} guías cada una)")
+        print("Respuestas verificadas con las funciones del paquete.")
+
+        asyncio.run_coroutine_threadsafe(servidor.detener(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Generador de genomas y targets sintéticos (FASTA) reproducibles para los benchmarks.
+
+Con la misma semilla y los mismos parámetros se obtienen exactamente los mismos archivos, de
+modo que las mediciones de distintas ejecuciones son comparables.
+
+Uso:
+    python -m benchmarks.sintetico --largo 1000000 --registros 2 --targets 10 --directorio /tmp/sint
+"""
+import argparse
+import os
+
+import numpy as np
+
+from sgRNA.paq1_secuencia import complemento_inverso
+
+# Ancho de línea de los FASTA generados
+ANCHO_LINEA = 60
+
+
+def secuencia_aleatoria(rng, largo, gc=0.5):
+    """Secuencia aleatoria de `largo` bases con una fracción esperada `gc` de G y C."""
+    probabilidades = [(1 - gc) / 2, gc / 2, gc / 2, (1 - gc) / 2]
+    codigos = rng.choice(4, size=largo, p=probabilidades).astype(np.uint8)
+    return np.frombuffer(b"ACGT", dtype=np.uint8)[codigos].tobytes().decode("ascii")
+
+
+def escribir_fasta(ruta, registros, ancho=ANCHO_LINEA):
+    """Escribe una lista de (identificador, secuencia) en formato FASTA con líneas de `ancho` bases."""
+    with open(ruta, "w") as file:
+        for identificador, secuencia in registros:
+            file.write(f">{identificador}\n")
+            for inicio in range(0, len(secuencia), ancho):
+                file.write(secuencia[inicio:inicio + ancho] + "\n")
+
+
+def generar_genoma(rng, largo, registros=1, gc=0.5):
+    """
+    Genera un genoma sintético repartido en `registros` cromosomas de longitud similar.
+
+    Retorna:
+        list[tuple[str, str]]: Pares (identificador, secuencia).
+    """
+    base = largo // registros
+    largos = [base + (1 if i < largo % registros else 0) for i in range(registros)]
+    return [(f"chr{i + 1}", secuencia_aleatoria(rng, n, gc)) for i, n in enumerate(largos)]
+
+
+def muestrear_targets(rng, genoma, cantidad, largo_target, margen=20):
+    """
+    Toma `cantidad` targets del genoma en posiciones aleatorias, la mitad de ellos escritos sobre
+    la hebra "-", dejando `margen` bases libres a cada lado para la ventana de las guías.
+
+    Retorna:
+        list[tuple[str, str]]: Pares (identificador, secuencia).
+    """
+    targets = []
+    for i in range(cantidad):
+        cromosoma = genoma[int(rng.integers(len(genoma)))][1]
+        maximo = len(cromosoma) - largo_target - margen
+        if maximo <= margen:
+            raise ValueError("El genoma es demasiado corto para el largo de target pedido.")
+        inicio = int(rng.integers(margen, maximo))
+        secuencia = cromosoma[inicio:inicio + largo_target]
+        if i % 2 == 1:
+            secuencia = complemento_inverso(secuencia)
+        targets.append((f"target{i + 1}", secuencia))
+    return targets
+
+
+def generar_conjunto(directorio, largo, registros=1, targets=1, largo_target=1000, gc=0.5, semilla=0):
+    """
+    Escribe en `directorio` un genoma sintético (genoma.fa) y sus targets (targets.fa).
+
+    Parámetros:
+        directorio (str): Directorio de salida (se crea si no existe).
+        largo (int): Longitud total del genoma.
+        registros (int): Número de cromosomas.
+        targets (int): Número de targets a muestrear del genoma.
+        largo_target (int): Longitud de cada target.
+        gc (float): Fracción esperada de G y C.
+        semilla (int): Semilla del generador aleatorio.
+
+    Retorna:
+        tuple[str, str]: Rutas del genoma y del archivo de targets.
+    """
+    rng = np.random.default_rng(semilla)
+    genoma = generar_genoma(rng, largo, registros, gc)
+    os.makedirs(directorio, exist_ok=True)
+    gen_file = os.path.join(directorio, "genoma.fa")
+    target_file = os.path.join(directorio, "targets.fa")
+    escribir_fasta(gen_file, genoma)
+    escribir_fasta(target_file, muestrear_targets(rng, genoma, targets, largo_target))
+    return gen_file, target_file
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un genoma y targets sintéticos reproducibles.")
+    parser.add_argument("--largo", type=int, default=1_000_000, help="Longitud total del genoma")
+    parser.add_argument("--registros", type=int, default=1, help="Número de cromosomas")
+    parser.add_argument("--targets", type=int, default=1, help="Número de targets")
+    parser.add_argument("--largo-target", type=int, default=1000, help="Longitud de cada target")
+    parser.add_argument("--gc", type=float, default=0.5, help="Fracción esperada de G y C")
+    parser.add_argument("--semilla", type=int, default=0, help="Semilla del generador aleatorio")
+    parser.add_argument("--directorio", required=True, help="Directorio de salida")
+    args = parser.parse_args()
+
+    gen_file, target_file = generar_conjunto(args.directorio, args.largo, args.registros, args.targets,
+                                             args.largo_target, args.gc, args.semilla)
+    print(f"Genoma: {gen_file}\nTargets: {target_file}")
+
+
+if __name__ == "__main__":
+    main()
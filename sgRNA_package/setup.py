@@ -4,19 +4,27 @@ setup(
     name='sgRNA_package',
     version='1.0',
     packages=find_packages(),
+    package_data={'sgRNA': ['*.pkl', '*.h5', '*.npz']},
     install_requires=[
         'biopython==1.83',
         'numpy==1.24.4',
         'pandas==2.0.3',
-        'tensorflow==2.10.1',
         'joblib==1.4.2',
         'reportlab==3.6.12',
         'xgboost==2.1.4',
         'scikit-learn==1.3.2'
     ],
+    extras_require={
+        # Solo para exportar y verificar la red neuronal original (la CLI usa el motor NumPy)
+        'keras': ['tensorflow==2.10.1', 'h5py'],
+        # Salida en Parquet y Feather (--format parquet|feather)
+        'arrow': ['pyarrow'],
+    },
     entry_points={
         'console_scripts': [
             'sgRNA-run=sgRNA.main:main',
+            'sgRNA-serve=sgRNA.paq1_servidor:main',
+            'sgRNA-biblioteca=sgRNA.paq1_biblioteca:main',
         ]
     },
     description='Paquete para el diseño y predicción de eficiencia de sgRNAs para CRISPR-Cas9.',
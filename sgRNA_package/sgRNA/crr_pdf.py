@@ -1,58 +1,171 @@
+from itertools import accumulate
+
 from reportlab.lib.pagesizes import letter
 from reportlab.pdfgen import canvas
 import pandas as pd
+from sgRNA.paq1_perfil import contar, etapa
+
+# Diseño de la tabla: columnas (encabezado, ancho), posición de cada columna y posiciones verticales
+_COLUMNAS = [
+    ("gRNA", 160),  # Más espacio para "gRNA"
+    ("PAM", 50),
+    ("GC%", 50),
+    ("Posición", 60),
+    ("Hebra", 50),
+    ("Eficiencia", 70),
+]
+_X_INICIO = 40
+_X_COLUMNAS = list(accumulate([_X_INICIO] + [ancho for _, ancho in _COLUMNAS[:-1]]))
+_Y_TABLA_PRIMERA_PAGINA = 680  # Debajo del título y el resumen
+_Y_TABLA = 750                 # Resto de las páginas
+_Y_MINIMO = 50
+_ALTO_FILA = 20
+_Y_PIE = 25
+_X_TOTAL_PAGINAS = 300  # "Página i de" termina aquí y el total se escribe a continuación
+
+# Filas que se formatean de una vez al recorrer un DataFrame grande
+_FILAS_POR_BLOQUE = 10000
+
+
+def _bloques(df_sgRNA):
+    """Recorre un DataFrame por bloques de filas, o devuelve tal cual un iterable de bloques."""
+    if isinstance(df_sgRNA, pd.DataFrame):
+        return (df_sgRNA.iloc[inicio:inicio + _FILAS_POR_BLOQUE] for inicio in range(0, len(df_sgRNA), _FILAS_POR_BLOQUE))
+    return df_sgRNA
+
+
+def _celdas(bloque):
+    """Textos de las celdas de un bloque, fila por fila, con el mismo formato que la tabla original."""
+    return zip(
+        bloque["gRNA"].tolist(),
+        bloque["PAM"].tolist(),
+        (f"{gc}%" for gc in bloque["GC_content"].tolist()),
+        (str(posicion) for posicion in bloque["position"].tolist()),
+        bloque["hebra"].tolist(),
+        (f"{eficiencia:.2f}" if eficiencia == eficiencia else "-" for eficiencia in bloque["Eficiencia"].tolist()),
+    )
+
 
-def create_pdf(df_sgRNA, name_file_pdf):
+def _mejores(bloques, top_k):
+    """
+    Conserva las `top_k` guías de mayor eficiencia de una secuencia de bloques, sin reunir todas
+    las filas en memoria.
+
+    Retorna:
+        tuple[pd.DataFrame, int]: Guías seleccionadas (de mayor a menor eficiencia) y total de guías.
+    """
+    mejores, total = None, 0
+    for bloque in bloques:
+        with etapa("reporte_pdf"):
+            total += len(bloque)
+            candidatas = bloque if mejores is None else pd.concat([mejores, bloque])
+            mejores = candidatas.nlargest(top_k, "Eficiencia")
+    return mejores, total
+
+
+class _TablaPaginada:
+    """Dibuja las filas de la tabla en el canvas, con el encabezado repetido al comienzo de cada página."""
+
+    def __init__(self, c):
+        self.c = c
+        self.pagina = 1
+        self._encabezado(_Y_TABLA_PRIMERA_PAGINA)
+
+    def _encabezado(self, y):
+        self.c.setFont("Helvetica-Bold", 10)
+        for x, (encabezado, _) in zip(_X_COLUMNAS, _COLUMNAS):
+            self.c.drawString(x, y, encabezado)
+        self.c.setFont("Helvetica", 9)
+        self.y = y - _ALTO_FILA
+
+    def _pie(self):
+        self.c.setFont("Helvetica", 8)
+        self.c.drawRightString(_X_TOTAL_PAGINAS, _Y_PIE, f"Página {self.pagina} de ")
+        self.c.doForm("total_paginas")
+
+    def agregar(self, celdas):
+        """Dibuja una fila por cada tupla de textos de `celdas`."""
+        for fila in celdas:
+            if self.y < _Y_MINIMO:  # Cambiar de página si se acaba el espacio
+                self._pie()
+                self.c.showPage()
+                self.pagina += 1
+                self._encabezado(_Y_TABLA)
+            for x, texto in zip(_X_COLUMNAS, fila):
+                self.c.drawString(x, self.y, texto)
+            self.y -= _ALTO_FILA
+
+    def cerrar(self):
+        """Termina la última página y define el total de páginas usado en los pies."""
+        self._pie()
+        self.c.beginForm("total_paginas")
+        self.c.setFont("Helvetica", 8)
+        self.c.drawString(_X_TOTAL_PAGINAS, _Y_PIE, str(self.pagina))
+        self.c.endForm()
+
+
+def create_pdf(df_sgRNA, name_file_pdf, top_k=None):
     """
     Genera un PDF con información de guías sgRNA usando reportlab.
-    
+
+    Las filas se dibujan a medida que se recorren, por bloques, así que el reporte puede generarse
+    a partir de un iterador de bloques sin tener toda la tabla en memoria.
+
     Parámetros:
-        df_sgRNA (pd.DataFrame): DataFrame con las guías encontradas.
+        df_sgRNA (pd.DataFrame | iterable[pd.DataFrame]): DataFrame con las guías encontradas, o
+            bloques de filas con las mismas columnas.
         name_file_pdf (str): Nombre del archivo de salida (sin extensión).
+        top_k (int, opcional): Si se indica, solo se incluyen las `top_k` guías de mayor
+            eficiencia (modo resumen), para acotar el tamaño y el tiempo de generación del reporte.
+
+    Con un iterador, cada bloque se obtiene mientras se genera el reporte (por ejemplo, el diseño
+    de cada grupo de targets); la etapa "reporte_pdf" del perfil solo mide el dibujo y el guardado
+    del PDF, no la obtención de los bloques.
     """
     # Definir tamaño del PDF
     pdf_file = f"{name_file_pdf}.pdf"
-    c = canvas.Canvas(pdf_file, pagesize=letter)
-    
-    # Título alineado a la izquierda
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(40, 750, "Guías de sgRNA")
-    
-    # Espacio antes de la sección
-    c.setFont("Helvetica", 12)
-    c.drawString(40, 720, f"Se encontraron {len(df_sgRNA)} guías para la secuencia objetivo.")
-    c.drawString(40, 705, "Solo se muestran las guías cuyo GC% tiene valores entre 40%-80%.")
-    
-    # Posición inicial de la tabla
-    x_start = 40
-    y_start = 680
-    row_height = 20
-
-    # Definir anchos de columna ajustados
-    col_widths = [160, 50, 50, 60, 50, 70]  # Más espacio para "gRNA"
-
-    # Dibujar encabezado de la tabla
-    headers = ["gRNA", "PAM", "GC%", "Posición", "Hebra", "Eficiencia"]
-    c.setFont("Helvetica-Bold", 10)
-    for col, (header, width) in enumerate(zip(headers, col_widths)):
-        c.drawString(x_start + sum(col_widths[:col]), y_start, header)
-
-    # Dibujar filas de la tabla
-    c.setFont("Helvetica", 9)
-    for i, row in df_sgRNA.iterrows():
-        y_pos = y_start - (i + 1) * row_height
-        if y_pos < 50:  # Cambiar de página si se acaba el espacio
-            c.showPage()
-            y_pos = 750  # Reiniciar la posición en la nueva página
-
-        # Dibujar cada dato en la columna correspondiente
-        c.drawString(x_start, y_pos, row["gRNA"])  # gRNA más ancho
-        c.drawString(x_start + col_widths[0], y_pos, row["PAM"])
-        c.drawString(x_start + sum(col_widths[:2]), y_pos, f"{row['GC_content']}%")
-        c.drawString(x_start + sum(col_widths[:3]), y_pos, str(row["position"]))
-        c.drawString(x_start + sum(col_widths[:4]), y_pos, row["hebra"])
-        c.drawString(x_start + sum(col_widths[:5]), y_pos, f"{row['Eficiencia']:.2f}")
-
-    # Guardar PDF
-    c.save()
+    with etapa("reporte_pdf"):
+        c = canvas.Canvas(pdf_file, pagesize=letter)
+
+    bloques = _bloques(df_sgRNA)
+    if top_k is not None:
+        mejores, total = _mejores(bloques, top_k)
+        bloques = [] if mejores is None else _bloques(mejores)
+
+    with etapa("reporte_pdf"):
+        # Título alineado a la izquierda
+        c.setFont("Helvetica-Bold", 16)
+        c.drawString(40, 750, "Guías de sgRNA")
+
+        # Espacio antes de la sección; el total de guías se escribe al final si se recorre un iterador
+        c.setFont("Helvetica", 12)
+        c.drawString(40, 720, "Se encontraron")
+        c.doForm("total_guias")
+        if top_k is None:
+            c.drawString(40, 705, "Solo se muestran las guías cuyo GC% tiene valores entre 40%-80%.")
+        else:
+            mostradas = 0 if mejores is None else len(mejores)
+            c.drawString(40, 705, f"Se muestran las {mostradas} guías de mayor eficiencia, con GC% entre 40%-80%.")
+
+        # Dibujar filas de la tabla
+        tabla = _TablaPaginada(c)
+    filas = 0
+    for bloque in bloques:
+        with etapa("reporte_pdf"):
+            tabla.agregar(_celdas(bloque))
+        filas += len(bloque)
+
+    with etapa("reporte_pdf"):
+        tabla.cerrar()
+        if top_k is None:
+            total = filas
+        c.beginForm("total_guias")
+        c.setFont("Helvetica", 12)
+        c.drawString(40 + c.stringWidth("Se encontraron ", "Helvetica", 12), 720,
+                     f"{total} guías para la secuencia objetivo.")
+        c.endForm()
+
+        # Guardar PDF
+        c.save()
+    contar("filas_pdf", filas)
     print(f"PDF generado: {pdf_file}")
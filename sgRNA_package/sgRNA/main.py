@@ -1,33 +1,126 @@
 import argparse
 import pandas as pd
-from sgRNA.paq1_soporte import design_sgRNAs_rf, design_sgRNAs_nn, design_sgRNAs_xgb
+import os
+from sgRNA.paq1_soporte import design_sgRNAs, design_sgRNAs_rango, iter_design_sgRNAs_multi, es_multi_target
+from sgRNA.paq1_biblioteca import cargar_biblioteca, leer_region
+from sgRNA.paq1_offtarget import MAX_MISMATCHES, anotar_offtargets, validar_mismatches
+from sgRNA.paq1_cache import CacheEficiencias
+from sgRNA.paq1_alineamiento import BACKENDS_ALINEAMIENTO, SinAlineacion
+from sgRNA.paq1_lotes import ManifiestoLotes, ejecutar_lote
+from sgRNA.paq1_nucleasa import NUCLEASAS, obtener_nucleasas
 from sgRNA.crr_pdf import create_pdf
+from sgRNA.paq1_perfil import activar, desactivar, etapa
+from sgRNA.paq1_salida import FORMATOS, EscritorResultados, ruta_salida
+
+
+def _anotar_offtargets(bloques, gen_file, max_mismatches, nucleasas=None):
+    """Añade los off-targets a cada bloque de resultados a medida que se generan."""
+    for bloque in bloques:
+        with etapa("offtargets"):
+            anotado = anotar_offtargets(bloque, gen_file, max_mismatches, nucleasas=nucleasas)
+        yield anotado
+
 
 def main():
     parser = argparse.ArgumentParser(description='Ejecuta el diseño de sgRNAs para CRISPR-Cas9.')
     parser.add_argument('gen_file', type=str, help='Archivo FASTA del genoma de referencia')
-    parser.add_argument('target_file', type=str, help='Archivo FASTA con la secuencia objetivo')
-    parser.add_argument('--modelo', type=str, choices=['rf', 'nn', 'xgb'], default='rf', help='Modelo a utilizar: Random Forest (rf), Red Neuronal (nn) o XGBoost (xgb)')
+    parser.add_argument('target_file', type=str, help='Archivo FASTA con la secuencia objetivo (uno o varios registros) o directorio de archivos FASTA; con --biblioteca, también una región registro:inicio-fin (base 1)')
+    parser.add_argument('--modelo', type=str, choices=['rf', 'nn', 'xgb', 'combined', 'heuristic'], default='rf', help='Modelo a utilizar: Random Forest (rf), Red Neuronal (nn), XGBoost (xgb), el promedio de XGBoost y la Red Neuronal (combined) o las reglas heurísticas sin modelo (heuristic)')
+    parser.add_argument('--alineador', type=str, choices=list(BACKENDS_ALINEAMIENTO), default='blast', help='Backend de alineamiento: blastn contra el FASTA (blast), base de datos BLAST persistente (blastdb) o búsqueda exacta sin BLAST (exacto)')
+    parser.add_argument('--empaquetado', action='store_true', help='Lee las regiones de la representación empaquetada del genoma (2 bits por base, abierta con memoria mapeada), que se construye junto al FASTA la primera vez')
+    parser.add_argument('--biblioteca', type=str, default=None, metavar='RUTA', help='Directorio de la biblioteca de guías precalculada del genoma (ver sgRNA-biblioteca), construida con el mismo modelo y nucleasas: los candidatos y sus puntajes se leen de ella en lugar de escanear y puntuar cada región')
+    parser.add_argument('--nuclease', type=str, nargs='+', default=None, metavar='NUCLEASA', help=f'Nucleasas cuyos sitios se buscan, todas en una sola pasada: {", ".join(NUCLEASAS)} o una especificación PAM:lado:largo[:corte] (PAM en código IUPAC, lado 3 o 5 de la guía), por ejemplo NNGRRT:3:21:18. Agrega a los resultados las columnas nucleasa y corte; sin esta opción se usa SpCas9 (NGG) con guías de 20 nt')
+    parser.add_argument('--prefiltro', type=float, default=None, metavar='UMBRAL', help='Descarta antes de puntuar las guías con puntaje heurístico menor que UMBRAL (entre 0 y 2.2)')
+    parser.add_argument('--workers', type=int, default=1, help='Número de procesos para el diseño en paralelo (por defecto 1, en serie)')
+    parser.add_argument('--cache', type=str, default=None, metavar='RUTA', help='Archivo SQLite del caché de puntajes, reutilizado entre ejecuciones')
+    parser.add_argument('--checkpoint', type=str, default=None, metavar='RUTA', help='Archivo SQLite del manifiesto de la corrida: cada target terminado se registra y, al repetir la ejecución, solo se diseñan los targets que faltan o cuya secuencia cambió')
+    parser.add_argument('--offtargets', type=int, default=None, metavar='N', help=f'Cuenta los off-targets de cada guía con hasta N mismatches (entre 0 y {MAX_MISMATCHES}) y añade un puntaje de especificidad')
+    parser.add_argument('--profile', type=str, default=None, metavar='RUTA', help='Mide el tiempo de cada etapa, los conteos de candidatos y llamadas a predict y la memoria máxima, y guarda el informe en RUTA')
+    parser.add_argument('--profile-format', type=str, choices=['json', 'prometheus'], default=None, help='Formato del informe de --profile (por defecto, Prometheus para .prom/.txt y JSON en otro caso)')
+    parser.add_argument('--format', type=str, choices=list(FORMATOS), default='csv', help='Formato del archivo de resultados: csv, parquet, feather (ambos necesitan pyarrow) o jsonl. Los resultados se escriben a medida que termina cada bloque de targets')
+    parser.add_argument('--pdf', action=argparse.BooleanOptionalAction, default=True, help='Genera el reporte PDF (--no-pdf para omitirlo)')
+    parser.add_argument('--top-k', type=int, default=None, metavar='K', help='Incluye en el PDF solo las K guías de mayor eficiencia (el archivo de resultados conserva todas)')
     parser.add_argument('--output', type=str, default='sgRNA_results', help='Nombre base del archivo de salida (sin extensión)')
     
     args = parser.parse_args()
+    if args.top_k is not None:
+        # --top-k solo recorta el PDF; el archivo de resultados conserva todas las guías
+        if not args.pdf:
+            parser.error("--top-k solo se aplica al reporte PDF y no puede usarse con --no-pdf")
+        if args.top_k < 1:
+            parser.error("--top-k debe ser un entero positivo")
+    try:
+        nucleasas = obtener_nucleasas(args.nuclease) if args.nuclease else None
+        if args.offtargets is not None:
+            validar_mismatches(args.offtargets)
+    except ValueError as e:
+        parser.error(str(e))
+    biblioteca = region = None
+    if args.biblioteca:
+        try:
+            biblioteca = cargar_biblioteca(args.biblioteca)
+            biblioteca.verificar(args.gen_file, args.modelo, nucleasas)
+            if not os.path.exists(args.target_file):
+                region = leer_region(args.target_file)
+                if region[0] not in biblioteca.genoma.registros:
+                    raise ValueError(f"El registro {region[0]} no existe en el genoma")
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
     
+    perfil = activar() if args.profile else None
+
     print("Diseñando sgRNAs...")
+    cache = CacheEficiencias(args.cache) if args.cache else None
     
-    if args.modelo == 'rf':
-        df_sgRNA = design_sgRNAs_rf(args.gen_file, args.target_file)
-    elif args.modelo == 'nn':
-        df_sgRNA = design_sgRNAs_nn(args.gen_file, args.target_file)
+    manifiesto = ManifiestoLotes(args.checkpoint) if args.checkpoint else None
+
+    # Bloques de resultados (uno por grupo de targets): se escriben a medida que se generan
+    if region is not None:
+        # Región por coordenadas: solo una consulta a la biblioteca, sin alineamiento
+        bloques = [design_sgRNAs_rango(biblioteca, *region, prefiltro=args.prefiltro)]
+    elif manifiesto is not None:
+        bloques = ejecutar_lote(args.gen_file, args.target_file, manifiesto, args.modelo, workers=args.workers, cache=cache,
+                                alineador=args.alineador, prefiltro=args.prefiltro, empaquetado=args.empaquetado,
+                                nucleasas=nucleasas, biblioteca=biblioteca)
+    elif es_multi_target(args.target_file):
+        bloques = iter_design_sgRNAs_multi(args.gen_file, args.target_file, args.modelo, workers=args.workers, cache=cache,
+                                           alineador=args.alineador, prefiltro=args.prefiltro, empaquetado=args.empaquetado,
+                                           nucleasas=nucleasas, biblioteca=biblioteca)
     else:
-        df_sgRNA = design_sgRNAs_xgb(args.gen_file, args.target_file)
-    
-    csv_output = f"{args.output}.csv"
-    pdf_output = f"{args.output}"
-    
-    df_sgRNA.to_csv(csv_output, index=False)
-    create_pdf(df_sgRNA, pdf_output)
-    
-    print(f"Resultados guardados en {csv_output} y {pdf_output}.pdf")
+        try:
+            bloques = [design_sgRNAs(args.gen_file, args.target_file, args.modelo, workers=args.workers, cache=cache,
+                                     alineador=args.alineador, prefiltro=args.prefiltro, empaquetado=args.empaquetado,
+                                     nucleasas=nucleasas, biblioteca=biblioteca)]
+        except SinAlineacion as e:
+            raise SystemExit(str(e))
+
+    if args.offtargets is not None:
+        print("Buscando off-targets...")
+        bloques = _anotar_offtargets(bloques, args.gen_file, args.offtargets, nucleasas)
+
+    salida = ruta_salida(args.output, args.format)
+    with EscritorResultados(salida, args.format) as escritor:
+        bloques = escritor.escribir_bloques(bloques)
+        if args.pdf:
+            create_pdf(bloques, args.output, top_k=args.top_k)
+        else:
+            for _ in bloques:
+                pass
+
+    if cache is not None:
+        estadisticas = cache.estadisticas()
+        print(f"Caché de puntajes: {estadisticas['aciertos']} aciertos, {estadisticas['fallos']} fallos "
+              f"(tasa de aciertos {estadisticas['tasa_aciertos']:.1%})")
+        cache.cerrar()
+    if manifiesto is not None:
+        manifiesto.cerrar()
+
+    print(f"Resultados guardados en {salida}" + (f" y {args.output}.pdf" if args.pdf else ""))
+
+    if perfil is not None:
+        desactivar()
+        perfil.guardar(args.profile, args.profile_format)
+        print(f"Perfil de ejecución guardado en {args.profile}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,174 @@
+import os
+import subprocess
+
+import pandas as pd
+from Bio import SeqIO
+
+from sgRNA.paq1_secuencia import complemento_inverso
+
+# Columnas de todas las alineaciones: sacc (target), qacc (registro del genoma),
+# qstart y qend (coordenadas base 1 en el genoma, qstart <= qend). Los identificadores se
+# piden a BLAST con su versión (saccver, qaccver), tal como los lee Biopython y el índice .fai.
+COLUMNAS_ALINEAMIENTO = ["sacc", "qacc", "qstart", "qend"]
+
+
+class SinAlineacion(ValueError):
+    """El target no se pudo ubicar en el genoma (no hay alineaciones o el alineador falló)."""
+
+
+def _tabla_alineamiento(filas):
+    """DataFrame de alineaciones con coordenadas enteras, o None si no hay ninguna."""
+    if not filas:
+        return None
+    df = pd.DataFrame(filas, columns=COLUMNAS_ALINEAMIENTO)
+    return df.astype({"qstart": "int64", "qend": "int64"})
+
+
+def _ejecutar_blast(command_blast):
+    """Ejecuta BLASTn y devuelve las líneas de salida, o None si falla o no hay alineaciones."""
+    try:
+        result = subprocess.run(command_blast, check=True, capture_output=True, text=True)
+    except subprocess.CalledProcessError as e:
+        print(f"Error al ejecutar BLAST: {e}")
+        return None
+
+    # Revisar si hay salida vacía (sin alineaciones)
+    output_lines = result.stdout.strip().split("\n")
+    if not output_lines or output_lines[0] == "":
+        print("No se encontraron alineaciones en BLAST.")
+        return None
+    return output_lines
+
+
+def blast_align(genome_sequence, target_sequence):
+    """
+    Alinea una secuencia de consulta contra un archivo FASTA usando BLASTn y devuelve un DataFrame.
+
+    Columnas: sacc (target), qacc (registro del genoma), qstart y qend (coordenadas enteras en el genoma).
+    """
+
+    # Ejecutar BLASTn con subprocess
+    command_blast = [
+        "blastn",
+        "-query", genome_sequence,
+        "-subject", target_sequence,
+        "-outfmt", "6 saccver qaccver qstart qend"
+    ]
+    output_lines = _ejecutar_blast(command_blast)
+    if output_lines is None:
+        return None
+
+    # Convertir la salida en un DataFrame
+    return _tabla_alineamiento([line.split("\t") for line in output_lines])
+
+
+def ruta_blastdb(gen_file):
+    """Prefijo de la base de datos BLAST persistente de un genoma (junto al FASTA)."""
+    return os.path.join(f"{gen_file}.blastdb", "genoma")
+
+
+def preparar_blastdb(gen_file):
+    """
+    Crea con `makeblastdb` la base de datos BLAST del genoma si no existe o si el FASTA es más
+    reciente, y devuelve su prefijo. La base se reutiliza entre ejecuciones.
+    """
+    prefijo = ruta_blastdb(gen_file)
+    marcador = f"{prefijo}.nin"
+    if os.path.exists(marcador) and os.path.getmtime(marcador) >= os.path.getmtime(gen_file):
+        return prefijo
+
+    os.makedirs(os.path.dirname(prefijo), exist_ok=True)
+    print(f"Creando base de datos BLAST para {gen_file}...")
+    subprocess.run(
+        ["makeblastdb", "-in", gen_file, "-dbtype", "nucl", "-parse_seqids", "-out", prefijo],
+        check=True, capture_output=True, text=True,
+    )
+    return prefijo
+
+
+def blast_align_db(gen_file, target_file):
+    """
+    Alinea los targets contra la base de datos BLAST persistente del genoma (ver `preparar_blastdb`),
+    sin reconstruir las estructuras de búsqueda en cada ejecución.
+    """
+    try:
+        prefijo = preparar_blastdb(gen_file)
+    except subprocess.CalledProcessError as e:
+        print(f"Error al ejecutar makeblastdb: {e}")
+        return None
+
+    # Aquí el genoma es la base de datos (sujeto) y los targets son la consulta
+    command_blast = [
+        "blastn",
+        "-db", prefijo,
+        "-query", target_file,
+        "-outfmt", "6 qaccver saccver sstart send"
+    ]
+    output_lines = _ejecutar_blast(command_blast)
+    if output_lines is None:
+        return None
+
+    filas = []
+    for line in output_lines:
+        target, registro, sstart, send = line.split("\t")
+        sstart, send = int(sstart), int(send)
+        filas.append([target, registro, min(sstart, send), max(sstart, send)])
+    return _tabla_alineamiento(filas)
+
+
+def localizar_exacto(gen_file, target_file):
+    """
+    Localiza cada target como subcadena exacta del genoma, en cualquiera de las dos hebras, sin
+    BLAST. Es el caso habitual cuando el target se extrajo del mismo genoma de referencia.
+
+    El genoma se recorre una vez, registro por registro; los targets que no aparecen de forma
+    exacta quedan sin alineación.
+    """
+    pendientes = {}
+    for record in SeqIO.parse(target_file, "fasta"):
+        secuencia = str(record.seq).upper()
+        pendientes[record.id] = (secuencia, complemento_inverso(secuencia))
+    orden = list(pendientes)
+
+    encontrados = {}
+    for record in SeqIO.parse(gen_file, "fasta"):
+        if not pendientes:
+            break
+        genoma = str(record.seq).upper()
+        for target, (directa, inversa) in list(pendientes.items()):
+            posicion = genoma.find(directa)
+            if posicion < 0:
+                posicion = genoma.find(inversa)
+            if posicion >= 0:
+                encontrados[target] = [target, record.id, posicion + 1, posicion + len(directa)]
+                del pendientes[target]
+
+    if not encontrados:
+        print("No se encontraron coincidencias exactas de los targets en el genoma.")
+    return _tabla_alineamiento([encontrados[target] for target in orden if target in encontrados])
+
+
+# Backends de alineamiento disponibles: nombre -> función (gen_file, target_file) -> DataFrame | None
+BACKENDS_ALINEAMIENTO = {
+    "blast": blast_align,
+    "blastdb": blast_align_db,
+    "exacto": localizar_exacto,
+}
+
+
+def alinear(gen_file, target_file, backend="blast"):
+    """
+    Ubica los targets en el genoma con el backend indicado.
+
+    Parámetros:
+        gen_file (str): Archivo FASTA del genoma de referencia.
+        target_file (str): Archivo FASTA con uno o varios targets.
+        backend (str): "blast" (blastn contra el FASTA), "blastdb" (base de datos BLAST persistente)
+            o "exacto" (búsqueda de subcadenas exactas, sin BLAST).
+
+    Retorna:
+        pd.DataFrame | None: Columnas sacc, qacc, qstart y qend (enteras), o None sin alineaciones.
+    """
+    if backend not in BACKENDS_ALINEAMIENTO:
+        raise ValueError(f"Backend de alineamiento desconocido: {backend}. Opciones: {', '.join(BACKENDS_ALINEAMIENTO)}")
+    return BACKENDS_ALINEAMIENTO[backend](gen_file, target_file)
@@ -0,0 +1,343 @@
+import argparse
+import json
+import os
+import time
+from itertools import islice
+
+import numpy as np
+
+from sgRNA.paq1_genoma import cargar_genoma_empaquetado
+from sgRNA.paq1_nucleasa import NUCLEASAS, Nucleasa, obtener_nucleasa, obtener_nucleasas
+from sgRNA.paq1_percent import DEFAULT_BATCH_SIZE, clave_modelo, obtener_puntuador, predecir_eficiencia_batch
+from sgRNA.paq1_perfil import contar, etapa
+from sgRNA.paq1_secuencia import a_codigos, complemento_inverso, gc_conteos, validas_lote
+from sgRNA.paq1_soporte import iter_sitios_nucleasas, nucleasas_diseno, pool_puntuacion, puntuar_guias
+
+# Versión del formato en disco; cambiarla obliga a reconstruir las bibliotecas
+_VERSION = 1
+
+# Sitios que se puntúan juntos al construir la biblioteca
+DEFAULT_LOTE_SITIOS = 1 << 20
+
+# Cada cuántas filas se guarda una muestra del índice disperso de posiciones
+_PASO_INDICE = 1024
+
+# Columnas de la biblioteca (un archivo binario por columna) y su tipo; "eficiencia" usa el tipo
+# que devuelve el modelo
+_COLUMNAS = {"huella": np.int64, "hebra": np.uint8, "nucleasa": np.uint8, "gc": np.uint8}
+
+_HEBRAS = "+-"
+
+
+def ruta_biblioteca(gen_file, modelo):
+    """Directorio por defecto de la biblioteca de guías de un genoma y un modelo (junto al FASTA)."""
+    return f"{gen_file}.biblioteca_{obtener_puntuador(modelo).nombre}"
+
+
+def _desplazamientos(nucleasas):
+    """
+    Por nucleasa y hebra: bases entre el inicio de la huella (guía + PAM) y el de la guía, sobre
+    la hebra directa. Arreglo (n_nucleasas, 2).
+    """
+    return np.array([[len(n.pam) if (n.lado == "5") == (hebra == "+") else 0 for hebra in _HEBRAS]
+                     for n in nucleasas], dtype=np.int64)
+
+
+def _lotes(iterable, tamano):
+    """Divide un iterable en listas de hasta `tamano` elementos."""
+    iterador = iter(iterable)
+    while lote := list(islice(iterador, tamano)):
+        yield lote
+
+
+def _columnas_lote(sitios, nucleasas, origen, modelo, batch_size, workers, tipo_eficiencia, pool=None):
+    """
+    Columnas de un lote de sitios (ver `iter_sitios_nucleasas`) de un registro que empieza en la
+    coordenada global `origen`. Se puntúan las guías con GC entre 40% y 80% cuya nucleasa
+    puntúan los modelos; el resto queda con eficiencia NaN, igual que en `_disenar_grupos`.
+    Las guías con bases que no son A, C, G ni T (N, códigos IUPAC) se descartan, igual que en
+    `_filtrar_gc`: los modelos no pueden codificarlas.
+    """
+    indice_de = {id(nucleasa): i for i, nucleasa in enumerate(nucleasas)}
+    indices = np.array([indice_de[id(sitio[0])] for sitio in sitios], dtype=np.uint8)
+    hebras = np.array([_HEBRAS.index(sitio[1]) for sitio in sitios], dtype=np.uint8)
+    inicios = np.array([sitio[2] for sitio in sitios], dtype=np.int64)
+    gc = np.zeros(len(sitios), dtype=np.uint8)
+    puntuables = np.zeros(len(sitios), dtype=bool)
+    validas = np.ones(len(sitios), dtype=bool)
+    # El contenido GC se calcula por nucleasa, porque cada una tiene su largo de guía
+    for indice, nucleasa in enumerate(nucleasas):
+        filas = np.flatnonzero(indices == indice)
+        if not len(filas):
+            continue
+        guias = [sitios[fila][3] for fila in filas]
+        codigos = a_codigos("".join(guias)).reshape(len(filas), nucleasa.largo_guia)
+        validas[filas] = validas_lote(guias)
+        gc[filas] = ((codigos == 1) | (codigos == 2)).sum(axis=1)
+        porcentaje = gc_conteos(gc[filas], nucleasa.largo_guia)
+        puntuables[filas] = (porcentaje >= 40) & (porcentaje <= 80) & nucleasa.puntuable & validas[filas]
+
+    eficiencias = np.full(len(sitios), np.nan, dtype=tipo_eficiencia)
+    if puntuables.any():
+        with etapa("puntuacion"):
+            eficiencias[puntuables] = puntuar_guias([sitios[fila][3] for fila in np.flatnonzero(puntuables)],
+                                                    modelo, batch_size, workers, pool)
+    contar("guias_biblioteca", int(validas.sum()))
+    contar("guias_puntuadas", int(puntuables.sum()))
+    columnas = {"huella": origen + inicios - _desplazamientos(nucleasas)[indices, hebras], "hebra": hebras,
+                "nucleasa": indices, "gc": gc, "eficiencia": eficiencias}
+    if validas.all():
+        return columnas
+    return {columna: valores[validas] for columna, valores in columnas.items()}
+
+
+def construir_biblioteca(gen_file, modelo="rf", nucleasas=None, window_size=20, destino=None,
+                         batch_size=DEFAULT_BATCH_SIZE, workers=1, lote_sitios=DEFAULT_LOTE_SITIOS):
+    """
+    Precalcula la biblioteca de guías de un genoma completo: todas las guías adyacentes a un PAM,
+    en ambas hebras, con su contenido GC y el puntaje del modelo. Es un trabajo que se hace una
+    sola vez por genoma, modelo y nucleasas. Las guías que cruzan tramos de N (o de otras bases
+    que no son A, C, G ni T) no se guardan.
+
+    Cada registro de la representación empaquetada del genoma (ver `paq1_genoma`) se recorre por
+    tramos con el escáner de `iter_sitios_nucleasas`, y los sitios se puntúan en lotes de
+    `lote_sitios` y se agregan a disco a medida que se generan, así que la memoria no depende
+    del tamaño del genoma. Las filas quedan ordenadas por la coordenada global del inicio de su
+    huella (guía + PAM), con un índice disperso para ubicar un rango sin recorrer el archivo.
+
+    Parámetros:
+        gen_file (str): Archivo FASTA del genoma de referencia.
+        modelo (str | paq1_percent.Puntuador): Modelo de eficiencia.
+        nucleasas (list[paq1_nucleasa.Nucleasa], opcional): Nucleasas; sin ellas, SpCas9 con
+            guías de `window_size` bases (como en `design_sgRNAs`).
+        destino (str, opcional): Directorio de la biblioteca (por defecto, `ruta_biblioteca`).
+        batch_size (int), workers (int): Como en `design_sgRNAs`; se usa un único pool de
+            procesos para puntuar todos los lotes.
+        lote_sitios (int): Sitios que se puntúan juntos.
+
+    Retorna:
+        BibliotecaGuias: La biblioteca construida, abierta desde disco.
+    """
+    lista = nucleasas_diseno(nucleasas, window_size)
+    destino = destino or ruta_biblioteca(gen_file, modelo)
+    genoma = cargar_genoma_empaquetado(gen_file)
+    puntuables = any(nucleasa.puntuable for nucleasa in lista)
+    # Los puntajes se guardan con el tipo que devuelve el modelo, para que la tabla sea idéntica
+    tipo_eficiencia = np.float32
+    if puntuables:
+        tipo_eficiencia = np.result_type(np.asarray(predecir_eficiencia_batch(["ACGT" * 5], modelo)).dtype, np.float32)
+
+    os.makedirs(destino, exist_ok=True)
+    # Sin meta.json la biblioteca queda marcada como incompleta hasta terminar
+    if os.path.exists(os.path.join(destino, "meta.json")):
+        os.remove(os.path.join(destino, "meta.json"))
+    tipos = dict(_COLUMNAS, eficiencia=tipo_eficiencia)
+    archivos = {nombre: open(os.path.join(destino, f"{nombre}.bin"), "wb") for nombre in tipos}
+    filas = 0
+    try:
+        with pool_puntuacion(modelo, workers) as pool:
+            for nombre, (origen, _) in genoma.registros.items():
+                print(f"Biblioteca de guías: registro {nombre}...")
+                sitios = iter_sitios_nucleasas(genoma.iter_fragmentos(nombre), lista)
+                for lote in _lotes(sitios, lote_sitios):
+                    columnas = _columnas_lote(lote, lista, origen, modelo, batch_size, workers, tipo_eficiencia, pool)
+                    for columna, valores in columnas.items():
+                        valores.astype(tipos[columna], copy=False).tofile(archivos[columna])
+                    filas += len(columnas["huella"])
+    finally:
+        for archivo in archivos.values():
+            archivo.close()
+
+    huellas = np.memmap(os.path.join(destino, "huella.bin"), dtype=np.int64, mode="r", shape=(filas,)) if filas else np.zeros(0, np.int64)
+    np.save(os.path.join(destino, "indice.npy"), np.array(huellas[::_PASO_INDICE]))
+    del huellas
+    estado = os.stat(gen_file)
+    with open(os.path.join(destino, "meta.json"), "w") as file:
+        json.dump({"version": _VERSION, "gen_file": os.path.abspath(gen_file), "fasta_mtime": estado.st_mtime,
+                   "fasta_size": estado.st_size, "modelo": clave_modelo(modelo),
+                   "nucleasas": [[nucleasa.nombre, nucleasa.especificacion()] for nucleasa in lista],
+                   "con_nucleasa": bool(nucleasas),
+                   "filas": filas, "tipos": {nombre: np.dtype(tipo).str for nombre, tipo in tipos.items()}}, file)
+    return BibliotecaGuias.cargar(destino)
+
+
+class BibliotecaGuias:
+    """
+    Biblioteca de guías precalculada de un genoma (ver `construir_biblioteca`), abierta con
+    memoria mapeada: una consulta por rango lee solo las filas de ese rango.
+
+    Atributos:
+        nucleasas (list[paq1_nucleasa.Nucleasa]): Nucleasas de la biblioteca, en su orden.
+        genoma (paq1_genoma.GenomaEmpaquetado): Genoma del que se leen las secuencias.
+        meta (dict): Metadatos (genoma, clave del modelo, nucleasas, número de filas).
+    """
+
+    def __init__(self, directorio, meta, columnas, indice):
+        self.directorio = directorio
+        self.meta = meta
+        self.columnas = columnas
+        self.indice = indice
+        self.nucleasas = [_nucleasa_guardada(nombre, especificacion) for nombre, especificacion in meta["nucleasas"]]
+        self.genoma = cargar_genoma_empaquetado(meta["gen_file"])
+        self._desplazamientos = _desplazamientos(self.nucleasas)
+        self._huellas = np.array([nucleasa.huella for nucleasa in self.nucleasas], dtype=np.int64)
+
+    @classmethod
+    def cargar(cls, directorio):
+        """Abre una biblioteca guardada por `construir_biblioteca`."""
+        meta_file = os.path.join(directorio, "meta.json")
+        if not os.path.exists(meta_file):
+            raise FileNotFoundError(f"No hay una biblioteca completa en {directorio}")
+        with open(meta_file) as file:
+            meta = json.load(file)
+        if meta.get("version") != _VERSION:
+            raise ValueError(f"La biblioteca {directorio} tiene un formato anterior; hay que reconstruirla.")
+        columnas = {}
+        for nombre, tipo in meta["tipos"].items():
+            if meta["filas"]:
+                columnas[nombre] = np.memmap(os.path.join(directorio, f"{nombre}.bin"), dtype=np.dtype(tipo),
+                                             mode="r", shape=(meta["filas"],)).view(np.ndarray)
+            else:
+                columnas[nombre] = np.zeros(0, dtype=np.dtype(tipo))
+        return cls(directorio, meta, columnas, np.load(os.path.join(directorio, "indice.npy")))
+
+    def __len__(self):
+        return self.meta["filas"]
+
+    def verificar(self, gen_file, modelo, nucleasas=None, window_size=20):
+        """
+        Comprueba que la biblioteca corresponde al genoma (FASTA actual), al modelo (y sus
+        archivos) y a las nucleasas de un diseño; si no, lanza ValueError.
+        """
+        estado = os.stat(gen_file)
+        if (os.path.abspath(gen_file) != self.meta["gen_file"] or estado.st_mtime != self.meta["fasta_mtime"]
+                or estado.st_size != self.meta["fasta_size"]):
+            raise ValueError(f"La biblioteca {self.directorio} no corresponde al genoma {gen_file} (o el FASTA cambió).")
+        if clave_modelo(modelo) != self.meta["modelo"]:
+            raise ValueError(f"La biblioteca {self.directorio} se construyó con otro modelo ({self.meta['modelo']}).")
+        pedidas = [[nucleasa.nombre, nucleasa.especificacion()] for nucleasa in nucleasas_diseno(nucleasas, window_size)]
+        if pedidas != self.meta["nucleasas"]:
+            raise ValueError(f"La biblioteca {self.directorio} se construyó para otras nucleasas: {self.meta['nucleasas']}")
+
+    def _filas(self, desde, hasta):
+        """Índices de las filas cuya huella (guía + PAM) está completa en [desde, hasta) (coordenadas globales)."""
+        huella = self.columnas["huella"]
+        # El índice disperso acota la búsqueda a un tramo de _PASO_INDICE filas en cada extremo
+        limites = []
+        for valor in (desde, hasta - int(self._huellas.min()) + 1):
+            bloque = max(int(np.searchsorted(self.indice, valor)) - 1, 0) * _PASO_INDICE
+            tramo = huella[bloque:bloque + _PASO_INDICE + 1]
+            limites.append(bloque + int(np.searchsorted(tramo, valor)))
+        filas = np.arange(limites[0], max(limites))
+        completas = huella[filas] + self._huellas[self.columnas["nucleasa"][filas]] <= hasta
+        return filas[completas]
+
+    def rango(self, nombre, inicio, fin):
+        """
+        Filas de la biblioteca con la huella completa dentro de [inicio, fin) (base 0) del registro.
+
+        Retorna:
+            dict: Columnas "huella", "hebra", "nucleasa", "gc" y "eficiencia" de esas filas (con
+            la huella en coordenadas globales) y "inicio", el de la guía relativo a `inicio`.
+        """
+        if nombre not in self.genoma.registros:
+            raise KeyError(f"El registro {nombre} no existe en el genoma")
+        origen, largo = self.genoma.registros[nombre]
+        fin = min(fin, largo)
+        inicio = min(max(inicio, 0), fin)
+        filas = self._filas(origen + inicio, origen + fin)
+        resultado = {columna: valores[filas] for columna, valores in self.columnas.items()}
+        resultado["inicio"] = (resultado["huella"] + self._desplazamientos[resultado["nucleasa"], resultado["hebra"]]
+                               - origen - inicio)
+        return resultado
+
+    def candidatos(self, nombre, start, end, solo_aceptados=False):
+        """
+        Candidatos de la región [start, end] (base 1, inclusivo) del registro, como los que arma
+        `paq1_soporte._recolectar_candidatos` sobre la región extraída del genoma empaquetado, y
+        sus valores guardados. Con `solo_aceptados` se omiten, antes de leer sus secuencias, los
+        que el filtro GC (entre 40% y 80%) descartaría.
+
+        Retorna:
+            tuple[list[tuple], np.ndarray, np.ndarray]: Tuplas (gRNA, PAM, posición, hebra,
+            nucleasa), en el mismo orden que `_recolectar_candidatos`, y el %GC (como `gc_lote`) y
+            la eficiencia de cada una.
+        """
+        with etapa("biblioteca"):
+            region = self.genoma.extraer_rango(nombre, start, end)
+            filas = self.rango(nombre, max(start, 1) - 1, end)
+            gc = np.zeros(len(filas["gc"]))
+            for indice, nucleasa in enumerate(self.nucleasas):
+                seleccion = filas["nucleasa"] == indice
+                gc[seleccion] = gc_conteos(filas["gc"][seleccion], nucleasa.largo_guia)
+            inicios, hebras, indices = filas["inicio"], filas["hebra"], filas["nucleasa"]
+            # Por nucleasa, la hebra "+" en orden creciente y luego la "-" en orden creciente sobre el complemento inverso
+            orden = np.lexsort((np.where(hebras == 0, inicios, -inicios), hebras, indices))
+            if solo_aceptados:
+                orden = orden[(gc[orden] >= 40) & (gc[orden] <= 80)]
+            largo = len(region)
+            candidatos = []
+            for i in orden.tolist():
+                nucleasa = self.nucleasas[indices[i]]
+                inicio, largo_guia, largo_pam = int(inicios[i]), nucleasa.largo_guia, len(nucleasa.pam)
+                guia = region[inicio:inicio + largo_guia]
+                if hebras[i] == 0:
+                    pam = region[inicio + largo_guia:inicio + largo_guia + largo_pam] if nucleasa.lado == "3" \
+                        else region[inicio - largo_pam:inicio]
+                    candidatos.append((guia, pam, inicio, "+", nucleasa))
+                else:
+                    pam = region[inicio - largo_pam:inicio] if nucleasa.lado == "3" \
+                        else region[inicio + largo_guia:inicio + largo_guia + largo_pam]
+                    candidatos.append((complemento_inverso(guia), complemento_inverso(pam), largo - inicio - largo_guia, "-", nucleasa))
+        contar("guias_biblioteca_consultadas", len(candidatos))
+        return candidatos, gc[orden], filas["eficiencia"][orden]
+
+
+def leer_region(texto):
+    """
+    Región registro:inicio-fin (base 1, inclusiva; se aceptan separadores de miles con comas).
+
+    Retorna:
+        tuple[str, int, int]: Registro, inicio y fin.
+    """
+    registro, _, rango = texto.rpartition(":")
+    inicio, _, fin = rango.replace(",", "").partition("-")
+    if not registro or not inicio.isdigit() or not fin.isdigit() or int(inicio) > int(fin):
+        raise ValueError(f"Región inválida: {texto}. Debe tener la forma registro:inicio-fin.")
+    return registro, int(inicio), int(fin)
+
+
+def _nucleasa_guardada(nombre, especificacion):
+    """Nucleasa de los metadatos de una biblioteca, con su nombre original."""
+    nucleasa = obtener_nucleasa(especificacion)
+    return Nucleasa(nombre, nucleasa.pam, nucleasa.lado, nucleasa.largo_guia, nucleasa.corte)
+
+
+def cargar_biblioteca(ruta):
+    """Abre la biblioteca de guías de un directorio (ver `construir_biblioteca`)."""
+    return BibliotecaGuias.cargar(ruta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precalcula la biblioteca de guías de un genoma completo.")
+    parser.add_argument("gen_file", help="Archivo FASTA del genoma")
+    parser.add_argument("--modelo", choices=["rf", "nn", "xgb", "combined", "heuristic"], default="rf", help="Modelo de eficiencia")
+    parser.add_argument("--nuclease", nargs="+", default=None, metavar="NUCLEASA",
+                        help=f"Nucleasas ({', '.join(NUCLEASAS)} o PAM:lado:largo[:corte]); por defecto SpCas9 sin columnas de nucleasa")
+    parser.add_argument("--salida", default=None, metavar="DIRECTORIO", help="Directorio de la biblioteca (por defecto, junto al FASTA)")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos para puntuar en paralelo")
+    args = parser.parse_args()
+    try:
+        nucleasas = obtener_nucleasas(args.nuclease) if args.nuclease else None
+    except ValueError as e:
+        parser.error(str(e))
+
+    inicio = time.perf_counter()
+    biblioteca = construir_biblioteca(args.gen_file, args.modelo, nucleasas, destino=args.salida, workers=args.workers)
+    segundos = time.perf_counter() - inicio
+    tamano = sum(valores.nbytes for valores in biblioteca.columnas.values())
+    print(f"{len(biblioteca)} guías, {tamano / 1e6:.1f} MB en {biblioteca.directorio} ({segundos:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
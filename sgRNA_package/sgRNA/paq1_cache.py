@@ -0,0 +1,179 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Límites por defecto del caché (número de entradas)
+DEFAULT_MAX_MEMORIA = 100_000
+DEFAULT_MAX_DISCO = 5_000_000
+
+# Número máximo de parámetros por consulta SQL
+_PARAMETROS_POR_CONSULTA = 500
+
+# Huellas de archivos ya calculadas: ruta absoluta -> (mtime, tamaño, sha256)
+_huellas = {}
+
+
+def huella_archivo(ruta):
+    """SHA-256 del contenido de un archivo, calculado una sola vez mientras no cambie."""
+    ruta = os.path.abspath(ruta)
+    estado = os.stat(ruta)
+    guardada = _huellas.get(ruta)
+    if guardada is not None and guardada[:2] == (estado.st_mtime, estado.st_size):
+        return guardada[2]
+
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as file:
+        for bloque in iter(lambda: file.read(1 << 20), b""):
+            sha.update(bloque)
+    _huellas[ruta] = (estado.st_mtime, estado.st_size, sha.hexdigest())
+    return sha.hexdigest()
+
+
+class CacheEficiencias:
+    """
+    Caché de eficiencias direccionado por contenido: la clave es la guía junto con el nombre del
+    modelo y la huella (SHA-256) de su archivo, de modo que reentrenar un modelo invalida sus
+    entradas sin borrar nada.
+
+    Tiene dos niveles: un LRU en memoria delante de una base SQLite en disco. Ambos se limitan
+    por número de entradas; en disco se descartan primero las de acceso más antiguo.
+
+    Parámetros:
+        ruta (str): Archivo SQLite del caché (se crea si no existe).
+        max_memoria (int): Entradas máximas del nivel en memoria.
+        max_disco (int): Entradas máximas del nivel en disco.
+    """
+
+    def __init__(self, ruta, max_memoria=DEFAULT_MAX_MEMORIA, max_disco=DEFAULT_MAX_DISCO):
+        self.ruta = ruta
+        self.max_memoria = max_memoria
+        self.max_disco = max_disco
+        self.aciertos = 0
+        self.fallos = 0
+        self._memoria = OrderedDict()
+        self._tipos = {}
+        self._lock = threading.Lock()
+
+        self._conexion = sqlite3.connect(ruta, timeout=60, check_same_thread=False)
+        self._conexion.executescript("""
+            CREATE TABLE IF NOT EXISTS eficiencias (
+                modelo TEXT NOT NULL,
+                guia TEXT NOT NULL,
+                eficiencia REAL NOT NULL,
+                acceso INTEGER NOT NULL,
+                PRIMARY KEY (modelo, guia)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS eficiencias_acceso ON eficiencias (acceso);
+            CREATE TABLE IF NOT EXISTS modelos (modelo TEXT PRIMARY KEY, dtype TEXT NOT NULL);
+        """)
+        self._reloj, self._entradas = self._conexion.execute(
+            "SELECT COALESCE(MAX(acceso), 0), COUNT(*) FROM eficiencias").fetchone()
+        self._tipos.update(self._conexion.execute("SELECT modelo, dtype FROM modelos").fetchall())
+
+    def buscar(self, guias, modelo):
+        """
+        Busca un lote de guías para un modelo.
+
+        Parámetros:
+            guias (list[str]): Guías a buscar.
+            modelo (str): Clave del modelo (nombre y huella, ver `paq1_percent.clave_modelo`).
+
+        Retorna:
+            tuple[np.ndarray, np.ndarray]: Eficiencias (NaN en los fallos), con el tipo de dato
+            original del modelo si se conoce, y máscara booleana de aciertos.
+        """
+        with self._lock:
+            valores = np.full(len(guias), np.nan)
+            aciertos = np.zeros(len(guias), dtype=bool)
+            faltantes = {}
+            for i, guia in enumerate(guias):
+                valor = self._memoria.get((modelo, guia))
+                if valor is None:
+                    faltantes.setdefault(guia, []).append(i)
+                else:
+                    self._memoria.move_to_end((modelo, guia))
+                    valores[i] = valor
+                    aciertos[i] = True
+
+            if faltantes:
+                self._reloj += 1
+                encontrados = []
+                lista = list(faltantes)
+                for inicio in range(0, len(lista), _PARAMETROS_POR_CONSULTA):
+                    parte = lista[inicio:inicio + _PARAMETROS_POR_CONSULTA]
+                    marcas = ",".join("?" * len(parte))
+                    encontrados.extend(self._conexion.execute(
+                        f"SELECT guia, eficiencia FROM eficiencias WHERE modelo = ? AND guia IN ({marcas})",
+                        [modelo, *parte]).fetchall())
+                for guia, valor in encontrados:
+                    for i in faltantes[guia]:
+                        valores[i] = valor
+                        aciertos[i] = True
+                    self._recordar(modelo, guia, valor)
+                if encontrados:
+                    self._conexion.executemany(
+                        "UPDATE eficiencias SET acceso = ? WHERE modelo = ? AND guia = ?",
+                        [(self._reloj, modelo, guia) for guia, _ in encontrados])
+                    self._conexion.commit()
+
+            self.aciertos += int(aciertos.sum())
+            self.fallos += int(len(guias) - aciertos.sum())
+            tipo = self._tipos.get(modelo)
+            return (valores.astype(tipo) if tipo else valores), aciertos
+
+    def guardar(self, guias, eficiencias, modelo):
+        """Guarda un lote de eficiencias recién calculadas y aplica el límite de tamaño en disco."""
+        eficiencias = np.asarray(eficiencias)
+        with self._lock:
+            self._reloj += 1
+            if modelo not in self._tipos:
+                self._tipos[modelo] = eficiencias.dtype.str
+                self._conexion.execute("INSERT OR REPLACE INTO modelos VALUES (?, ?)", (modelo, eficiencias.dtype.str))
+            filas = [(modelo, guia, float(valor), self._reloj) for guia, valor in zip(guias, eficiencias)]
+            self._conexion.executemany("INSERT OR REPLACE INTO eficiencias VALUES (?, ?, ?, ?)", filas)
+            for guia, valor in zip(guias, eficiencias):
+                self._recordar(modelo, guia, float(valor))
+
+            # Conteo aproximado (las guías guardadas suelen ser fallos); se recalcula al superar el límite
+            self._entradas += len(filas)
+            if self._entradas > self.max_disco:
+                total = self._conexion.execute("SELECT COUNT(*) FROM eficiencias").fetchone()[0]
+                if total > self.max_disco:
+                    self._conexion.execute(
+                        "DELETE FROM eficiencias WHERE (modelo, guia) IN "
+                        "(SELECT modelo, guia FROM eficiencias ORDER BY acceso LIMIT ?)",
+                        (total - self.max_disco,))
+                self._entradas = min(total, self.max_disco)
+            self._conexion.commit()
+
+    def _recordar(self, modelo, guia, valor):
+        self._memoria[(modelo, guia)] = valor
+        self._memoria.move_to_end((modelo, guia))
+        while len(self._memoria) > self.max_memoria:
+            self._memoria.popitem(last=False)
+
+    @property
+    def tasa_aciertos(self):
+        """Fracción de guías consultadas que se encontraron en el caché."""
+        consultas = self.aciertos + self.fallos
+        return self.aciertos / consultas if consultas else 0.0
+
+    def estadisticas(self):
+        """Devuelve aciertos, fallos, tasa de aciertos y entradas en cada nivel."""
+        with self._lock:
+            en_disco = self._conexion.execute("SELECT COUNT(*) FROM eficiencias").fetchone()[0]
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": round(self.tasa_aciertos, 4),
+            "entradas_memoria": len(self._memoria),
+            "entradas_disco": en_disco,
+        }
+
+    def cerrar(self):
+        """Cierra la conexión con la base de datos."""
+        self._conexion.close()
@@ -0,0 +1,151 @@
+import os
+
+# Índices ya cargados en el proceso: ruta absoluta -> (mtime del FASTA, índice)
+_indices_cargados = {}
+
+
+def ruta_indice(fasta_file):
+    """Devuelve la ruta del índice .fai asociado a un archivo FASTA."""
+    return f"{fasta_file}.fai"
+
+
+def construir_indice_fasta(fasta_file):
+    """
+    Construye un índice compatible con `samtools faidx` (.fai) para un archivo FASTA.
+
+    Cada registro se describe con: nombre, longitud, offset en bytes del primer nucleótido,
+    nucleótidos por línea y bytes por línea (incluyendo el salto de línea).
+
+    Parámetros:
+        fasta_file (str): Ruta al archivo FASTA.
+
+    Retorna:
+        dict: Nombre del registro -> (longitud, offset, bases_por_linea, bytes_por_linea),
+        en el orden del archivo.
+    """
+    indice = {}
+    nombre = None
+    offset = 0
+
+    def cerrar_registro():
+        if nombre is not None:
+            indice[nombre] = (longitud, inicio, linebases, linewidth)
+
+    with open(fasta_file, "rb") as file:
+        for line in file:
+            if line.startswith(b">"):
+                cerrar_registro()
+                nombre = line[1:].split()[0].decode()
+                if nombre in indice:
+                    raise ValueError(f"Nombre de registro duplicado en {fasta_file}: {nombre}")
+                inicio = offset + len(line)
+                longitud = linebases = linewidth = 0
+                linea_corta = False
+            elif nombre is not None:
+                bases = len(line.rstrip(b"\r\n"))
+                if bases:
+                    if linea_corta or (linebases and bases > linebases):
+                        raise ValueError(f"Longitud de línea irregular en el registro {nombre} de {fasta_file}")
+                    if not linebases:
+                        linebases, linewidth = bases, len(line)
+                    elif bases < linebases or len(line) != linewidth:
+                        linea_corta = True  # Solo la última línea del registro puede ser más corta
+                    longitud += bases
+                elif longitud:
+                    linea_corta = True
+                else:
+                    inicio += len(line)  # Líneas vacías antes del primer nucleótido
+            offset += len(line)
+    cerrar_registro()
+    return indice
+
+
+def escribir_indice_fasta(indice, fai_file):
+    """Guarda un índice en formato .fai (separado por tabulaciones)."""
+    with open(fai_file, "w") as file:
+        for nombre, (longitud, offset, linebases, linewidth) in indice.items():
+            file.write(f"{nombre}\t{longitud}\t{offset}\t{linebases}\t{linewidth}\n")
+
+
+def leer_indice_fasta(fai_file):
+    """Lee un índice .fai y lo devuelve con la misma estructura que construir_indice_fasta."""
+    indice = {}
+    with open(fai_file) as file:
+        for line in file:
+            campos = line.rstrip("\n").split("\t")
+            if len(campos) >= 5:
+                indice[campos[0]] = tuple(int(valor) for valor in campos[1:5])
+    return indice
+
+
+def cargar_indice_fasta(fasta_file):
+    """
+    Devuelve el índice de un FASTA, reutilizando el .fai en disco si está al día y
+    construyéndolo (y guardándolo junto al FASTA) solo cuando falta o está desactualizado.
+    """
+    ruta = os.path.abspath(fasta_file)
+    mtime = os.path.getmtime(ruta)
+    cargado = _indices_cargados.get(ruta)
+    if cargado is not None and cargado[0] == mtime:
+        return cargado[1]
+
+    fai_file = ruta_indice(ruta)
+    if os.path.exists(fai_file) and os.path.getmtime(fai_file) >= mtime:
+        indice = leer_indice_fasta(fai_file)
+    else:
+        indice = construir_indice_fasta(ruta)
+        try:
+            escribir_indice_fasta(indice, fai_file)
+        except OSError as e:
+            print(f"No se pudo guardar el índice {fai_file}: {e}")
+
+    _indices_cargados[ruta] = (mtime, indice)
+    return indice
+
+
+def extraer_rango(fasta_file, nombre, start, end):
+    """
+    Extrae el rango [start, end] (base 1, inclusivo) del registro `nombre` con un acceso directo
+    calculado a partir del índice, sin recorrer el archivo.
+
+    Parámetros:
+        fasta_file (str): Ruta al archivo FASTA.
+        nombre (str): Nombre del registro (primera palabra de la cabecera).
+        start (int): Posición inicial (base 1). Se ajusta a 1 si es menor.
+        end (int): Posición final (base 1). Se ajusta a la longitud del registro si es mayor.
+
+    Retorna:
+        str: Fragmento de la secuencia.
+    """
+    return "".join(iter_rango(fasta_file, nombre, start, end, chunk_size=max(end - start + 1, 1)))
+
+
+def iter_rango(fasta_file, nombre, start=1, end=None, chunk_size=1_000_000):
+    """
+    Recorre el rango [start, end] (base 1, inclusivo) del registro `nombre` en fragmentos de hasta
+    `chunk_size` bases, con memoria acotada. Sirve, por ejemplo, para escanear un cromosoma
+    completo con `paq1_soporte.iter_pam_sites`.
+
+    Genera:
+        str: Fragmentos consecutivos de la secuencia.
+    """
+    indice = cargar_indice_fasta(fasta_file)
+    if nombre not in indice:
+        raise KeyError(f"El registro {nombre} no existe en {fasta_file}")
+    longitud, offset, linebases, linewidth = indice[nombre]
+
+    start = max(start, 1)
+    end = longitud if end is None else min(end, longitud)
+    if end < start:
+        return
+
+    def posicion_byte(i):
+        return offset + (i // linebases) * linewidth + i % linebases
+
+    with open(fasta_file, "rb") as file:
+        for inicio in range(start - 1, end, chunk_size):
+            fin = min(inicio + chunk_size, end)
+            byte_inicio = posicion_byte(inicio)
+            file.seek(byte_inicio)
+            datos = file.read(posicion_byte(fin - 1) + 1 - byte_inicio)
+            yield datos.replace(b"\n", b"").replace(b"\r", b"").decode("ascii")
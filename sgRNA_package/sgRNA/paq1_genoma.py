@@ -0,0 +1,302 @@
+import argparse
+import json
+import os
+import time
+from itertools import chain
+
+import numpy as np
+from Bio import SeqIO
+
+from sgRNA.paq1_fasta import cargar_indice_fasta, iter_rango
+from sgRNA.paq1_secuencia import a_codigos, CODIGO_INVALIDO
+
+# Versión del formato en disco; cambiarla obliga a reconstruir los genomas empaquetados
+_VERSION = 2
+
+# Bases leídas del FASTA por bloque al construir la representación empaquetada
+DEFAULT_CHUNK_SIZE = 1 << 22
+
+# Cada byte guarda 4 bases de 2 bits; la base i del byte ocupa los bits 2i y 2i+1
+_DESPLAZAMIENTOS = np.array([0, 2, 4, 6], dtype=np.uint8)
+_DESEMPAQUETAR = (np.arange(256, dtype=np.uint8)[:, None] >> _DESPLAZAMIENTOS) & 3
+
+# Bytes de relleno al final de las bases, para leer 8 bytes (32 bases) a partir de cualquier byte
+_RELLENO = 8
+_DESPLAZAMIENTOS_PALABRA = 2 * np.arange(32, dtype=np.uint64)
+
+# Letra de cada código (el inválido se escribe como N) y código complementario
+_LETRAS = np.frombuffer(b"ACGTN", dtype=np.uint8)
+_COMPLEMENTO = np.array([3, 2, 1, 0, CODIGO_INVALIDO], dtype=np.uint8)
+
+# Genomas ya cargados en el proceso: ruta absoluta del FASTA -> (mtime y tamaño del FASTA, genoma)
+_genomas_cargados = {}
+
+
+def ruta_genoma_empaquetado(gen_file):
+    """Directorio donde se guarda la representación empaquetada de un genoma (junto al FASTA)."""
+    return f"{gen_file}.empaquetado"
+
+
+def _registros_fasta(gen_file, chunk_size):
+    """
+    Recorre los registros del FASTA como pares (nombre, fragmentos). Usa el índice .fai para leer
+    por bloques grandes; si el archivo tiene líneas irregulares, lo lee con Biopython.
+    """
+    try:
+        indice = cargar_indice_fasta(gen_file)
+    except ValueError:
+        for record in SeqIO.parse(gen_file, "fasta"):
+            secuencia = str(record.seq)
+            yield record.id, (secuencia[i:i + chunk_size] for i in range(0, len(secuencia), chunk_size))
+        return
+    for nombre in indice:
+        yield nombre, iter_rango(gen_file, nombre, chunk_size=chunk_size)
+
+
+def _empaquetar(codigos):
+    """Empaqueta un arreglo de códigos (longitud múltiplo de 4) en bytes de 4 bases; los inválidos quedan en 0."""
+    grupos = (codigos & 3).reshape(-1, 4)
+    return grupos[:, 0] | (grupos[:, 1] << 2) | (grupos[:, 2] << 4) | (grupos[:, 3] << 6)
+
+
+def _tramos_invalidos(codigos, inicio):
+    """Tramos [inicio, fin) de bases inválidas de un bloque de códigos, en coordenadas globales."""
+    invalidos = np.concatenate(([False], codigos == CODIGO_INVALIDO, [False])).view(np.int8)
+    bordes = np.diff(invalidos)
+    return np.flatnonzero(bordes == 1) + inicio, np.flatnonzero(bordes == -1) + inicio
+
+
+def construir_genoma_empaquetado(gen_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Construye y guarda en disco la representación empaquetada de un genoma FASTA.
+
+    Los registros se concatenan separados por una base inválida, con las mismas coordenadas
+    globales que el índice de off-targets. Cada base ocupa 2 bits (A, C, G, T); las bases que no
+    son A, C, G ni T (N y códigos IUPAC) se guardan aparte como tramos [inicio, fin). Se lee el
+    FASTA por bloques y cada bloque se empaqueta y se escribe en disco en cuanto se lee, así que
+    la memoria necesaria es la de un bloque más los tramos de N.
+
+    Retorna:
+        GenomaEmpaquetado: El genoma construido, abierto desde disco.
+    """
+    directorio = ruta_genoma_empaquetado(gen_file)
+    os.makedirs(directorio, exist_ok=True)
+    # Sin meta.json la representación queda marcada como incompleta hasta terminar
+    if os.path.exists(os.path.join(directorio, "meta.json")):
+        os.remove(os.path.join(directorio, "meta.json"))
+
+    separador = np.array([CODIGO_INVALIDO], dtype=np.uint8)
+    inicios_n, fines_n, registros = [], [], []
+    resto = np.zeros(0, dtype=np.uint8)
+    posicion = 0
+    with open(os.path.join(directorio, "bases.bin"), "wb") as bases:
+        for nombre, fragmentos in _registros_fasta(gen_file, chunk_size):
+            inicio_registro = posicion
+            for codigos in chain((a_codigos(fragmento.upper()) for fragmento in fragmentos), [separador]):
+                inicios, fines = _tramos_invalidos(codigos, posicion)
+                inicios_n.append(inicios)
+                fines_n.append(fines)
+                posicion += len(codigos)
+                codigos = np.concatenate((resto, codigos))
+                completos = len(codigos) - len(codigos) % 4
+                _empaquetar(codigos[:completos]).tofile(bases)
+                resto = codigos[completos:]
+            registros.append([nombre, inicio_registro, posicion - inicio_registro - 1])
+        _empaquetar(np.concatenate((resto, np.zeros(-len(resto) % 4, dtype=np.uint8)))).tofile(bases)
+        np.zeros(_RELLENO, dtype=np.uint8).tofile(bases)
+
+    # Los tramos que continúan en el bloque siguiente se unen en uno solo
+    inicios_n = np.concatenate(inicios_n).astype(np.int64) if inicios_n else np.zeros(0, dtype=np.int64)
+    fines_n = np.concatenate(fines_n).astype(np.int64) if fines_n else np.zeros(0, dtype=np.int64)
+    if len(inicios_n):
+        corte = inicios_n[1:] != fines_n[:-1]
+        inicios_n = inicios_n[np.concatenate(([True], corte))]
+        fines_n = fines_n[np.concatenate((corte, [True]))]
+
+    np.save(os.path.join(directorio, "n_inicios.npy"), inicios_n)
+    np.save(os.path.join(directorio, "n_fines.npy"), fines_n)
+    estado = os.stat(gen_file)
+    with open(os.path.join(directorio, "meta.json"), "w") as file:
+        json.dump({"version": _VERSION, "longitud": posicion, "fasta_mtime": estado.st_mtime,
+                   "fasta_size": estado.st_size, "registros": registros}, file)
+    return GenomaEmpaquetado.cargar(directorio)
+
+
+class GenomaEmpaquetado:
+    """
+    Genoma en 2 bits por base con una máscara de tramos inválidos (N), abierto con memoria mapeada:
+    cargarlo no lee las bases, y cada consulta solo desempaqueta el rango pedido.
+
+    Las coordenadas son base 0 con intervalos [inicio, fin). Los métodos por registro (`codigos`,
+    `secuencia`, `complemento_inverso`, `ventanas`, `iter_fragmentos`) reciben el nombre del
+    registro; indexar el objeto (`genoma[posiciones]`, `genoma[a:b]`) usa las coordenadas
+    globales de la concatenación, igual que un arreglo de códigos (ver `paq1_offtarget`).
+
+    Las secuencias se devuelven en mayúsculas, con N en las bases inválidas.
+    """
+
+    def __init__(self, bases, inicios_n, fines_n, longitud, registros):
+        self.bases = bases
+        self.inicios_n = inicios_n
+        self.fines_n = fines_n
+        self.longitud = longitud
+        self.registros = {nombre: (inicio, largo) for nombre, inicio, largo in registros}
+        # Vista de las bases como palabras de 64 bits (little-endian) que empiezan en cada byte
+        self._palabras = np.ndarray((len(bases) - _RELLENO + 1,), dtype="<u8", buffer=bases, strides=(1,))
+
+    @classmethod
+    def cargar(cls, directorio):
+        """Abre un genoma empaquetado guardado por `construir_genoma_empaquetado`."""
+        with open(os.path.join(directorio, "meta.json")) as file:
+            meta = json.load(file)
+        # Las bases quedan mapeadas (como ndarray, sin la sobrecarga de indexar un np.memmap); los
+        # tramos de N son pocos y se leen a memoria
+        bases = np.memmap(os.path.join(directorio, "bases.bin"), dtype=np.uint8, mode="r").view(np.ndarray)
+        inicios_n, fines_n = (np.load(os.path.join(directorio, f"{nombre}.npy")) for nombre in ("n_inicios", "n_fines"))
+        return cls(bases, inicios_n, fines_n, meta["longitud"], meta["registros"])
+
+    def __len__(self):
+        return self.longitud
+
+    def __getitem__(self, clave):
+        """Códigos (uint8) en coordenadas globales: un rango `a:b` o un arreglo de posiciones de cualquier forma."""
+        if isinstance(clave, slice):
+            inicio, fin, paso = clave.indices(self.longitud)
+            if paso != 1:
+                raise ValueError("Solo se admiten rangos contiguos.")
+            return self._rango(inicio, fin)
+        posiciones = np.asarray(clave, dtype=np.int64)
+        codigos = (self.bases[posiciones >> 2] >> ((posiciones & 3) << 1).astype(np.uint8)) & 3
+        if len(self.inicios_n):
+            tramo = np.maximum(np.searchsorted(self.inicios_n, posiciones, side="right") - 1, 0)
+            invalidas = (posiciones >= self.inicios_n[tramo]) & (posiciones < self.fines_n[tramo])
+            codigos[invalidas] = CODIGO_INVALIDO
+        return codigos
+
+    def ventanas_en(self, inicios, largo):
+        """
+        Códigos de las ventanas [inicio, inicio + largo) en coordenadas globales, una fila por
+        inicio. Equivale a `genoma[inicios[:, None] + np.arange(largo)]`, pero lee solo los bytes
+        empaquetados de cada ventana y busca los tramos de N una vez por ventana.
+        """
+        inicios = np.asarray(inicios, dtype=np.int64)
+        if largo + 3 > len(_DESPLAZAMIENTOS_PALABRA):
+            return self[inicios[:, None] + np.arange(largo)]
+        # Una lectura de 8 bytes por ventana; la ventana empieza en la base (inicio % 4) de la palabra
+        palabras = self._palabras[inicios >> 2] >> ((inicios & 3) << 1).astype(np.uint64)
+        ventanas = ((palabras[:, None] >> _DESPLAZAMIENTOS_PALABRA[:largo]) & 3).astype(np.uint8)
+
+        # Las pocas ventanas que tocan un tramo de N se corrigen base por base
+        if len(self.inicios_n):
+            tramo = np.searchsorted(self.fines_n, inicios, side="right")
+            afectadas = tramo < len(self.inicios_n)
+            afectadas[afectadas] = self.inicios_n[tramo[afectadas]] < inicios[afectadas] + largo
+            afectadas = np.flatnonzero(afectadas)
+            if len(afectadas):
+                ventanas[afectadas] = self[inicios[afectadas, None] + np.arange(largo)]
+        return ventanas
+
+    def _rango(self, inicio, fin):
+        """Códigos del rango global [inicio, fin)."""
+        if fin <= inicio:
+            return np.zeros(0, dtype=np.uint8)
+        primero = inicio >> 2
+        codigos = _DESEMPAQUETAR[self.bases[primero:(fin + 3) >> 2]].ravel()[inicio - 4 * primero:fin - 4 * primero]
+        desde = np.searchsorted(self.fines_n, inicio, side="right")
+        hasta = np.searchsorted(self.inicios_n, fin, side="left")
+        for inicio_n, fin_n in zip(self.inicios_n[desde:hasta].tolist(), self.fines_n[desde:hasta].tolist()):
+            codigos[max(inicio_n, inicio) - inicio:min(fin_n, fin) - inicio] = CODIGO_INVALIDO
+        return codigos
+
+    def _limites(self, nombre, inicio, fin):
+        """Rango global de [inicio, fin) dentro del registro `nombre`, ajustado a su longitud."""
+        if nombre not in self.registros:
+            raise KeyError(f"El registro {nombre} no existe en el genoma")
+        origen, largo = self.registros[nombre]
+        fin = largo if fin is None else min(fin, largo)
+        inicio = min(max(inicio, 0), fin)
+        return origen + inicio, origen + fin
+
+    def codigos(self, nombre, inicio=0, fin=None):
+        """Códigos (A=0, C=1, G=2, T=3, N=4) de [inicio, fin) del registro `nombre`."""
+        return self._rango(*self._limites(nombre, inicio, fin))
+
+    def secuencia(self, nombre, inicio=0, fin=None):
+        """Secuencia de [inicio, fin) del registro `nombre`, como texto."""
+        return _LETRAS[self.codigos(nombre, inicio, fin)].tobytes().decode("ascii")
+
+    def complemento_inverso(self, nombre, inicio=0, fin=None):
+        """Códigos del complemento inverso de [inicio, fin) del registro `nombre`."""
+        return _COMPLEMENTO[self.codigos(nombre, inicio, fin)[::-1]]
+
+    def ventanas(self, nombre, k, inicio=0, fin=None):
+        """
+        Todas las ventanas de `k` bases de [inicio, fin) del registro: una vista (n - k + 1, k) sobre
+        los códigos desempaquetados, sin copiar cada ventana.
+        """
+        codigos = self.codigos(nombre, inicio, fin)
+        if len(codigos) < k:
+            return np.zeros((0, k), dtype=np.uint8)
+        return np.lib.stride_tricks.sliding_window_view(codigos, k)
+
+    def iter_fragmentos(self, nombre, inicio=0, fin=None, chunk_size=1_000_000):
+        """
+        Recorre [inicio, fin) del registro en fragmentos de texto de hasta `chunk_size` bases, por
+        ejemplo para escanear un cromosoma completo con `paq1_soporte.iter_pam_sites`.
+        """
+        desde, hasta = self._limites(nombre, inicio, fin)
+        for posicion in range(desde, hasta, chunk_size):
+            yield _LETRAS[self._rango(posicion, min(posicion + chunk_size, hasta))].tobytes().decode("ascii")
+
+    def extraer_rango(self, nombre, start, end):
+        """Igual que `paq1_fasta.extraer_rango`: rango [start, end] en base 1, inclusivo."""
+        return self.secuencia(nombre, max(start, 1) - 1, end)
+
+    def bytes_en_memoria(self):
+        """Tamaño de la representación (bases empaquetadas y tramos inválidos), en bytes."""
+        return self.bases.nbytes + self.inicios_n.nbytes + self.fines_n.nbytes
+
+
+def cargar_genoma_empaquetado(gen_file):
+    """
+    Devuelve la representación empaquetada de un genoma: la abre desde disco si existe y
+    corresponde al FASTA actual, o la construye una sola vez si falta o está desactualizada.
+    Un genoma ya abierto en el proceso se reutiliza mientras el FASTA no cambie.
+    """
+    ruta = os.path.abspath(gen_file)
+    estado = os.stat(gen_file)
+    cargado = _genomas_cargados.get(ruta)
+    if cargado is not None and cargado[0] == (estado.st_mtime, estado.st_size):
+        return cargado[1]
+
+    directorio = ruta_genoma_empaquetado(gen_file)
+    meta_file = os.path.join(directorio, "meta.json")
+    genoma = None
+    if os.path.exists(meta_file):
+        with open(meta_file) as file:
+            meta = json.load(file)
+        if (meta.get("version") == _VERSION and meta["fasta_mtime"] == estado.st_mtime
+                and meta["fasta_size"] == estado.st_size):
+            genoma = GenomaEmpaquetado.cargar(directorio)
+    if genoma is None:
+        print(f"Construyendo el genoma empaquetado de {gen_file}...")
+        genoma = construir_genoma_empaquetado(gen_file)
+
+    _genomas_cargados[ruta] = ((estado.st_mtime, estado.st_size), genoma)
+    return genoma
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construye la representación empaquetada (2 bits por base) de un genoma FASTA.")
+    parser.add_argument("gen_file", help="Archivo FASTA del genoma")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    genoma = construir_genoma_empaquetado(args.gen_file)
+    segundos = time.perf_counter() - inicio
+    print(f"{len(genoma.registros)} registros, {len(genoma)} posiciones, {len(genoma.inicios_n)} tramos de N; "
+          f"{genoma.bytes_en_memoria() / 1e6:.1f} MB en {ruta_genoma_empaquetado(args.gen_file)} ({segundos:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,515 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from sgRNA.paq1_cache import huella_archivo
+
+# Modelos del paquete, resueltos respecto al directorio del módulo
+_DIRECTORIO_MODELOS = os.path.dirname(os.path.abspath(__file__))
+RUTA_RED_KERAS = os.path.join(_DIRECTORIO_MODELOS, "modelo_sgRNA_nn.h5")
+RUTA_RED_NUMPY = os.path.join(_DIRECTORIO_MODELOS, "modelo_sgRNA_nn.npz")
+
+# Funciones de activación admitidas en las capas Dense exportadas (se aplican en el lugar)
+_ACTIVACIONES = {
+    "linear": lambda h: h,
+    "relu": lambda h: np.maximum(h, 0, out=h),
+    "sigmoid": lambda h: np.divide(1, 1 + np.exp(-h, out=h), out=h),
+    "tanh": lambda h: np.tanh(h, out=h),
+}
+
+# Capas que no hacen nada en inferencia
+_CAPAS_IGNORADAS = ("InputLayer", "Dropout")
+
+# Bits en 1 de cada byte, para contar bits sin np.bitwise_count (NumPy >= 2.0)
+_BITS_BYTE = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+def _contar_bits(valores):
+    """Número de bits en 1 de cada elemento de un arreglo uint64."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(valores).astype(np.intp)
+    valores = np.ascontiguousarray(valores, dtype=np.uint64)
+    return _BITS_BYTE[valores.view(np.uint8)].reshape(valores.shape + (8,)).sum(axis=-1, dtype=np.intp)
+
+
+class RedDensaNumpy:
+    """
+    Motor de inferencia de una red densa (Sequential de capas Dense) solo con NumPy: una
+    multiplicación de matrices en float32 por capa para todo el lote, sin TensorFlow.
+
+    Tiene la misma interfaz `predict` que el modelo de Keras, de modo que puede reemplazarlo en
+    el registro de modelos de `paq1_percent`.
+
+    Parámetros:
+        capas (list[tuple[np.ndarray, np.ndarray, str]]): (kernel, bias, activación) de cada capa.
+    """
+
+    def __init__(self, capas):
+        for kernel, bias, activacion in capas:
+            if activacion not in _ACTIVACIONES:
+                raise ValueError(f"Activación no admitida: {activacion}")
+        self.capas = [(np.ascontiguousarray(kernel, dtype=np.float32), np.asarray(bias, dtype=np.float32), activacion)
+                      for kernel, bias, activacion in capas]
+
+    def predict(self, X, batch_size=None, verbose=0):
+        """
+        Predice un lote. `batch_size` y `verbose` se aceptan por compatibilidad con Keras.
+
+        Retorna:
+            np.ndarray: Matriz float32 (n, unidades de la última capa).
+        """
+        h = np.asarray(X, dtype=np.float32)
+        for kernel, bias, activacion in self.capas:
+            h = h @ kernel
+            h += bias
+            h = _ACTIVACIONES[activacion](h)
+        return h
+
+    @classmethod
+    def cargar(cls, ruta=RUTA_RED_NUMPY):
+        """Carga una red exportada con `exportar_red_keras`."""
+        with np.load(ruta) as datos:
+            activaciones = json.loads(str(datos["activaciones"]))
+            return cls([(datos[f"kernel_{i}"], datos[f"bias_{i}"], activacion) for i, activacion in enumerate(activaciones)])
+
+
+def leer_red_keras(ruta_h5=RUTA_RED_KERAS):
+    """
+    Lee la arquitectura y los pesos de un modelo Sequential de Keras guardado en HDF5 (.h5), con
+    h5py y sin TensorFlow.
+
+    Retorna:
+        list[tuple[np.ndarray, np.ndarray, str]]: (kernel, bias, activación) de cada capa Dense.
+    """
+    import h5py
+
+    capas = []
+    with h5py.File(ruta_h5, "r") as archivo:
+        configuracion = json.loads(archivo.attrs["model_config"])
+        if configuracion["class_name"] != "Sequential":
+            raise ValueError("Solo se pueden exportar modelos Sequential.")
+        pesos = archivo["model_weights"]
+        for capa in configuracion["config"]["layers"]:
+            tipo, opciones = capa["class_name"], capa["config"]
+            if tipo in _CAPAS_IGNORADAS:
+                continue
+            if tipo != "Dense":
+                raise ValueError(f"Capa no admitida para la exportación: {tipo}")
+            grupo = pesos[opciones["name"]][opciones["name"]]
+            kernel = grupo["kernel:0"][()]
+            bias = grupo["bias:0"][()] if opciones.get("use_bias", True) else np.zeros(kernel.shape[1], dtype=np.float32)
+            capas.append((kernel, bias, opciones.get("activation", "linear")))
+    return capas
+
+
+def exportar_red_keras(ruta_h5=RUTA_RED_KERAS, ruta_npz=RUTA_RED_NUMPY):
+    """
+    Convierte un modelo Sequential de Keras (.h5) al formato .npz de `RedDensaNumpy`. El archivo
+    guarda también la huella SHA-256 del .h5 de origen.
+
+    Retorna:
+        str: Ruta del archivo exportado.
+    """
+    capas = leer_red_keras(ruta_h5)
+    datos = {"activaciones": np.array(json.dumps([activacion for _, _, activacion in capas])),
+             "origen_sha256": np.array(huella_archivo(ruta_h5))}
+    for i, (kernel, bias, _) in enumerate(capas):
+        datos[f"kernel_{i}"] = np.asarray(kernel, dtype=np.float32)
+        datos[f"bias_{i}"] = np.asarray(bias, dtype=np.float32)
+    np.savez(ruta_npz, **datos)
+    return ruta_npz
+
+
+def verificar_red(ruta_h5=RUTA_RED_KERAS, ruta_npz=RUTA_RED_NUMPY, n=10000, semilla=0):
+    """
+    Compara la red exportada con el modelo original en `n` guías aleatorias.
+
+    Si TensorFlow está instalado se compara con la salida de Keras; si no, con un cálculo de
+    referencia en float64 a partir de los pesos del .h5.
+
+    Retorna:
+        dict: Referencia usada, diferencia absoluta máxima y si el .npz corresponde al .h5.
+    """
+    rng = np.random.default_rng(semilla)
+    X = np.zeros((n, 80), dtype=np.float32)
+    X[np.arange(n)[:, None], 4 * np.arange(20) + rng.integers(0, 4, size=(n, 20))] = 1
+    red = RedDensaNumpy.cargar(ruta_npz)
+    obtenido = red.predict(X)
+
+    try:
+        import tensorflow as tf
+        esperado = tf.keras.models.load_model(ruta_h5, compile=False).predict(X, batch_size=n, verbose=0)
+        referencia = "keras"
+    except ImportError:
+        esperado = X.astype(np.float64)
+        for kernel, bias, activacion in leer_red_keras(ruta_h5):
+            esperado = esperado @ kernel.astype(np.float64) + bias
+            esperado = _ACTIVACIONES[activacion](esperado)
+        referencia = "float64"
+
+    with np.load(ruta_npz) as datos:
+        vigente = str(datos["origen_sha256"]) == huella_archivo(ruta_h5)
+    return {"referencia": referencia, "diferencia_maxima": float(np.abs(obtenido - esperado).max()), "vigente": vigente}
+
+
+class EnsambleArboles:
+    """
+    Motor de inferencia de ensambles de árboles (Random Forest de scikit-learn y XGBoost) sobre
+    entradas one-hot, con todos los árboles en arreglos planos.
+
+    Los nodos de todos los árboles se guardan en arreglos paralelos (característica, hijo
+    izquierdo, hijo derecho y valor); las hojas apuntan a sí mismas. Como cada entrada vale 0 o
+    1, cada nodo se reduce a dos decisiones precalculadas: a qué hijo se va con la base presente
+    y a cuál con la base ausente.
+
+    Si ningún árbol tiene más de 64 hojas (XGBoost con max_depth <= 6), se aprovecha además que
+    cada posición tiene exactamente una base: cada nodo descarta las hojas del hijo que no se
+    toma, y para cada grupo de 4 posiciones se precalcula, por árbol y para las 256
+    combinaciones de bases, la máscara de 64 bits de las hojas que siguen siendo alcanzables.
+    La hoja de salida de una guía es el único bit que sobrevive al AND de las máscaras de sus
+    grupos (5 consultas por árbol para guías de 20 nt). En otro caso, o si la entrada no es
+    one-hot, el lote se recorre nivel por nivel para todas las guías y todos los árboles a la
+    vez, sin comparar umbrales en el bucle.
+
+    Parámetros:
+        caracteristica (np.ndarray): Columna de X usada en cada nodo (0 en las hojas).
+        izquierdo, derecho (np.ndarray): Índice global de los hijos de cada nodo (el propio
+            nodo en las hojas).
+        umbral (np.ndarray): Umbral de cada nodo.
+        valor (np.ndarray): Valor de cada nodo (solo se usa en las hojas).
+        raices (np.ndarray): Índice global de la raíz de cada árbol.
+        profundidad (int): Profundidad máxima de los árboles.
+        regla (str): "<" (XGBoost: va a la izquierda si x < umbral) o "<=" (scikit-learn).
+        base (float): Valor inicial de la suma (base_score en XGBoost).
+        promedio (bool): Si True se promedian los árboles (Random Forest); si no, se suman.
+        tipo (str): Tipo de dato en el que se acumula y devuelve la predicción.
+    """
+
+    def __init__(self, caracteristica, izquierdo, derecho, umbral, valor, raices, profundidad,
+                 regla="<", base=0.0, promedio=False, tipo="float32"):
+        if regla not in ("<", "<="):
+            raise ValueError(f"Regla de división desconocida: {regla}")
+        self.tipo = np.dtype(tipo)
+        self.raices = np.asarray(raices, dtype=np.int32)
+        self.profundidad = int(profundidad)
+        self.base = self.tipo.type(base)
+        self.promedio = bool(promedio)
+        self.caracteristica = np.asarray(caracteristica, dtype=np.int32)
+        self.valor = np.asarray(valor, dtype=self.tipo)
+
+        # Hijo elegido según la entrada valga 0 o 1, intercalados: _hijo[2 * nodo + bit] (las
+        # hojas quedan fijas en sí mismas)
+        umbral = np.asarray(umbral, dtype=np.float64)
+        izquierdo = np.asarray(izquierdo, dtype=np.int32)
+        derecho = np.asarray(derecho, dtype=np.int32)
+        comparar = np.less if regla == "<" else np.less_equal
+        self._hijo = np.stack([np.where(comparar(0.0, umbral), izquierdo, derecho),
+                               np.where(comparar(1.0, umbral), izquierdo, derecho)], axis=1).ravel()
+        self._preparar_mascaras()
+
+    def _preparar_mascaras(self):
+        """
+        Precalcula las tablas de máscaras de hojas por grupo de 4 posiciones (ver la descripción
+        de la clase). Deja `_mascaras` en None si algún árbol tiene más de 64 hojas.
+        """
+        self._mascaras = None
+        hijo = self._hijo.reshape(-1, 2)
+        nodos = np.arange(len(hijo))
+        hoja = (hijo[:, 0] == nodos) & (hijo[:, 1] == nodos)
+        n_arboles = len(self.raices)
+        arbol = np.repeat(np.arange(n_arboles), np.diff(np.append(self.raices, len(hijo))))
+        acumulado = np.cumsum(hoja)
+        local = acumulado - 1 - (acumulado - hoja)[self.raices][arbol]
+        if local[hoja].max() >= 64:
+            return
+
+        # Hojas de cada subárbol como bits, desde los niveles más profundos hacia la raíz
+        hojas = np.zeros(len(hijo), dtype=np.uint64)
+        hojas[hoja] = np.left_shift(np.uint64(1), local[hoja].astype(np.uint64))
+        niveles = [self.raices]
+        for _ in range(self.profundidad):
+            niveles.append(np.unique(hijo[niveles[-1][~hoja[niveles[-1]]]]))
+        for nivel in reversed(niveles):
+            internos = nivel[~hoja[nivel]]
+            hojas[internos] = hojas[hijo[internos, 0]] | hojas[hijo[internos, 1]]
+
+        # Hojas que siguen siendo alcanzables según la columna del nodo valga 0 o 1, combinadas
+        # por (columna, árbol)
+        internos = np.flatnonzero(~hoja)
+        posiciones = 4 * (int(self.caracteristica[internos].max(initial=0)) // 16 + 1)
+        alcanzables = np.empty((2, 4 * posiciones, n_arboles), dtype=np.uint64)
+        alcanzables[...] = hojas[self.raices]
+        for bit in (0, 1):
+            descartadas = np.where(hijo[internos, 0] == hijo[internos, 1], np.uint64(0),
+                                   hojas[hijo[internos, 1 - bit]])
+            np.bitwise_and.at(alcanzables[bit], (self.caracteristica[internos], arbol[internos]), ~descartadas)
+
+        # mascaras[grupo, combinación, árbol]; la combinación codifica 4 bases (2 bits cada una,
+        # la primera posición del grupo en los bits altos)
+        combinaciones = np.arange(256)
+        self._mascaras = np.empty((posiciones // 4, 256, n_arboles), dtype=np.uint64)
+        for grupo in range(posiciones // 4):
+            mascara = self._mascaras[grupo]
+            mascara[...] = hojas[self.raices]
+            for desplazamiento in range(4):
+                base_combinacion = (combinaciones >> (2 * (3 - desplazamiento))) & 3
+                for base in range(4):
+                    columna = 4 * (4 * grupo + desplazamiento) + base
+                    mascara &= np.where((base_combinacion == base)[:, None], alcanzables[1, columna],
+                                        alcanzables[0, columna])
+        valores = np.zeros((n_arboles, 64), dtype=self.tipo)
+        valores[arbol[hoja], local[hoja]] = self.valor[hoja]
+        self._valores_hoja = valores.ravel()
+
+    def predict(self, X, bloque=256):
+        """
+        Predice un lote de entradas one-hot (valores 0/1).
+
+        Retorna:
+            np.ndarray: Predicción de cada fila, en el tipo de dato del modelo.
+        """
+        X = np.asarray(X)
+        n, ancho = X.shape
+        total = np.empty(n, dtype=self.tipo)
+        for inicio in range(0, n, bloque):
+            total[inicio:inicio + bloque] = self._predecir_bloque(X[inicio:inicio + bloque] != 0)
+        return total
+
+    def _predecir_bloque(self, bits):
+        """Predice un bloque de entradas ya binarizadas (matriz booleana)."""
+        filas, ancho = bits.shape
+        if self._mascaras is not None and ancho % 4 == 0:
+            por_posicion = bits.reshape(filas, -1, 4)
+            if (por_posicion.sum(axis=2) == 1).all():
+                return self._predecir_one_hot(por_posicion.argmax(axis=2))
+        return self._predecir_niveles(bits)
+
+    def _predecir_one_hot(self, codigos):
+        """Predice a partir de los códigos de base (0-3) de cada posición, con las máscaras de hojas."""
+        filas, posiciones = codigos.shape
+        grupos = len(self._mascaras)
+        if posiciones < 4 * grupos:
+            codigos = np.pad(codigos, ((0, 0), (0, 4 * grupos - posiciones)))
+        combinaciones = codigos[:, :4 * grupos].reshape(filas, grupos, 4) @ np.array([64, 16, 4, 1])
+        alcanzables = self._mascaras[0][combinaciones[:, 0]]
+        for grupo in range(1, grupos):
+            alcanzables &= self._mascaras[grupo][combinaciones[:, grupo]]
+        # Índice de la única hoja alcanzable de cada árbol
+        hoja = _contar_bits(alcanzables - np.uint64(1))
+        hoja += np.arange(0, 64 * alcanzables.shape[1], 64)
+        return self._sumar(self._valores_hoja[hoja].T)
+
+    def _predecir_niveles(self, bits):
+        """Predice recorriendo todos los árboles nivel por nivel."""
+        filas, ancho = bits.shape
+        bits = bits.ravel()
+        desplazamiento = np.arange(0, filas * ancho, ancho, dtype=np.int32)
+        # nodos[árbol, guía]
+        nodos = np.repeat(self.raices[:, None], filas, axis=1)
+        for _ in range(self.profundidad):
+            columna = self.caracteristica[nodos]
+            columna += desplazamiento
+            nodos <<= 1
+            nodos += bits[columna]
+            nodos = self._hijo[nodos]
+        return self._sumar(self.valor[nodos])
+
+    def _sumar(self, hojas):
+        """
+        Combina los valores de hoja (árboles, guías): suma acumulada a lo largo de los árboles, en
+        el mismo orden secuencial y tipo que las bibliotecas originales, para obtener resultados
+        idénticos bit a bit.
+        """
+        hojas[0] += self.base
+        suma = hojas.cumsum(axis=0, dtype=self.tipo)[-1]
+        if self.promedio:
+            suma /= len(hojas)
+        return suma
+
+    def guardar(self, ruta, origen_sha256=""):
+        """Guarda el ensamble en un archivo .npz."""
+        np.savez(ruta, caracteristica=self.caracteristica, hijo=self._hijo, valor=self.valor, raices=self.raices,
+                 parametros=np.array(json.dumps({"profundidad": self.profundidad, "base": float(self.base),
+                                                 "promedio": self.promedio, "tipo": self.tipo.name})),
+                 origen_sha256=np.array(origen_sha256))
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Carga un ensamble guardado con `guardar`."""
+        with np.load(ruta) as datos:
+            parametros = json.loads(str(datos["parametros"]))
+            ensamble = cls.__new__(cls)
+            ensamble.tipo = np.dtype(parametros["tipo"])
+            ensamble.profundidad = parametros["profundidad"]
+            ensamble.base = ensamble.tipo.type(parametros["base"])
+            ensamble.promedio = parametros["promedio"]
+            ensamble.caracteristica = datos["caracteristica"]
+            ensamble._hijo = datos["hijo"]
+            ensamble.valor = datos["valor"]
+            ensamble.raices = datos["raices"]
+        ensamble._preparar_mascaras()
+        return ensamble
+
+    @classmethod
+    def desde_xgboost(cls, modelo):
+        """Convierte un XGBRegressor (o un Booster) con objetivo reg:squarederror."""
+        booster = modelo.get_booster() if hasattr(modelo, "get_booster") else modelo
+        learner = json.loads(booster.save_raw(raw_format="json"))["learner"]
+        objetivo = learner["objective"]["name"]
+        if objetivo != "reg:squarederror":
+            raise ValueError(f"Objetivo de XGBoost no admitido: {objetivo}")
+        arboles = learner["gradient_booster"]["model"]["trees"]
+        mejor = booster.attributes().get("best_iteration")
+        if mejor is not None:
+            arboles = arboles[:int(mejor) + 1]
+        # En XGBoost >= 3 base_score se guarda como "[valor]"
+        base = float(learner["learner_model_param"]["base_score"].strip("[]"))
+
+        nodos = []
+        for arbol in arboles:
+            hoja = np.asarray(arbol["left_children"]) == -1
+            nodos.append((np.where(hoja, 0, arbol["split_indices"]), arbol["left_children"], arbol["right_children"],
+                          np.asarray(arbol["split_conditions"], dtype=np.float32), hoja,
+                          np.asarray(arbol["split_conditions"], dtype=np.float32)))
+        return cls(*_aplanar(nodos), regla="<", base=np.float32(base), promedio=False, tipo="float32")
+
+    @classmethod
+    def desde_random_forest(cls, modelo):
+        """Convierte un RandomForestRegressor (o cualquier ensamble de árboles de regresión de scikit-learn)."""
+        if getattr(modelo, "n_outputs_", 1) != 1 or not hasattr(modelo, "estimators_"):
+            raise ValueError("Solo se admiten ensambles de regresión de scikit-learn con una salida.")
+        nodos = []
+        for estimador in modelo.estimators_:
+            arbol = estimador.tree_
+            hoja = arbol.children_left == -1
+            nodos.append((np.where(hoja, 0, arbol.feature), arbol.children_left, arbol.children_right,
+                          arbol.threshold, hoja, arbol.value[:, 0, 0]))
+        return cls(*_aplanar(nodos), regla="<=", base=0.0, promedio=True, tipo="float64")
+
+
+def _aplanar(nodos):
+    """
+    Une los árboles (característica, izquierdo, derecho, umbral, es_hoja, valor) en arreglos
+    globales: desplaza los índices de los hijos y hace que cada hoja apunte a sí misma.
+    """
+    caracteristicas, izquierdos, derechos, umbrales, valores, raices = [], [], [], [], [], []
+    profundidad, desplazamiento = 0, 0
+    for caracteristica, izquierdo, derecho, umbral, hoja, valor in nodos:
+        propio = np.arange(len(hoja)) + desplazamiento
+        izquierdos.append(np.where(hoja, propio, np.asarray(izquierdo) + desplazamiento))
+        derechos.append(np.where(hoja, propio, np.asarray(derecho) + desplazamiento))
+        caracteristicas.append(caracteristica)
+        umbrales.append(umbral)
+        valores.append(valor)
+        raices.append(desplazamiento)
+        profundidad = max(profundidad, _profundidad(izquierdo, derecho, hoja))
+        desplazamiento += len(hoja)
+    return (np.concatenate(caracteristicas), np.concatenate(izquierdos), np.concatenate(derechos),
+            np.concatenate(umbrales), np.concatenate(valores), raices, profundidad)
+
+
+def _profundidad(izquierdo, derecho, hoja):
+    """Número máximo de divisiones desde la raíz hasta una hoja."""
+    profundidad, nivel = 0, [0]
+    while True:
+        internos = [i for i in nivel if not hoja[i]]
+        if not internos:
+            return profundidad
+        nivel = [int(izquierdo[i]) for i in internos] + [int(derecho[i]) for i in internos]
+        profundidad += 1
+
+
+def ruta_arboles(ruta_pickle):
+    """Archivo .npz con el ensamble exportado de un modelo en pickle (mismo nombre, otra extensión)."""
+    return os.path.splitext(ruta_pickle)[0] + ".npz"
+
+
+def exportar_arboles(ruta_pickle, ruta_npz=None):
+    """
+    Exporta un modelo de árboles guardado con joblib (XGBRegressor o RandomForestRegressor) al
+    formato .npz de `EnsambleArboles`, junto con la huella SHA-256 del pickle de origen.
+
+    Retorna:
+        str: Ruta del archivo exportado.
+    """
+    import joblib
+
+    modelo = joblib.load(ruta_pickle)
+    if hasattr(modelo, "get_booster"):
+        ensamble = EnsambleArboles.desde_xgboost(modelo)
+    else:
+        ensamble = EnsambleArboles.desde_random_forest(modelo)
+    ruta_npz = ruta_npz or ruta_arboles(ruta_pickle)
+    ensamble.guardar(ruta_npz, huella_archivo(ruta_pickle))
+    return ruta_npz
+
+
+def cargar_arboles(ruta_pickle):
+    """
+    Devuelve el motor de árboles de un modelo en pickle: usa el .npz exportado si corresponde al
+    pickle actual (sin importar XGBoost ni scikit-learn) y, si falta o está desactualizado, lo
+    convierte en memoria a partir del pickle.
+    """
+    ruta_npz = ruta_arboles(ruta_pickle)
+    if os.path.exists(ruta_npz):
+        with np.load(ruta_npz) as datos:
+            origen = str(datos["origen_sha256"])
+        if not os.path.exists(ruta_pickle) or origen == huella_archivo(ruta_pickle):
+            return EnsambleArboles.cargar(ruta_npz)
+
+    import joblib
+
+    modelo = joblib.load(ruta_pickle)
+    if hasattr(modelo, "get_booster"):
+        return EnsambleArboles.desde_xgboost(modelo)
+    return EnsambleArboles.desde_random_forest(modelo)
+
+
+def verificar_arboles(ruta_pickle, n=10000, semilla=0):
+    """
+    Compara el motor de árboles con el `predict` de la biblioteca original en `n` guías aleatorias.
+
+    Retorna:
+        dict: Diferencia absoluta máxima y fracción de predicciones idénticas.
+    """
+    import joblib
+
+    rng = np.random.default_rng(semilla)
+    X = np.zeros((n, 80), dtype=np.float32)
+    X[np.arange(n)[:, None], 4 * np.arange(20) + rng.integers(0, 4, size=(n, 20))] = 1
+    esperado = joblib.load(ruta_pickle).predict(X)
+    obtenido = cargar_arboles(ruta_pickle).predict(X)
+    return {"diferencia_maxima": float(np.abs(obtenido - esperado).max()), "identicas": float((obtenido == esperado).mean())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta los modelos a los motores de inferencia propios y los verifica.")
+    parser.add_argument("--h5", default=RUTA_RED_KERAS, help="Modelo de Keras de origen")
+    parser.add_argument("--npz", default=RUTA_RED_NUMPY, help="Archivo exportado de la red")
+    parser.add_argument("--arboles", nargs="*", default=[os.path.join(_DIRECTORIO_MODELOS, nombre)
+                                                          for nombre in ("modelo_sgRNA_xgb.pkl", "modelo_sgRNA.pkl")],
+                        help="Modelos de árboles (pickle) a exportar")
+    parser.add_argument("--solo-verificar", action="store_true", help="No exporta, solo compara los .npz existentes")
+    args = parser.parse_args()
+
+    if not args.solo_verificar:
+        print(f"Red exportada a {exportar_red_keras(args.h5, args.npz)}")
+    resultado = verificar_red(args.h5, args.npz)
+    print(f"Diferencia máxima con {resultado['referencia']}: {resultado['diferencia_maxima']:.3g} "
+          f"({'vigente' if resultado['vigente'] else 'DESACTUALIZADO respecto al .h5'})")
+
+    for ruta_pickle in args.arboles:
+        if not os.path.exists(ruta_pickle):
+            print(f"Se omite {ruta_pickle}: no existe")
+            continue
+        if not args.solo_verificar:
+            print(f"Árboles exportados a {exportar_arboles(ruta_pickle)}")
+        resultado = verificar_arboles(ruta_pickle)
+        print(f"Diferencia máxima con {os.path.basename(ruta_pickle)}: {resultado['diferencia_maxima']:.3g} "
+              f"({resultado['identicas']:.2%} de predicciones idénticas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import pickle
+import sqlite3
+import time
+
+from sgRNA.paq1_cache import huella_archivo
+from sgRNA.paq1_percent import DEFAULT_BATCH_SIZE, clave_modelo
+from sgRNA.paq1_perfil import contar
+from sgRNA.paq1_soporte import DEFAULT_TARGETS_POR_BLOQUE, iter_disenos_targets, leer_targets, tabla_vacia_multi
+
+# Versión del formato de las tablas guardadas; cambiarla invalida los manifiestos anteriores
+_VERSION_MANIFIESTO = 1
+
+
+def huella_target(secuencia):
+    """SHA-256 de la secuencia de un target (sin distinguir mayúsculas)."""
+    return hashlib.sha256(secuencia.upper().encode()).hexdigest()
+
+
+def clave_corrida(gen_file, modelo="rf", window_size=20, alineador="blast", prefiltro=None, empaquetado=False,
+                  nucleasas=None):
+    """
+    Clave de una corrida: huella del genoma, clave del modelo (nombre y huella de sus archivos, ver
+    `paq1_percent.clave_modelo`) y parámetros del diseño. Los resultados de un target solo se
+    reutilizan entre corridas con la misma clave.
+
+    Retorna:
+        tuple[str, dict]: Clave (SHA-256) y parámetros de los que se deriva.
+    """
+    parametros = {
+        "version": _VERSION_MANIFIESTO,
+        "genoma": huella_archivo(gen_file),
+        "modelo": clave_modelo(modelo),
+        "window_size": window_size,
+        "alineador": alineador,
+        "prefiltro": prefiltro,
+        "empaquetado": empaquetado,
+        "nucleasas": [[nucleasa.nombre, nucleasa.especificacion()] for nucleasa in nucleasas] if nucleasas else None,
+    }
+    texto = json.dumps(parametros, sort_keys=True)
+    return hashlib.sha256(texto.encode()).hexdigest(), parametros
+
+
+class ManifiestoLotes:
+    """
+    Manifiesto de una corrida por lotes en una base SQLite: registra cada target completado con la
+    huella de su secuencia y guarda su tabla de resultados, en la misma transacción.
+
+    Un target se da por completado solo si su registro existe para la clave de la corrida y la
+    huella coincide con la secuencia actual; si la corrida se interrumpe, lo ya registrado no se
+    vuelve a calcular.
+
+    Parámetros:
+        ruta (str): Archivo SQLite del manifiesto (se crea si no existe).
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._conexion = sqlite3.connect(ruta, timeout=60)
+        self._conexion.executescript("""
+            CREATE TABLE IF NOT EXISTS corridas (
+                corrida TEXT PRIMARY KEY,
+                parametros TEXT NOT NULL,
+                creada REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS targets (
+                corrida TEXT NOT NULL,
+                target TEXT NOT NULL,
+                huella TEXT NOT NULL,
+                filas INTEGER NOT NULL,
+                tabla BLOB NOT NULL,
+                completado REAL NOT NULL,
+                PRIMARY KEY (corrida, target)
+            ) WITHOUT ROWID;
+        """)
+
+    def registrar_corrida(self, corrida, parametros):
+        """Registra una corrida (si no existía) con los parámetros de los que se deriva su clave."""
+        self._conexion.execute("INSERT OR IGNORE INTO corridas VALUES (?, ?, ?)",
+                               (corrida, json.dumps(parametros, sort_keys=True), time.time()))
+        self._conexion.commit()
+
+    def completados(self, corrida):
+        """Targets completados de una corrida: identificador -> huella de su secuencia."""
+        return dict(self._conexion.execute("SELECT target, huella FROM targets WHERE corrida = ?", (corrida,)))
+
+    def guardar(self, corrida, target, huella, tabla):
+        """Registra un target como completado junto con su tabla de resultados."""
+        self._conexion.execute(
+            "INSERT OR REPLACE INTO targets VALUES (?, ?, ?, ?, ?, ?)",
+            (corrida, target, huella, len(tabla), pickle.dumps(tabla, protocol=pickle.HIGHEST_PROTOCOL), time.time()))
+        self._conexion.commit()
+
+    def tabla(self, corrida, target):
+        """Tabla de resultados guardada de un target completado."""
+        fila = self._conexion.execute("SELECT tabla FROM targets WHERE corrida = ? AND target = ?",
+                                      (corrida, target)).fetchone()
+        if fila is None:
+            raise KeyError(target)
+        return pickle.loads(fila[0])
+
+    def cerrar(self):
+        """Cierra la conexión con la base de datos."""
+        self._conexion.close()
+
+
+def ejecutar_lote(gen_file, target_path, manifiesto, modelo="rf", window_size=20, batch_size=DEFAULT_BATCH_SIZE, workers=1,
+                  cache=None, alineador="blast", prefiltro=None, targets_por_bloque=DEFAULT_TARGETS_POR_BLOQUE,
+                  empaquetado=False, nucleasas=None, biblioteca=None):
+    """
+    Versión reanudable de `iter_design_sgRNAs_multi` para corridas largas.
+
+    Cada target se registra en el `manifiesto` en cuanto se termina su bloque. Al volver a
+    ejecutar con el mismo genoma, modelo y parámetros se reutilizan los targets ya completados y
+    solo se diseñan los que faltan: los de una corrida interrumpida, los agregados a la lista y
+    aquellos cuya secuencia cambió. Los targets sin alineaciones (o cuyo alineamiento falló) no
+    se registran, así que se reintentan en la próxima ejecución.
+
+    Parámetros:
+        manifiesto (ManifiestoLotes): Manifiesto de la corrida.
+        El resto son los de `iter_design_sgRNAs_multi`.
+
+    Retorna:
+        Generador de las tablas de cada target (con la columna "target"), en el orden de entrada;
+        el resultado es el mismo que el de una corrida sin interrupciones.
+    """
+    # La biblioteca da los mismos resultados que el genoma empaquetado, así que comparten la clave
+    corrida, parametros = clave_corrida(gen_file, modelo, window_size, alineador, prefiltro,
+                                        empaquetado or biblioteca is not None, nucleasas)
+    manifiesto.registrar_corrida(corrida, parametros)
+
+    targets = leer_targets(target_path)
+    huellas = {identificador: huella_target(secuencia) for identificador, secuencia in targets}
+    completados = manifiesto.completados(corrida)
+    pendientes = [(identificador, secuencia) for identificador, secuencia in targets
+                  if completados.get(identificador) != huellas[identificador]]
+    reutilizados = len(targets) - len(pendientes)
+    contar("targets_reutilizados", reutilizados)
+    print(f"Manifiesto {manifiesto.ruta}: {reutilizados} targets completados, {len(pendientes)} por diseñar.")
+
+    # Los pendientes se diseñan en su orden de entrada, así que sus resultados llegan en el orden en que se piden
+    disenos = iter_disenos_targets(gen_file, pendientes, modelo, window_size, batch_size, workers, cache, alineador,
+                                   prefiltro, targets_por_bloque, empaquetado, nucleasas, biblioteca) if pendientes else iter(())
+    por_disenar = {identificador for identificador, _ in pendientes}
+    entregados = sin_alineacion = 0
+    for identificador, _ in targets:
+        if identificador not in por_disenar:
+            tabla = manifiesto.tabla(corrida, identificador)
+        else:
+            _, tabla = next(disenos)
+            if tabla is None:
+                print(f"No se encontraron alineaciones para el target {identificador}; se reintentará en la próxima ejecución.")
+                sin_alineacion += 1
+                continue
+            manifiesto.guardar(corrida, identificador, huellas[identificador], tabla)
+        entregados += 1
+        yield tabla
+
+    contar("targets_sin_alineacion", sin_alineacion)
+    if entregados == 0:
+        yield tabla_vacia_multi(bool(nucleasas))
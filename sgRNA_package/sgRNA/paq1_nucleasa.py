@@ -0,0 +1,223 @@
+import numpy as np
+
+# Bases que representa cada código IUPAC
+IUPAC = {
+    "A": "A", "C": "C", "G": "G", "T": "T",
+    "R": "AG", "Y": "CT", "S": "CG", "W": "AT", "K": "GT", "M": "AC",
+    "B": "CGT", "D": "AGT", "H": "ACT", "V": "ACG", "N": "ACGT",
+}
+
+_TABLA_COMPLEMENTO_IUPAC = str.maketrans("ACGTRYSWKMBDHVN", "TGCAYRSWMKVHDBN")
+
+# Bit de cada base (A=1, C=2, G=4, T=8; cualquier otro carácter, incluidas las minúsculas, = 0) y
+# máscara de bits de las bases que acepta cada código IUPAC
+_BIT_ASCII = np.zeros(256, dtype=np.uint8)
+for _i, _base in enumerate("ACGT"):
+    _BIT_ASCII[ord(_base)] = 1 << _i
+_MASCARA_IUPAC = {codigo: sum(1 << "ACGT".index(base) for base in bases) for codigo, bases in IUPAC.items()}
+
+# Extremo de la guía junto al que está el PAM (sobre la hebra de la guía)
+LADOS_PAM = ("3", "5")
+
+
+def complemento_inverso_iupac(patron):
+    """Complemento inverso de un patrón IUPAC (por ejemplo, NGG -> CCN y TTTV -> BAAA)."""
+    return patron.translate(_TABLA_COMPLEMENTO_IUPAC)[::-1]
+
+
+def regex_iupac(patron):
+    """Expresión regular (sin compilar) de un patrón IUPAC, con una clase de caracteres por código ambiguo."""
+    return "".join(IUPAC[base] if len(IUPAC[base]) == 1 else f"[{IUPAC[base]}]" for base in patron)
+
+
+class Nucleasa:
+    """
+    Especificación de una nucleasa para el diseño de guías.
+
+    Parámetros:
+        nombre (str): Nombre con el que se identifica en las tablas de resultados.
+        pam (str): Patrón PAM en código IUPAC, escrito 5'->3' sobre la hebra de la guía.
+        lado (str): "3" si el PAM está en el extremo 3' de la guía (Cas9) o "5" si está en el 5' (Cas12a).
+        largo_guia (int): Longitud de la guía.
+        corte (int): Sitio de corte, como número de bases de la guía (desde su extremo 5') que
+            quedan antes del corte sobre la hebra de la guía.
+    """
+
+    def __init__(self, nombre, pam, lado="3", largo_guia=20, corte=17):
+        pam = pam.upper()
+        if not pam or any(base not in IUPAC for base in pam):
+            raise ValueError(f"PAM inválido: {pam}. Debe estar escrito en código IUPAC.")
+        if lado not in LADOS_PAM:
+            raise ValueError(f"Lado del PAM inválido: {lado}. Opciones: {', '.join(LADOS_PAM)}")
+        if largo_guia < 1:
+            raise ValueError("La longitud de la guía debe ser un entero positivo.")
+        if not 0 <= corte <= largo_guia:
+            raise ValueError(f"El sitio de corte debe estar entre 0 y {largo_guia}.")
+        self.nombre = nombre
+        self.pam = pam
+        self.lado = lado
+        self.largo_guia = largo_guia
+        self.corte = corte
+
+    @property
+    def pam_inverso(self):
+        """PAM tal como se lee sobre la hebra directa cuando la guía está en la hebra "-"."""
+        return complemento_inverso_iupac(self.pam)
+
+    @property
+    def huella(self):
+        """Bases que ocupa un sitio completo (guía + PAM)."""
+        return self.largo_guia + len(self.pam)
+
+    @property
+    def puntuable(self):
+        """Los modelos de eficiencia están entrenados con guías de 20 nt con el PAM en el extremo 3' (SpCas9)."""
+        return self.largo_guia == 20 and self.lado == "3"
+
+    def especificacion(self):
+        """Texto PAM:lado:largo:corte que acepta `obtener_nucleasa`."""
+        return f"{self.pam}:{self.lado}:{self.largo_guia}:{self.corte}"
+
+    def __repr__(self):
+        return f"Nucleasa({self.nombre!r}, {self.especificacion()!r})"
+
+
+# Nucleasas predefinidas
+NUCLEASAS = {
+    "SpCas9": Nucleasa("SpCas9", "NGG", "3", 20, 17),
+    "SpCas9-NG": Nucleasa("SpCas9-NG", "NG", "3", 20, 17),
+    "SaCas9": Nucleasa("SaCas9", "NNGRRT", "3", 21, 18),
+    "Cas12a": Nucleasa("Cas12a", "TTTV", "5", 23, 18),
+}
+DEFAULT_NUCLEASA = "SpCas9"
+
+
+def nucleasa_por_defecto(window_size=20):
+    """SpCas9 (PAM NGG en el extremo 3') con guías de `window_size` bases: la configuración de siempre."""
+    return Nucleasa(DEFAULT_NUCLEASA, "NGG", "3", window_size, max(window_size - 3, 0))
+
+
+def obtener_nucleasa(texto):
+    """
+    Nucleasa a partir de su nombre (ver `NUCLEASAS`, sin distinguir mayúsculas) o de una
+    especificación PAM:lado:largo[:corte], por ejemplo "NNGRRT:3:21:18" o "TTTV:5:23". Sin
+    `corte`, se toma el de Cas9 (3 bases antes del PAM) o el de Cas12a (18 bases después del PAM).
+    """
+    for nombre, nucleasa in NUCLEASAS.items():
+        if texto.lower() == nombre.lower():
+            return nucleasa
+    partes = texto.split(":")
+    if len(partes) not in (3, 4):
+        raise ValueError(f"Nucleasa desconocida: {texto}. Opciones: {', '.join(NUCLEASAS)} "
+                         "o una especificación PAM:lado:largo[:corte].")
+    pam, lado, largo_guia = partes[0], partes[1], partes[2]
+    try:
+        largo_guia = int(largo_guia)
+        if len(partes) == 4:
+            corte = int(partes[3])
+        else:
+            corte = largo_guia - 3 if lado == "3" else min(18, largo_guia)
+    except ValueError:
+        raise ValueError(f"Especificación de nucleasa inválida: {texto}. El largo y el corte deben ser enteros.")
+    return Nucleasa(texto, pam, lado, largo_guia, corte)
+
+
+def obtener_nucleasas(textos):
+    """
+    Lista de nucleasas a partir de nombres o especificaciones (ver `obtener_nucleasa`); cada texto
+    puede traer varias separadas por comas.
+    """
+    nucleasas = [obtener_nucleasa(parte.strip()) for texto in textos for parte in texto.split(",") if parte.strip()]
+    nombres = [nucleasa.nombre for nucleasa in nucleasas]
+    if len(set(nombres)) != len(nombres):
+        raise ValueError("Cada nucleasa debe indicarse una sola vez.")
+    if not nucleasas:
+        raise ValueError("Debe indicarse al menos una nucleasa.")
+    return nucleasas
+
+
+class EscanerPAM:
+    """
+    Escáner compilado de los PAM de varias nucleasas en ambas hebras.
+
+    Cada patrón (el PAM de cada nucleasa y su complemento inverso) se compila en una máscara de
+    bits IUPAC por posición. Cada bloque de secuencia se codifica una sola vez y todos los
+    patrones se evalúan sobre esa codificación con operaciones vectorizadas, así que agregar
+    nucleasas no vuelve a recorrer el texto; los patrones repetidos entre nucleasas se evalúan
+    una vez. Se encuentran también los sitios solapados.
+
+    Parámetros:
+        nucleasas (list[Nucleasa]): Nucleasas a buscar, en el orden en que se desempatan los sitios.
+    """
+
+    def __init__(self, nucleasas):
+        self.nucleasas = list(nucleasas)
+        if not self.nucleasas:
+            raise ValueError("Debe indicarse al menos una nucleasa.")
+        self.huella = max(nucleasa.huella for nucleasa in self.nucleasas)
+
+        # Por grupo: (índice de nucleasa, orden de hebra, hebra, desplazamiento del inicio de la
+        # guía respecto del inicio del PAM sobre la hebra directa, largo de la guía, patrón)
+        self._grupos = []
+        self._mascaras = {}
+        for indice, nucleasa in enumerate(self.nucleasas):
+            largo, largo_pam = nucleasa.largo_guia, len(nucleasa.pam)
+            if nucleasa.lado == "3":
+                desplazamientos = (-largo, largo_pam)
+            else:
+                desplazamientos = (largo_pam, -largo)
+            for orden, (hebra, pam, desplazamiento) in enumerate(zip("+-", (nucleasa.pam, nucleasa.pam_inverso),
+                                                                     desplazamientos)):
+                self._grupos.append((indice, orden, hebra, desplazamiento, largo, pam))
+                self._mascaras[pam] = np.array([_MASCARA_IUPAC[base] for base in pam], dtype=np.uint8)
+
+    @staticmethod
+    def _coincidencias(bits, mascaras):
+        """Posiciones (crecientes) del bloque codificado donde empieza el patrón."""
+        n = len(bits) - len(mascaras) + 1
+        if n <= 0:
+            return np.zeros(0, dtype=np.intp)
+        validas = (bits[:n] & mascaras[0]) != 0
+        for k in range(1, len(mascaras)):
+            validas &= (bits[k:k + n] & mascaras[k]) != 0
+        return np.flatnonzero(validas)
+
+    def posiciones(self, bloque):
+        """Posiciones (crecientes) de cada patrón en el bloque: patrón -> arreglo de inicios."""
+        bits = _BIT_ASCII[np.frombuffer(bloque.encode("ascii"), dtype=np.uint8)]
+        return {pam: self._coincidencias(bits, mascaras) for pam, mascaras in self._mascaras.items()}
+
+    def buscar(self, bloque, offset=0):
+        """
+        Sitios completos (guía y PAM dentro del bloque) de todas las nucleasas, en ambas hebras.
+
+        Retorna:
+            list[tuple]: (inicio de la huella, orden de hebra, índice de nucleasa, nucleasa, hebra,
+            inicio de la guía, gRNA, PAM), ordenadas. Los inicios son coordenadas (base 0) sobre la
+            hebra directa, relativas al bloque; el de la guía es el de su base más a la izquierda y
+            se le suma `offset`. gRNA y PAM están escritos 5'->3' sobre su propia hebra.
+        """
+        largo = len(bloque)
+        coincidencias = self.posiciones(bloque)
+        sitios = []
+        for indice, orden, hebra, desplazamiento, largo_guia, pam in self._grupos:
+            nucleasa = self.nucleasas[indice]
+            largo_pam = len(pam)
+            # Inicios del PAM con la guía completa dentro del bloque
+            posiciones = coincidencias[pam]
+            desde = np.searchsorted(posiciones, -desplazamiento)
+            hasta = np.searchsorted(posiciones, largo - largo_guia - desplazamiento, side="right")
+            posiciones = posiciones[desde:hasta].tolist()
+            huella = min(desplazamiento, 0)
+            if hebra == "+":
+                sitios += [(p + huella, orden, indice, nucleasa, hebra, offset + p + desplazamiento,
+                            bloque[p + desplazamiento:p + desplazamiento + largo_guia], bloque[p:p + largo_pam])
+                           for p in posiciones]
+            else:
+                sitios += [(p + huella, orden, indice, nucleasa, hebra, offset + p + desplazamiento,
+                            bloque[p + desplazamiento:p + desplazamiento + largo_guia].translate(_TABLA_COMPLEMENTO_IUPAC)[::-1],
+                            bloque[p:p + largo_pam].translate(_TABLA_COMPLEMENTO_IUPAC)[::-1])
+                           for p in posiciones]
+        # Los tres primeros campos identifican al sitio, así que el orden nunca compara los demás
+        sitios.sort()
+        return sitios
@@ -0,0 +1,355 @@
+import json
+import os
+from itertools import combinations, product
+from math import comb
+
+import numpy as np
+
+from sgRNA.paq1_genoma import GenomaEmpaquetado, cargar_genoma_empaquetado
+from sgRNA.paq1_nucleasa import IUPAC, complemento_inverso_iupac
+from sgRNA.paq1_secuencia import a_codigos, CODIGO_INVALIDO
+
+# Longitud máxima de semilla: la tabla de offsets tiene 4**k + 1 entradas
+K_MAXIMO = 10
+
+# Número de guías verificadas por lote al consultar el índice
+DEFAULT_LOTE_GUIAS = 1024
+
+# Pares (guía, sitio) que se verifican en cada pasada; acota la memoria de la búsqueda
+DEFAULT_MAX_CANDIDATOS = 1 << 18
+
+# Máximo de mismatches admitido: con más, las semillas tienen tantas variantes que la búsqueda
+# equivale a recorrer todo el genoma para cada guía
+MAX_MISMATCHES = 5
+
+# Índices ya cargados en el proceso: (ruta absoluta, k) -> (mtime y tamaño del FASTA, índice)
+_indices_cargados = {}
+
+
+def validar_mismatches(max_mismatches):
+    """Lanza ValueError si `max_mismatches` no es un entero entre 0 y MAX_MISMATCHES."""
+    if not isinstance(max_mismatches, (int, np.integer)) or not 0 <= max_mismatches <= MAX_MISMATCHES:
+        raise ValueError(f"El número de mismatches para los off-targets debe ser un entero entre 0 y "
+                         f"{MAX_MISMATCHES} (se recibió {max_mismatches!r})")
+
+
+def k_para_mismatches(max_mismatches, largo_guia=20):
+    """
+    Longitud de semilla del índice para buscar con hasta `max_mismatches` diferencias: la guía
+    completa sin mismatches y la mitad de la guía con ellos, hasta K_MAXIMO. Las semillas no se
+    acortan con más mismatches: se buscan con sustituciones (ver `_plan_semillas`).
+    """
+    return min(largo_guia if max_mismatches == 0 else largo_guia // 2, K_MAXIMO)
+
+
+def _plan_semillas(max_mismatches, largo, k, largo_genoma):
+    """
+    Elige en cuántos tramos se divide la guía para buscar sus semillas de k bases en el índice.
+
+    Con la guía dividida en `tramos` partes, por el principio del palomar al menos una tiene como
+    mucho max_mismatches // tramos diferencias, así que basta buscar las k primeras bases de cada
+    tramo con hasta ese número de sustituciones. Se elige la división que minimiza las consultas
+    al índice más los candidatos esperados en un genoma aleatorio de `largo_genoma` bases.
+
+    Retorna:
+        tuple[int, int]: Número de tramos y sustituciones admitidas en cada semilla.
+    """
+    mejor = None
+    for tramos in range(1, max_mismatches + 2):
+        if largo // tramos < k:
+            break
+        errores = max_mismatches // tramos
+        variantes = sum(comb(k, e) * 3 ** e for e in range(errores + 1))
+        costo = tramos * variantes * (1 + largo_genoma / 4 ** k)
+        if mejor is None or costo < mejor[0]:
+            mejor = (costo, tramos, errores)
+    if mejor is None:
+        raise ValueError(f"El índice (k={k}) es más largo que las guías ({largo} nt).")
+    return mejor[1:]
+
+
+def ruta_indice_offtarget(gen_file, k):
+    """Directorio donde se guarda el índice de k-mers de un genoma."""
+    return f"{gen_file}.offtarget_k{k}"
+
+
+def _valores_kmer(codigos, k):
+    """Valor entero (base 4) del k-mer que empieza en cada posición y máscara de k-mers válidos."""
+    n = len(codigos) - k + 1
+    if n <= 0:
+        return np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=bool)
+    valores = np.zeros(n, dtype=np.uint32)
+    for j in range(k):
+        valores = valores * 4 + np.minimum(codigos[j:j + n], 3)
+    invalidos = np.concatenate(([0], np.cumsum(codigos == CODIGO_INVALIDO)))
+    return valores, (invalidos[k:] - invalidos[:n]) == 0
+
+
+def construir_indice_offtarget(gen_file, k):
+    """
+    Construye y guarda en disco el índice de k-mers de un genoma FASTA.
+
+    Los registros se concatenan (separados por un código inválido) en la representación
+    empaquetada del genoma (ver `paq1_genoma`), que el índice usa para verificar los sitios. Para
+    cada k-mer sin bases ambiguas se guardan sus posiciones agrupadas por valor, junto con una
+    tabla de offsets de 4**k + 1 entradas (formato CSR).
+
+    Retorna:
+        dict: Índice con las claves "k", "genoma", "offsets", "posiciones" y "registros".
+    """
+    if not 1 <= k <= K_MAXIMO:
+        raise ValueError(f"k debe estar entre 1 y {K_MAXIMO}.")
+
+    empaquetado = cargar_genoma_empaquetado(gen_file)
+    registros = [[nombre, inicio, largo] for nombre, (inicio, largo) in empaquetado.registros.items()]
+    genoma = empaquetado[0:len(empaquetado)]
+
+    valores, validos = _valores_kmer(genoma, k)
+    tipo_posicion = np.uint32 if len(genoma) < 2 ** 32 else np.int64
+    posiciones = np.flatnonzero(validos).astype(tipo_posicion)
+    valores = valores[validos]
+    orden = np.argsort(valores, kind="stable")
+    posiciones = posiciones[orden]
+    offsets = np.zeros(4 ** k + 1, dtype=np.int64)
+    np.cumsum(np.bincount(valores, minlength=4 ** k), out=offsets[1:])
+
+    directorio = ruta_indice_offtarget(gen_file, k)
+    os.makedirs(directorio, exist_ok=True)
+    np.save(os.path.join(directorio, "offsets.npy"), offsets)
+    np.save(os.path.join(directorio, "posiciones.npy"), posiciones)
+    estado = os.stat(gen_file)
+    with open(os.path.join(directorio, "meta.json"), "w") as file:
+        json.dump({"k": k, "fasta_mtime": estado.st_mtime, "fasta_size": estado.st_size,
+                   "registros": registros}, file)
+
+    return {"k": k, "genoma": empaquetado, "offsets": offsets, "posiciones": posiciones, "registros": registros}
+
+
+def cargar_indice_offtarget(gen_file, k):
+    """
+    Devuelve el índice de k-mers del genoma: lo abre desde disco (con memoria mapeada) si existe y
+    corresponde al FASTA actual, o lo construye una sola vez si falta o está desactualizado.
+    """
+    clave = (os.path.abspath(gen_file), k)
+    estado = os.stat(gen_file)
+    cargado = _indices_cargados.get(clave)
+    if cargado is not None and cargado[0] == (estado.st_mtime, estado.st_size):
+        return cargado[1]
+
+    directorio = ruta_indice_offtarget(gen_file, k)
+    meta_file = os.path.join(directorio, "meta.json")
+    indice = None
+    if os.path.exists(meta_file):
+        with open(meta_file) as file:
+            meta = json.load(file)
+        if meta["k"] == k and meta["fasta_mtime"] == estado.st_mtime and meta["fasta_size"] == estado.st_size:
+            indice = {"k": k, "registros": meta["registros"]}
+            for nombre in ("offsets", "posiciones"):
+                indice[nombre] = np.load(os.path.join(directorio, f"{nombre}.npy"), mmap_mode="r")
+            # Los índices anteriores guardaban el genoma con un byte por base
+            genoma_file = os.path.join(directorio, "genoma.npy")
+            if os.path.exists(genoma_file):
+                indice["genoma"] = np.load(genoma_file, mmap_mode="r")
+            else:
+                indice["genoma"] = cargar_genoma_empaquetado(gen_file)
+    if indice is None:
+        print(f"Construyendo índice de off-targets (k={k}) para {gen_file}...")
+        indice = construir_indice_offtarget(gen_file, k)
+
+    _indices_cargados[clave] = ((estado.st_mtime, estado.st_size), indice)
+    return indice
+
+
+def _ventanas_genoma(genoma, inicios, largo):
+    """Códigos de las ventanas [inicio, inicio + largo) del genoma (arreglo de códigos o genoma empaquetado)."""
+    if isinstance(genoma, GenomaEmpaquetado):
+        return genoma.ventanas_en(inicios, largo)
+    return genoma[inicios[:, None] + np.arange(largo)]
+
+
+def _mascara_pam(pam):
+    """Matriz (len(pam), 5) con las bases permitidas en cada posición del PAM (código IUPAC, N = cualquiera)."""
+    mascara = np.zeros((len(pam), CODIGO_INVALIDO + 1), dtype=bool)
+    for i, base in enumerate(pam):
+        for permitida in IUPAC[base]:
+            mascara[i, "ACGT".index(permitida)] = True
+    return mascara
+
+
+def _valores_variantes(semillas, errores):
+    """
+    Valores (base 4) de cada semilla y de todas sus variantes con hasta `errores` sustituciones.
+
+    Retorna:
+        np.ndarray: Matriz (semillas, variantes); las variantes de una semilla son distintas entre sí.
+    """
+    n, k = semillas.shape
+    potencias = 4 ** np.arange(k - 1, -1, -1, dtype=np.int64)
+    semillas = semillas.astype(np.int64)
+    base = semillas @ potencias
+    columnas = [base]
+    for cantidad in range(1, errores + 1):
+        for posiciones in combinations(range(k), cantidad):
+            for cambios in product((1, 2, 3), repeat=cantidad):
+                valor = base.copy()
+                for posicion, cambio in zip(posiciones, cambios):
+                    anterior = semillas[:, posicion]
+                    valor += (((anterior + cambio) & 3) - anterior) * potencias[posicion]
+                columnas.append(valor)
+    return np.stack(columnas, axis=1)
+
+
+def _iter_candidatos(valores, indice, max_candidatos):
+    """
+    Recorre las coincidencias en el índice de una matriz de valores de semilla (consultas,
+    variantes), en pasadas de hasta `max_candidatos` coincidencias.
+
+    Genera:
+        tuple[np.ndarray, np.ndarray]: Índice de consulta y posición de la semilla en el genoma
+        de cada coincidencia de la pasada.
+    """
+    offsets, posiciones = indice["offsets"], indice["posiciones"]
+    variantes = valores.shape[1]
+    valores = valores.ravel()
+    desde = offsets[valores]
+    fin = np.cumsum(offsets[valores + 1] - desde)
+    total = int(fin[-1]) if len(fin) else 0
+    for inicio in range(0, total, max_candidatos):
+        orden = np.arange(inicio, min(inicio + max_candidatos, total))
+        fila = np.searchsorted(fin, orden, side="right")
+        entrada = desde[fila] + orden - (fin[fila] - (offsets[valores[fila] + 1] - desde[fila]))
+        yield fila // variantes, posiciones[entrada].astype(np.int64)
+
+
+def contar_offtargets(guias, indice, max_mismatches=3, pam="NGG", lote=DEFAULT_LOTE_GUIAS, lado="3",
+                      max_candidatos=DEFAULT_MAX_CANDIDATOS):
+    """
+    Cuenta, para cada guía, los sitios del genoma (ambas hebras) que coinciden con la guía con
+    hasta `max_mismatches` diferencias y tienen al lado un PAM válido.
+
+    Las semillas de cada guía (ver `_plan_semillas`) se buscan en el índice y sus coincidencias se
+    verifican en pasadas de hasta `max_candidatos` pares (guía, sitio), así que la memoria no
+    depende del tamaño del genoma ni de cuántas veces se repita una semilla. Un sitio que
+    encuentran varias semillas se cuenta solo con la primera.
+
+    Parámetros:
+        guias (list[str]): Guías, todas del mismo largo (20 nucleótidos para SpCas9).
+        indice (dict): Índice devuelto por `cargar_indice_offtarget`.
+        max_mismatches (int): Número máximo de diferencias con la guía.
+        pam (str): Patrón PAM, en código IUPAC (N como comodín).
+        lote (int): Número máximo de guías consultadas a la vez.
+        lado (str): Extremo de la guía junto al que está el PAM: "3" (Cas9) o "5" (Cas12a).
+        max_candidatos (int): Pares (guía, sitio) verificados en cada pasada.
+
+    Retorna:
+        np.ndarray: Matriz (n_guias, max_mismatches + 1); la columna m cuenta los sitios con
+        exactamente m diferencias (incluido el propio sitio de la guía).
+    """
+    validar_mismatches(max_mismatches)
+    largo = len(guias[0]) if guias else 20
+    genoma = indice["genoma"]
+    n = len(genoma)
+    k = indice["k"]
+    tramos, errores = _plan_semillas(max_mismatches, largo, k, n)
+    inicios_tramo = [j * (largo // tramos) for j in range(tramos)]
+    # Con muchas variantes por semilla se consultan menos guías a la vez
+    variantes = sum(comb(k, e) * 3 ** e for e in range(errores + 1))
+    lote = max(1, min(lote, max_candidatos // variantes))
+    mascara_directa = _mascara_pam(pam)
+    mascara_inversa = _mascara_pam(complemento_inverso_iupac(pam))
+    largo_pam = len(pam)
+    # Inicio del PAM respecto del inicio del sitio, en cada hebra
+    desde_pam_directa, desde_pam_inversa = (largo, -largo_pam) if lado == "3" else (-largo_pam, largo)
+    conteos = np.zeros((len(guias), max_mismatches + 1), dtype=np.int64)
+
+    for inicio_lote in range(0, len(guias), lote):
+        bloque = guias[inicio_lote:inicio_lote + lote]
+        codigos = a_codigos("".join(bloque))
+        if len(codigos) != largo * len(bloque):
+            raise ValueError("Todas las guías deben tener el mismo largo.")
+        codigos = codigos.reshape(len(bloque), largo)
+        if (codigos == CODIGO_INVALIDO).any():
+            raise ValueError("Las guías solo pueden contener las bases A, C, G y T.")
+
+        # PAM en 3': hebra "+" con la guía en [p, p+largo) y el PAM a continuación; hebra "-" con el
+        # complemento inverso de la guía en [p, p+largo) y el PAM invertido antes de p (al revés con el PAM en 5')
+        for consultas, mascara, desde_pam in ((codigos, mascara_directa, desde_pam_directa),
+                                              (3 - codigos[:, ::-1], mascara_inversa, desde_pam_inversa)):
+            for j, desplazamiento in enumerate(inicios_tramo):
+                valores = _valores_variantes(consultas[:, desplazamiento:desplazamiento + k], errores)
+                for idx, inicios in _iter_candidatos(valores, indice, max_candidatos):
+                    inicios -= desplazamiento
+                    dentro = (inicios + min(desde_pam, 0) >= 0) & (inicios + max(largo, desde_pam + largo_pam) <= n)
+                    sitios_pam = _ventanas_genoma(genoma, inicios[dentro] + desde_pam, largo_pam)
+                    dentro[dentro] = mascara[np.arange(largo_pam), sitios_pam].all(axis=1)
+                    idx, inicios = idx[dentro], inicios[dentro]
+                    if len(idx) == 0:
+                        continue
+
+                    ventanas = _ventanas_genoma(genoma, inicios, largo)
+                    diferentes = ventanas != consultas[idx]
+                    mismatches = diferentes.sum(axis=1)
+                    aceptados = (mismatches <= max_mismatches) & ~(ventanas == CODIGO_INVALIDO).any(axis=1)
+                    # Un sitio que también encuentra una semilla anterior ya se contó con ella
+                    for anterior in inicios_tramo[:j]:
+                        aceptados &= diferentes[:, anterior:anterior + k].sum(axis=1) > errores
+                    np.add.at(conteos, (inicio_lote + idx[aceptados], mismatches[aceptados]), 1)
+
+    return conteos
+
+
+def puntuacion_especificidad(conteos_offtarget):
+    """
+    Puntaje de especificidad (0-100) a partir de los conteos de off-targets por número de
+    mismatches: 100 / (1 + suma de los sitios ponderados por 2**-m). Una guía sin off-targets
+    obtiene 100.
+    """
+    pesos = 2.0 ** -np.arange(conteos_offtarget.shape[1])
+    return np.round(100 / (1 + conteos_offtarget @ pesos), 2)
+
+
+def anotar_offtargets(df_sgRNA, gen_file, max_mismatches=3, pam="NGG", k=None, nucleasas=None):
+    """
+    Añade a la tabla de guías los conteos de off-targets y un puntaje de especificidad.
+
+    Columnas nuevas: "OT_0" ... "OT_<max_mismatches>" (sitios con m mismatches, sin contar el
+    propio sitio de la guía), "off_targets" (total) y "especificidad".
+
+    Parámetros:
+        df_sgRNA (pd.DataFrame): Tabla devuelta por los design_sgRNAs_*.
+        gen_file (str): Archivo FASTA del genoma de referencia.
+        max_mismatches (int): Número máximo de diferencias con la guía.
+        pam (str): Patrón PAM, en código IUPAC (N como comodín).
+        k (int, opcional): Longitud de semilla del índice; por defecto la máxima admisible.
+        nucleasas (list[paq1_nucleasa.Nucleasa], opcional): Nucleasas del diseño; si se dan, cada
+            guía se busca con el PAM, el lado y el largo de la nucleasa de su columna "nucleasa"
+            (y se ignora `pam`).
+
+    Retorna:
+        pd.DataFrame: Copia de la tabla con las columnas nuevas.
+    """
+    validar_mismatches(max_mismatches)
+    if nucleasas:
+        largo_minimo = min(nucleasa.largo_guia for nucleasa in nucleasas)
+        k = k_para_mismatches(max_mismatches, largo_minimo) if k is None else k
+        indice = cargar_indice_offtarget(gen_file, k)
+        conteos = np.zeros((len(df_sgRNA), max_mismatches + 1), dtype=np.int64)
+        columna = df_sgRNA["nucleasa"].to_numpy()
+        for nucleasa in nucleasas:
+            filas = np.flatnonzero(columna == nucleasa.nombre)
+            if len(filas):
+                conteos[filas] = contar_offtargets(df_sgRNA["gRNA"].iloc[filas].tolist(), indice, max_mismatches,
+                                                   nucleasa.pam, lado=nucleasa.lado)
+    else:
+        k = k_para_mismatches(max_mismatches) if k is None else k
+        indice = cargar_indice_offtarget(gen_file, k)
+        conteos = contar_offtargets(df_sgRNA["gRNA"].tolist(), indice, max_mismatches, pam)
+    # El propio sitio de la guía aparece como coincidencia exacta
+    conteos[:, 0] = np.maximum(conteos[:, 0] - 1, 0)
+
+    df_sgRNA = df_sgRNA.copy()
+    for m in range(max_mismatches + 1):
+        df_sgRNA[f"OT_{m}"] = conteos[:, m]
+    df_sgRNA["off_targets"] = conteos.sum(axis=1)
+    df_sgRNA["especificidad"] = puntuacion_especificidad(conteos)
+    return df_sgRNA
@@ -1,47 +1,173 @@
+import os
+import threading
+
 import numpy as np
 import pandas as pd
 import joblib
 
-import tensorflow as tf
-
-# Cargar el modelo entrenado
-try:
-    rf_model = joblib.load("modelo_sgRNA.pkl")
-    print("Modelo RandomForest cargado correctamente")
-except Exception as e:
-    print(f"Error cargando modelo RandomForest: {e}")
-
-try:
-    nn_model = tf.keras.models.load_model("modelo_sgRNA_nn.h5", compile=False)
-    nn_model.compile(optimizer='adam', loss=tf.keras.losses.MeanSquaredError(), metrics=['mae'])
-    print("Modelo TensorFlow cargado correctamente")
-except Exception as e:
-    print(f"Error cargando modelo TensorFlow: {e}")
-
-try:
-    xgb_model = joblib.load("modelo_sgRNA_xgb.pkl")
-    print("Modelo XGBoost cargado correctamente")
-except Exception as e:
-    print(f"Error cargando modelo XGBoost: {e}")
-    
-
-
-# Función para obtener la secuencia complemento inversa
-def complemento_inverso(seq):
-    """Devuelve la secuencia complemento inversa de una secuencia de ADN."""
-    complementos = {'A': 'T', 'T': 'A', 'C': 'G', 'G': 'C'}
-    return "".join(complementos[base] for base in reversed(seq))
-
-# Función para codificar la secuencia
-def one_hot_encode(seq):
-    mapping = {'A': [1,0,0,0], 'C': [0,1,0,0], 'G': [0,0,1,0], 'T': [0,0,0,1]}
-    return np.array([mapping[nuc] for nuc in seq]).flatten()
-
-# Función para obtener la secuencia complemento inversa
-def complemento_inverso(seq):
-    """Devuelve la secuencia complemento inversa de una secuencia de ADN."""
-    complementos = {'A': 'T', 'T': 'A', 'C': 'G', 'G': 'C'}
-    return "".join(complementos[base] for base in reversed(seq))
+from sgRNA.paq1_secuencia import BASES, CODIGO_INVALIDO, a_codigos, complemento_inverso, one_hot_encode, one_hot_encode_batch
+from sgRNA.paq1_cache import huella_archivo
+from sgRNA.paq1_perfil import etapa, contar, registrar_lote
+
+# Los modelos se resuelven respecto al paquete, no al directorio de trabajo
+_DIRECTORIO_MODELOS = os.path.dirname(os.path.abspath(__file__))
+
+
+def _cargar_pickle(ruta):
+    return joblib.load(ruta)
+
+
+def _cargar_arboles(ruta):
+    # Motor de árboles en arreglos planos (ver paq1_inferencia): usa el .npz exportado junto al
+    # pickle si está vigente, sin importar XGBoost ni scikit-learn
+    from sgRNA.paq1_inferencia import cargar_arboles
+    return cargar_arboles(ruta)
+
+
+def _cargar_red_numpy(ruta):
+    # Motor NumPy exportado desde el .h5 (ver paq1_inferencia): no necesita TensorFlow
+    from sgRNA.paq1_inferencia import RedDensaNumpy
+    return RedDensaNumpy.cargar(ruta)
+
+
+def _cargar_keras(ruta):
+    # TensorFlow solo se importa cuando realmente se necesita la red neuronal
+    import tensorflow as tf
+
+    modelo = tf.keras.models.load_model(ruta, compile=False)
+    modelo.compile(optimizer='adam', loss=tf.keras.losses.MeanSquaredError(), metrics=['mae'])
+    return modelo
+
+
+# Registro de modelos: nombre -> (descripción, archivo, función de carga)
+_REGISTRO_MODELOS = {
+    "rf": ("RandomForest", "modelo_sgRNA.pkl", _cargar_arboles),
+    "nn": ("Red neuronal (NumPy)", "modelo_sgRNA_nn.npz", _cargar_red_numpy),
+    "xgb": ("XGBoost", "modelo_sgRNA_xgb.pkl", _cargar_arboles),
+    # Modelos originales, solo para verificar los motores propios
+    "rf_nativo": ("RandomForest (scikit-learn)", "modelo_sgRNA.pkl", _cargar_pickle),
+    "nn_keras": ("TensorFlow", "modelo_sgRNA_nn.h5", _cargar_keras),
+    "xgb_nativo": ("XGBoost (biblioteca)", "modelo_sgRNA_xgb.pkl", _cargar_pickle),
+}
+_MODELOS_VERIFICACION = ("rf_nativo", "nn_keras", "xgb_nativo")
+_modelos_cargados = {}
+_lock_modelos = threading.Lock()
+
+# Nombres históricos de los modelos como atributos del módulo
+_ALIAS_MODELOS = {"rf_model": "rf", "nn_model": "nn", "xgb_model": "xgb"}
+
+
+def ruta_modelo(nombre):
+    """
+    Devuelve la ruta absoluta del archivo del modelo `nombre` dentro del paquete, o None si el
+    modelo no tiene archivo (ver `registrar_modelo`).
+    """
+    if nombre not in _REGISTRO_MODELOS:
+        raise ValueError(f"Modelo desconocido: {nombre}. Opciones: {', '.join(_REGISTRO_MODELOS)}")
+    archivo = _REGISTRO_MODELOS[nombre][1]
+    return None if archivo is None else os.path.join(_DIRECTORIO_MODELOS, archivo)
+
+
+def registrar_modelo(nombre, cargar, archivo=None, descripcion=None):
+    """
+    Registra un modelo adicional, por ejemplo un modelo de prueba para los benchmarks.
+
+    Parámetros:
+        nombre (str): Nombre con el que se usará en `modelo=` (no debe ser el de un modelo integrado).
+        cargar (callable): Función que recibe la ruta del archivo (o None) y devuelve un objeto
+            con `predict(X)`, donde X es la matriz one-hot (n, 80) y el resultado está en escala 0-1.
+        archivo (str, opcional): Archivo del modelo, relativo al directorio del paquete o absoluto.
+        descripcion (str, opcional): Nombre mostrado al cargar el modelo.
+    """
+    if nombre in ("rf", "nn", "xgb", "combined", "heuristic") + _MODELOS_VERIFICACION:
+        raise ValueError(f"No se puede reemplazar el modelo integrado {nombre}.")
+    _REGISTRO_MODELOS[nombre] = (descripcion or nombre, archivo, cargar)
+    _modelos_cargados.pop(nombre, None)
+    _PREDICTORES[nombre] = lambda X: _predict_registrado(nombre, X)
+    _PUNTUADORES[nombre] = PuntuadorModelo(nombre)
+
+
+def obtener_modelo(nombre):
+    """
+    Devuelve el modelo `nombre`, cargándolo (y su framework) solo la primera vez.
+
+    Parámetros:
+        nombre (str): "rf", "nn" o "xgb" (motores propios de paq1_inferencia), o "rf_nativo",
+            "nn_keras" o "xgb_nativo" (modelos originales con su biblioteca).
+
+    Retorna:
+        object: Modelo deserializado y guardado en caché para los siguientes usos.
+    """
+    modelo = _modelos_cargados.get(nombre)
+    if modelo is not None:
+        return modelo
+
+    ruta = ruta_modelo(nombre)
+    with _lock_modelos:
+        if nombre not in _modelos_cargados:
+            descripcion, _, cargar = _REGISTRO_MODELOS[nombre]
+            try:
+                with etapa(f"carga_modelo:{nombre}"):
+                    _modelos_cargados[nombre] = cargar(ruta)
+            except Exception as e:
+                print(f"Error cargando modelo {descripcion}: {e}")
+                raise
+            print(f"Modelo {descripcion} cargado correctamente")
+    return _modelos_cargados[nombre]
+
+
+def precargar_modelos(nombres=None):
+    """
+    Carga por adelantado los modelos indicados (por defecto todos, salvo los originales que
+    solo se usan para verificar los motores propios), para procesos de larga duración que no
+    deben pagar el costo de carga en la primera predicción.
+
+    Retorna:
+        list[str]: Nombres de los modelos cargados.
+    """
+    nombres = [nombre for nombre in _REGISTRO_MODELOS if nombre not in _MODELOS_VERIFICACION] if nombres is None else list(nombres)
+    for nombre in nombres:
+        obtener_modelo(nombre)
+    return nombres
+
+
+def modelos_requeridos(modelo):
+    """Modelos del registro que usa un puntuador (por nombre o como objeto, ver `obtener_puntuador`)."""
+    return list(obtener_puntuador(modelo).modelos)
+
+
+def clave_modelo(modelo):
+    """
+    Clave de caché de un modelo: su nombre junto con la huella SHA-256 de sus archivos, para que
+    un modelo reentrenado no reutilice puntajes anteriores.
+    """
+    puntuador = obtener_puntuador(modelo)
+    rutas = [ruta_modelo(nombre) for nombre in puntuador.modelos]
+    huellas = "-".join(huella_archivo(ruta)[:16] if ruta else "sin-archivo" for ruta in rutas)
+    return f"{puntuador.nombre}:{huellas}"
+
+
+def __getattr__(nombre):
+    # Compatibilidad con rf_model / nn_model / xgb_model como atributos del módulo
+    if nombre in _ALIAS_MODELOS:
+        return obtener_modelo(_ALIAS_MODELOS[nombre])
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+
+# Tamaño de lote por defecto para las llamadas a predict
+DEFAULT_BATCH_SIZE = 4096
+
+# Modelo posicional de la heurística (ejemplo basado en Rule Set 1): posición 1-20 -> {base: aporte}
+_PESO_POSICIONAL = {
+    18: {'C': +0.2},        # C en pos18 aporta +0.2
+    19: {'G': +0.2},        # G en pos19 aporta +0.2
+    20: {'G': +0.3, 'T': -0.3}  # G en pos20 +0.3, T en pos20 -0.3
+}
+
+# Código (0-255) del complemento inverso de cada 4-mer, con los 4-mers codificados en base 4
+# (A=0, C=1, G=2, T=3; la primera base en los bits altos)
+_KMERS_4 = ["".join(BASES[(codigo >> desplazamiento) & 3] for desplazamiento in (6, 4, 2, 0)) for codigo in range(256)]
+_COMPLEMENTO_4MER = np.array([_KMERS_4.index(complemento_inverso(kmer)) for kmer in _KMERS_4], dtype=np.intp)
 
 # Función para predecir la eficiencia de una guía sgRNA
 def predecir_eficiencia_guia(secuencia_20nt):
@@ -66,15 +192,10 @@ def predecir_eficiencia_guia(secuencia_20nt):
         puntaje += 0.5
 
     # 5. Incorporar modelo posicional (ejemplo basado en Rule Set 1)
-    peso_posicional = {
-        18: {'C': +0.2},        # C en pos18 aporta +0.2
-        19: {'G': +0.2},        # G en pos19 aporta +0.2
-        20: {'G': +0.3, 'T': -0.3}  # G en pos20 +0.3, T en pos20 -0.3
-    }
     for pos in range(1, 21):  # Posiciones 1 a 20 de la guía
         base = secuencia_20nt[pos-1]  # Ajuste de índice
-        if pos in peso_posicional and base in peso_posicional[pos]:
-            puntaje += peso_posicional[pos][base]
+        if pos in _PESO_POSICIONAL and base in _PESO_POSICIONAL[pos]:
+            puntaje += _PESO_POSICIONAL[pos][base]
 
     # 6. Evaluar auto-complementariedad (ejemplo: contar "GCGC" o "CGCG")
     posibles_palindromos = 0
@@ -95,6 +216,66 @@ def predecir_eficiencia_guia(secuencia_20nt):
     return puntaje
 
 
+def _contar_palindromos(kmers, bloque=65536):
+    """
+    Para cada fila de códigos de 4-mers, cuenta cuántos tienen su complemento inverso en la misma
+    fila, marcando la presencia de los 256 códigos por bloques de filas.
+    """
+    conteos = np.empty(len(kmers), dtype=np.int64)
+    for inicio in range(0, len(kmers), bloque):
+        parte = kmers[inicio:inicio + bloque]
+        filas = np.arange(len(parte))[:, None]
+        presentes = np.zeros((len(parte), 256), dtype=bool)
+        presentes[filas, parte] = True
+        conteos[inicio:inicio + len(parte)] = presentes[filas, _COMPLEMENTO_4MER[parte]].sum(axis=1)
+    return conteos
+
+
+def predecir_eficiencia_guia_batch(secuencias):
+    """
+    Versión vectorizada de `predecir_eficiencia_guia` para un lote de guías, con el mismo
+    resultado exacto (las reglas se aplican en el mismo orden y en float64).
+
+    La búsqueda de auto-complementariedad usa la tabla precalculada del complemento inverso de
+    los 256 4-mers: cada guía se reduce a los códigos de sus 17 4-mers y se cuenta cuántos tienen
+    su complemento inverso entre ellos. Las guías con bases distintas de A, C, G y T se
+    puntúan con `predecir_eficiencia_guia`.
+
+    Parámetros:
+        secuencias (list[str]): Guías de 20 nucleótidos.
+
+    Retorna:
+        np.ndarray: Puntaje heurístico de cada guía (no es un porcentaje).
+    """
+    secuencias = list(secuencias)
+    n = len(secuencias)
+    if n == 0:
+        return np.zeros(0)
+    if any(len(seq) != 20 for seq in secuencias):
+        raise ValueError("La secuencia de la guía debe tener 20 nucleótidos")
+    codigos = a_codigos("".join(secuencias)).reshape(n, 20)
+    # Las guías con bases inválidas se recalculan al final; mientras tanto se les asigna A
+    invalidas = np.flatnonzero((codigos == CODIGO_INVALIDO).any(axis=1))
+    if len(invalidas):
+        codigos = np.where(codigos == CODIGO_INVALIDO, 0, codigos)
+
+    gc = np.isin(codigos, (BASES.index('G'), BASES.index('C'))).sum(axis=1) / 20.0
+    puntaje = np.ones(n)
+    puntaje -= 0.3 * ((gc < 0.40) | (gc > 0.80))
+    puntaje += 0.5 * (codigos[:, -1] == BASES.index('G'))
+    for pos, pesos in _PESO_POSICIONAL.items():
+        for base, peso in pesos.items():
+            puntaje += np.where(codigos[:, pos - 1] == BASES.index(base), peso, 0.0)
+
+    kmers = (codigos[:, :17].astype(np.intp) << 6) | (codigos[:, 1:18] << 4) | (codigos[:, 2:19] << 2) | codigos[:, 3:20]
+    puntaje -= np.minimum(0.3 * _contar_palindromos(kmers), 0.8)
+    puntaje = np.maximum(puntaje, 0)
+
+    for i in invalidas:
+        puntaje[i] = predecir_eficiencia_guia(secuencias[i])
+    return puntaje
+
+
 # Función para predecir la eficiencia de una nueva secuencia sgRNA
 def predecir_eficiencia(seq):
     if len(seq) != 20:
@@ -104,7 +285,7 @@ def predecir_eficiencia(seq):
     X_new = np.array([one_hot_encode(seq)])
 
     # Hacer la predicción con el modelo entrenado
-    prediccion = rf_model.predict(X_new)[0]
+    prediccion = obtener_modelo("rf").predict(X_new)[0]
 
     prediccion =prediccion*100
 
@@ -121,7 +302,7 @@ def predecir_eficiencia_nn(seq):
     X_new = np.array([one_hot_encode(seq)])
 
     # Hacer la predicción
-    prediccion = nn_model.predict(X_new)[0][0] * 100
+    prediccion = obtener_modelo("nn").predict(X_new)[0][0] * 100
 
     return prediccion
 
@@ -136,7 +317,7 @@ def predecir_eficiencia_xgb(seq):
     X_new = np.array([one_hot_encode(seq)])
 
     # Hacer la predicción
-    prediccion = xgb_model.predict(X_new)[0] * 100
+    prediccion = obtener_modelo("xgb").predict(X_new)[0] * 100
 
     return prediccion
 
@@ -150,6 +331,203 @@ def predecir_eficiencia_combined(seq):
     return pred_final
 
 
+# Predicción por lotes: una sola llamada a predict por modelo y bloque (resultados en %)
+def _predict_rf(X):
+    registrar_lote("rf", len(X))
+    return obtener_modelo("rf").predict(X) * 100
+
+
+def _predict_nn(X):
+    registrar_lote("nn", len(X))
+    return obtener_modelo("nn").predict(X, batch_size=len(X), verbose=0)[:, 0] * 100
+
+
+def _predict_nn_keras(X):
+    registrar_lote("nn_keras", len(X))
+    return obtener_modelo("nn_keras").predict(X, batch_size=len(X), verbose=0)[:, 0] * 100
+
+
+def _predict_rf_nativo(X):
+    registrar_lote("rf_nativo", len(X))
+    return obtener_modelo("rf_nativo").predict(X) * 100
+
+
+def _predict_xgb_nativo(X):
+    registrar_lote("xgb_nativo", len(X))
+    return obtener_modelo("xgb_nativo").predict(X) * 100
+
+
+def _predict_xgb(X):
+    registrar_lote("xgb", len(X))
+    return obtener_modelo("xgb").predict(X) * 100
+
+
+def _predict_registrado(nombre, X):
+    registrar_lote(nombre, len(X))
+    return np.asarray(obtener_modelo(nombre).predict(X)) * 100
+
+
+# Predictores de los modelos individuales del registro: matriz one-hot -> eficiencias en %
+_PREDICTORES = {
+    "rf": _predict_rf,
+    "nn": _predict_nn,
+    "xgb": _predict_xgb,
+    "rf_nativo": _predict_rf_nativo,
+    "nn_keras": _predict_nn_keras,
+    "xgb_nativo": _predict_xgb_nativo,
+}
+
+
+class Puntuador:
+    """
+    Base de los puntuadores de guías que usa el motor de diseño.
+
+    Un puntuador tiene un `nombre` (usado en la clave del caché), la lista `modelos` de modelos
+    del registro que necesita (para precargarlos en cada worker) y el método `puntuar`. La
+    implementación por defecto codifica el lote en one-hot una sola vez y llama a `predecir` por
+    bloques de `batch_size` guías; las subclases solo tienen que definir `predecir`.
+    """
+
+    nombre = None
+    modelos = ()
+
+    def puntuar(self, secuencias, batch_size=DEFAULT_BATCH_SIZE):
+        """Devuelve las eficiencias (en %) de una lista de guías de 20 nucleótidos."""
+        X = one_hot_encode_batch(secuencias)
+        if len(X) == 0:
+            return np.zeros(0)
+        return np.concatenate([self.predecir(X[i:i + batch_size]) for i in range(0, len(X), batch_size)])
+
+    def predecir(self, X):
+        """Eficiencias (en %) de un bloque de la matriz one-hot (n, 80)."""
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.nombre!r})"
+
+
+class PuntuadorModelo(Puntuador):
+    """Puntuador basado en un único modelo del registro (rf, nn, xgb o uno registrado)."""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.modelos = (nombre,)
+
+    def predecir(self, X):
+        return _PREDICTORES[self.nombre](X)
+
+
+class PuntuadorCombinado(Puntuador):
+    """
+    Promedio de varios modelos del registro (por defecto XGBoost y la red neuronal, como
+    `predecir_eficiencia_combined`). Todos los modelos reciben el mismo bloque one-hot, de modo
+    que la codificación se hace una sola vez y cada modelo se llama una vez por bloque.
+    """
+
+    def __init__(self, nombre="combined", componentes=("xgb", "nn")):
+        if not componentes:
+            raise ValueError("El puntuador combinado necesita al menos un modelo.")
+        self.nombre = nombre
+        self.modelos = tuple(componentes)
+
+    def predecir(self, X):
+        total = _PREDICTORES[self.modelos[0]](X)
+        for nombre in self.modelos[1:]:
+            total = total + _PREDICTORES[nombre](X)
+        return total / len(self.modelos)
+
+
+class PuntuadorHeuristico(Puntuador):
+    """
+    Puntuador con la heurística de `predecir_eficiencia_guia` (GC, pesos posicionales y
+    auto-complementariedad), vectorizada y sin modelos que cargar. Devuelve el puntaje
+    heurístico (entre 0 y 2.2), no un porcentaje.
+    """
+
+    nombre = "heuristic"
+
+    def puntuar(self, secuencias, batch_size=DEFAULT_BATCH_SIZE):
+        return predecir_eficiencia_guia_batch(secuencias)
+
+
+# Puntuadores disponibles por nombre (opciones de `modelo`)
+_PUNTUADORES = {
+    "rf": PuntuadorModelo("rf"),
+    "nn": PuntuadorModelo("nn"),
+    "xgb": PuntuadorModelo("xgb"),
+    "combined": PuntuadorCombinado(),
+    "heuristic": PuntuadorHeuristico(),
+    "rf_nativo": PuntuadorModelo("rf_nativo"),
+    "nn_keras": PuntuadorModelo("nn_keras"),
+    "xgb_nativo": PuntuadorModelo("xgb_nativo"),
+}
+
+
+def obtener_puntuador(modelo):
+    """
+    Devuelve el puntuador correspondiente a `modelo`: un nombre ("rf", "nn", "xgb", "combined",
+    "heuristic" o un modelo registrado con `registrar_modelo`) o directamente un objeto `Puntuador`.
+    """
+    if isinstance(modelo, Puntuador):
+        return modelo
+    if modelo not in _PUNTUADORES:
+        raise ValueError(f"Modelo desconocido: {modelo}. Opciones: {', '.join(_PUNTUADORES)}")
+    return _PUNTUADORES[modelo]
+
+
+def predecir_eficiencia_batch(secuencias, modelo="rf", batch_size=DEFAULT_BATCH_SIZE, cache=None):
+    """
+    Predice la eficiencia de un lote de guías sgRNA con una sola codificación one-hot.
+
+    Parámetros:
+        secuencias (list[str]): Guías de 20 nucleótidos.
+        modelo (str | Puntuador): Modelo a utilizar: "rf", "nn", "xgb" o "combined", o un puntuador.
+        batch_size (int): Número máximo de guías por llamada a predict.
+        cache (paq1_cache.CacheEficiencias, opcional): Caché de puntajes; solo las guías que no
+            estén en él se envían al modelo.
+
+    Retorna:
+        np.ndarray: Eficiencias (en %) alineadas con `secuencias`.
+    """
+    puntuador = obtener_puntuador(modelo)
+    if batch_size < 1:
+        raise ValueError("batch_size debe ser un entero positivo.")
+
+    secuencias = list(secuencias)
+    if cache is not None:
+        return predecir_con_cache(secuencias, modelo, cache,
+                                  lambda pendientes: predecir_eficiencia_batch(pendientes, modelo, batch_size))
+
+    return puntuador.puntuar(secuencias, batch_size)
+
+
+def predecir_con_cache(secuencias, modelo, cache, puntuar):
+    """
+    Consulta el caché y envía a `puntuar` solo las guías que no están en él.
+
+    Parámetros:
+        secuencias (list[str]): Guías a puntuar.
+        modelo (str | Puntuador): Modelo de predecir_eficiencia_batch (se combina con la huella de su archivo).
+        cache (paq1_cache.CacheEficiencias): Caché de puntajes.
+        puntuar (callable): Función que recibe la lista de guías faltantes y devuelve sus eficiencias.
+
+    Retorna:
+        np.ndarray: Eficiencias alineadas con `secuencias`.
+    """
+    clave = clave_modelo(modelo)
+    valores, aciertos = cache.buscar(secuencias, clave)
+    pendientes = [seq for seq, acierto in zip(secuencias, aciertos) if not acierto]
+    contar("cache_aciertos", len(secuencias) - len(pendientes))
+    contar("cache_fallos", len(pendientes))
+    if not pendientes:
+        return valores
+    nuevos = np.asarray(puntuar(pendientes))
+    cache.guardar(pendientes, nuevos, clave)
+    valores = valores.astype(nuevos.dtype)
+    valores[~aciertos] = nuevos
+    return valores
+
+
 # Ejemplo de predicción con una nueva guía CRISPR
 # nueva_sec = "AGCTGATCGATGCGTGCTAG"  # Ejemplo de secuencia de 20 nt
 # eficiencia_predicha = predecir_eficiencia(nueva_sec)
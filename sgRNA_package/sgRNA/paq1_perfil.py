@@ -0,0 +1,210 @@
+import functools
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Perfil que recibe las mediciones; con None la instrumentación no hace nada
+_perfil_activo = None
+
+# Contexto vacío reutilizable para las etapas cuando no hay perfil activo
+_SIN_PERFIL = nullcontext()
+
+
+class Perfil:
+    """
+    Acumula las mediciones de una ejecución: tiempo de pared por etapa, contadores (sitios PAM,
+    candidatos, guías aceptadas, aciertos de caché...) y las llamadas a predict de cada modelo
+    con sus tamaños de lote.
+
+    Los tiempos de etapas anidadas son inclusivos (por ejemplo, "puntuacion" incluye la
+    "carga_modelo:<nombre>" si el modelo se carga en ese momento).
+
+    Parámetros:
+        observador (callable, opcional): Función que recibe (etapa, segundos) al terminar cada
+            etapa, para enviar las mediciones a otro sistema mientras se ejecuta el pipeline.
+    """
+
+    def __init__(self, observador=None):
+        self.observador = observador
+        self.etapas = {}
+        self.contadores = {}
+        self.lotes = {}
+        self._inicio = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def etapa(self, nombre):
+        """Mide el tiempo de pared del bloque y lo suma a la etapa `nombre`."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            segundos = time.perf_counter() - inicio
+            with self._lock:
+                etapa = self.etapas.setdefault(nombre, {"segundos": 0.0, "llamadas": 0})
+                etapa["segundos"] += segundos
+                etapa["llamadas"] += 1
+            if self.observador is not None:
+                self.observador(nombre, segundos)
+
+    def contar(self, nombre, cantidad=1):
+        """Suma `cantidad` al contador `nombre`."""
+        with self._lock:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + int(cantidad)
+
+    def registrar_lote(self, modelo, tamano):
+        """Registra una llamada a predict del modelo con un lote de `tamano` guías."""
+        with self._lock:
+            lotes = self.lotes.setdefault(modelo, {"llamadas": 0, "guias": 0, "lote_min": tamano, "lote_max": tamano})
+            lotes["llamadas"] += 1
+            lotes["guias"] += int(tamano)
+            lotes["lote_min"] = min(lotes["lote_min"], int(tamano))
+            lotes["lote_max"] = max(lotes["lote_max"], int(tamano))
+
+    def informe(self):
+        """
+        Devuelve las mediciones acumuladas como diccionario serializable en JSON.
+
+        Claves: "duracion_segundos", "etapas", "contadores", "predict" (por modelo: llamadas,
+        guías, lote mínimo, máximo y medio) y "rss_maximo_mb" (None si no está disponible).
+        """
+        with self._lock:
+            predict = {
+                modelo: {**lotes, "lote_medio": lotes["guias"] / lotes["llamadas"]}
+                for modelo, lotes in self.lotes.items()
+            }
+            return {
+                "duracion_segundos": time.perf_counter() - self._inicio,
+                "etapas": {nombre: dict(etapa) for nombre, etapa in self.etapas.items()},
+                "contadores": dict(self.contadores),
+                "predict": predict,
+                "rss_maximo_mb": rss_maximo_mb(),
+            }
+
+    def a_json(self):
+        """Informe en formato JSON."""
+        return json.dumps(self.informe(), indent=2, ensure_ascii=False)
+
+    def a_prometheus(self):
+        """Informe en el formato de texto de Prometheus (exposición de métricas)."""
+        informe = self.informe()
+        lineas = [
+            "# TYPE sgrna_duracion_segundos gauge",
+            f"sgrna_duracion_segundos {informe['duracion_segundos']:.6f}",
+            "# TYPE sgrna_etapa_segundos gauge",
+        ]
+        lineas += [f'sgrna_etapa_segundos{{etapa="{nombre}"}} {etapa["segundos"]:.6f}'
+                   for nombre, etapa in informe["etapas"].items()]
+        lineas.append("# TYPE sgrna_etapa_llamadas_total counter")
+        lineas += [f'sgrna_etapa_llamadas_total{{etapa="{nombre}"}} {etapa["llamadas"]}'
+                   for nombre, etapa in informe["etapas"].items()]
+        lineas.append("# TYPE sgrna_contador_total counter")
+        lineas += [f'sgrna_contador_total{{nombre="{nombre}"}} {valor}' for nombre, valor in informe["contadores"].items()]
+        for metrica in ("llamadas", "guias", "lote_min", "lote_max", "lote_medio"):
+            lineas.append(f"# TYPE sgrna_predict_{metrica} gauge")
+            lineas += [f'sgrna_predict_{metrica}{{modelo="{modelo}"}} {lotes[metrica]}'
+                       for modelo, lotes in informe["predict"].items()]
+        if informe["rss_maximo_mb"] is not None:
+            lineas += ["# TYPE sgrna_rss_maximo_mb gauge", f"sgrna_rss_maximo_mb {informe['rss_maximo_mb']:.1f}"]
+        return "\n".join(lineas) + "\n"
+
+    def guardar(self, ruta, formato=None):
+        """
+        Escribe el informe en `ruta`, en formato "json" o "prometheus". Si no se indica el formato,
+        se usa Prometheus para las extensiones .prom y .txt, y JSON en otro caso.
+        """
+        if formato is None:
+            formato = "prometheus" if ruta.endswith((".prom", ".txt")) else "json"
+        if formato not in ("json", "prometheus"):
+            raise ValueError(f"Formato de perfil desconocido: {formato}. Opciones: json, prometheus")
+        with open(ruta, "w", encoding="utf-8") as file:
+            file.write(self.a_json() if formato == "json" else self.a_prometheus())
+
+
+def rss_maximo_mb():
+    """Memoria residente máxima del proceso en MB, o None si la plataforma no la informa."""
+    if resource is None:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss está en bytes en macOS y en KiB en Linux
+    return maximo / 2 ** 20 if sys.platform == "darwin" else maximo / 2 ** 10
+
+
+def activar(perfil=None):
+    """Activa la instrumentación con `perfil` (uno nuevo por defecto) y lo devuelve."""
+    global _perfil_activo
+    _perfil_activo = Perfil() if perfil is None else perfil
+    return _perfil_activo
+
+
+def desactivar():
+    """Desactiva la instrumentación y devuelve el perfil que estaba activo."""
+    global _perfil_activo
+    perfil, _perfil_activo = _perfil_activo, None
+    return perfil
+
+
+def perfil_activo():
+    """Devuelve el perfil activo, o None si la instrumentación está desactivada."""
+    return _perfil_activo
+
+
+@contextmanager
+def perfilar(perfil=None, observador=None):
+    """
+    Punto de entrada para usar la instrumentación desde código: activa un perfil mientras dura el
+    bloque y restaura el estado anterior al salir.
+
+    Ejemplo:
+        with perfilar() as perfil:
+            df = design_sgRNAs_xgb("genoma.fa", "target.fa")
+        print(perfil.informe()["etapas"])
+    """
+    global _perfil_activo
+    anterior = _perfil_activo
+    _perfil_activo = Perfil(observador) if perfil is None else perfil
+    try:
+        yield _perfil_activo
+    finally:
+        _perfil_activo = anterior
+
+
+# Funciones usadas por el resto del paquete: con la instrumentación desactivada solo comprueban
+# que no hay perfil activo
+
+def etapa(nombre):
+    """Contexto que mide la etapa `nombre` en el perfil activo (o no hace nada)."""
+    perfil = _perfil_activo
+    return _SIN_PERFIL if perfil is None else perfil.etapa(nombre)
+
+
+def contar(nombre, cantidad=1):
+    """Suma `cantidad` al contador `nombre` del perfil activo, si lo hay."""
+    perfil = _perfil_activo
+    if perfil is not None:
+        perfil.contar(nombre, cantidad)
+
+
+def registrar_lote(modelo, tamano):
+    """Registra una llamada a predict en el perfil activo, si lo hay."""
+    perfil = _perfil_activo
+    if perfil is not None:
+        perfil.registrar_lote(modelo, tamano)
+
+
+def medir_etapa(nombre):
+    """Decorador que mide cada llamada a la función como la etapa `nombre` del perfil activo."""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with etapa(nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
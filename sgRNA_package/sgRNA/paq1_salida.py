@@ -0,0 +1,227 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from sgRNA.paq1_perfil import etapa
+
+# Formatos de salida y su extensión
+FORMATOS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "feather": ".feather",
+    "jsonl": ".jsonl",
+}
+
+# Tipos compactos de las columnas conocidas de la tabla de resultados (las demás se conservan)
+_CATEGORICAS = ("target", "PAM", "hebra", "nucleasa")
+_FLOTANTES = ("GC_content", "Eficiencia", "especificidad")  # redondeados a 2 decimales: float32 basta
+_ENTEROS = {"position": np.int64, "corte": np.int64, "off_targets": np.int32}
+_TEXTOS = ("gRNA",)
+
+
+def ruta_salida(nombre_base, formato):
+    """Archivo de resultados para un nombre base (sin extensión) y un formato."""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de salida desconocido: {formato}. Opciones: {', '.join(FORMATOS)}")
+    return f"{nombre_base}{FORMATOS[formato]}"
+
+
+def formato_de_ruta(ruta):
+    """Formato correspondiente a la extensión de `ruta`."""
+    extension = os.path.splitext(ruta)[1].lower()
+    for formato, ext in FORMATOS.items():
+        if ext == extension:
+            return formato
+    raise ValueError(f"No se reconoce el formato de {ruta}. Extensiones: {', '.join(FORMATOS.values())}")
+
+
+def compactar(df, categorias=None):
+    """
+    Devuelve una copia de la tabla con tipos compactos: target, PAM, hebra y nucleasa como categorías,
+    posiciones y conteos de off-targets enteros y puntajes en float32.
+
+    Parámetros:
+        df (pd.DataFrame): Tabla de resultados (o un bloque de ella).
+        categorias (dict, opcional): Categorías conocidas por columna, que se amplían en el lugar
+            con los valores nuevos. Al compartirlo entre bloques, las categorías de un bloque
+            siempre extienden las del anterior (lo que necesita la escritura incremental).
+    """
+    df = df.copy()
+    for columna in df.columns:
+        if columna in _CATEGORICAS:
+            if categorias is None:
+                df[columna] = df[columna].astype("category")
+                continue
+            conocidas = categorias.setdefault(columna, [])
+            nuevas = pd.unique(df[columna][~df[columna].isin(conocidas)])
+            conocidas.extend(nuevas.tolist())
+            df[columna] = pd.Categorical(df[columna], categories=conocidas)
+        elif columna in _FLOTANTES:
+            df[columna] = df[columna].astype(np.float32)
+        elif columna in _ENTEROS:
+            df[columna] = df[columna].astype(_ENTEROS[columna])
+        elif columna.startswith("OT_"):
+            df[columna] = df[columna].astype(np.int32)
+    return df
+
+
+def _importar_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("Los formatos parquet y feather necesitan pyarrow (pip install .[arrow]).") from e
+    return pyarrow
+
+
+def _esquema_arrow(bloque):
+    """
+    Esquema Arrow de la escritura incremental: los tipos de `compactar` para las columnas
+    conocidas y, para las demás, los que deduce pyarrow del bloque.
+
+    No depende de los valores del primer bloque, que puede no tener filas (un target sin guías,
+    con columnas sin tipo). Las categorías usan índices de 32 bits para poder crecer entre bloques.
+    """
+    pa = _importar_pyarrow()
+    deducido = pa.Schema.from_pandas(bloque, preserve_index=False).remove_metadata()
+    campos = []
+    for campo in deducido:
+        columna = campo.name
+        if columna in _CATEGORICAS:
+            tipo = pa.dictionary(pa.int32(), pa.string())
+        elif columna in _FLOTANTES:
+            tipo = pa.float32()
+        elif columna in _ENTEROS:
+            tipo = pa.from_numpy_dtype(_ENTEROS[columna])
+        elif columna.startswith("OT_"):
+            tipo = pa.int32()
+        elif columna in _TEXTOS or pa.types.is_null(campo.type):
+            tipo = pa.string()
+        else:
+            tipo = campo.type
+        campos.append(campo.with_type(tipo))
+    return pa.schema(campos)
+
+
+class EscritorResultados:
+    """
+    Escribe la tabla de resultados de forma incremental, bloque a bloque (por ejemplo, a medida
+    que termina cada grupo de targets), sin reunir todas las filas en memoria.
+
+    - csv y jsonl: cada bloque se agrega al archivo de texto (el encabezado del CSV solo una vez).
+    - parquet: cada bloque es un row group del mismo archivo.
+    - feather (Arrow IPC): cada bloque es un record batch; las categorías nuevas se escriben
+      como deltas del diccionario.
+
+    En parquet y feather las columnas se guardan con los tipos de `compactar`.
+
+    Parámetros:
+        ruta (str): Archivo de salida.
+        formato (str, opcional): "csv", "parquet", "feather" o "jsonl"; por defecto según la extensión.
+    """
+
+    def __init__(self, ruta, formato=None):
+        self.ruta = ruta
+        self.formato = formato_de_ruta(ruta) if formato is None else formato
+        if self.formato not in FORMATOS:
+            raise ValueError(f"Formato de salida desconocido: {self.formato}. Opciones: {', '.join(FORMATOS)}")
+        self.filas = 0
+        self._archivo = None
+        self._escritor = None
+        self._esquema = None
+        self._categorias = {}
+        if self.formato in ("parquet", "feather"):
+            _importar_pyarrow()
+
+    def escribir(self, bloque):
+        """Agrega un bloque (DataFrame) al archivo."""
+        with etapa(f"reporte_{self.formato}"):
+            self._escribir(bloque)
+        self.filas += len(bloque)
+
+    def _escribir(self, bloque):
+        if self.formato == "csv":
+            if self._archivo is None:
+                self._archivo = open(self.ruta, "w", newline="", encoding="utf-8")
+                bloque.to_csv(self._archivo, index=False)
+            else:
+                bloque.to_csv(self._archivo, index=False, header=False)
+        elif self.formato == "jsonl":
+            if self._archivo is None:
+                self._archivo = open(self.ruta, "w", encoding="utf-8")
+            if len(bloque):
+                self._archivo.write(bloque.to_json(orient="records", lines=True, force_ascii=False).rstrip("\n") + "\n")
+        else:
+            self._escribir_arrow(compactar(bloque, self._categorias))
+
+    def _escribir_arrow(self, bloque):
+        pa = _importar_pyarrow()
+        if self._escritor is None:
+            self._esquema = _esquema_arrow(bloque)
+            if self.formato == "parquet":
+                import pyarrow.parquet as pq
+                self._escritor = pq.ParquetWriter(self.ruta, self._esquema)
+            else:
+                import pyarrow.ipc as ipc
+                self._escritor = ipc.new_file(self.ruta, self._esquema,
+                                              options=ipc.IpcWriteOptions(emit_dictionary_deltas=True))
+        self._escritor.write_table(pa.Table.from_pandas(bloque, schema=self._esquema, preserve_index=False))
+
+    def escribir_bloques(self, bloques):
+        """Escribe cada bloque de `bloques` y lo vuelve a entregar, para encadenar otro consumidor (por ejemplo el PDF)."""
+        for bloque in bloques:
+            self.escribir(bloque)
+            yield bloque
+
+    def cerrar(self):
+        """Cierra el archivo; devuelve el número de filas escritas."""
+        if self._archivo is not None:
+            self._archivo.close()
+            self._archivo = None
+        if self._escritor is not None:
+            self._escritor.close()
+            self._escritor = None
+        return self.filas
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def escribir_resultados(df_sgRNA, ruta, formato=None):
+    """Escribe una tabla completa (o un iterable de bloques) en `ruta`; devuelve el número de filas."""
+    bloques = [df_sgRNA] if isinstance(df_sgRNA, pd.DataFrame) else df_sgRNA
+    with EscritorResultados(ruta, formato) as escritor:
+        for bloque in bloques:
+            escritor.escribir(bloque)
+    return escritor.filas
+
+
+def leer_resultados(ruta, formato=None, columnas=None):
+    """
+    Lee un archivo de resultados escrito por `EscritorResultados`, con los tipos de `compactar`.
+
+    Parámetros:
+        ruta (str): Archivo de resultados.
+        formato (str, opcional): Formato; por defecto según la extensión.
+        columnas (list[str], opcional): Columnas a leer (en parquet y feather solo se leen esas).
+    """
+    formato = formato_de_ruta(ruta) if formato is None else formato
+    if formato == "csv":
+        df = pd.read_csv(ruta, usecols=columnas)
+    elif formato == "jsonl":
+        # Un archivo vacío (ninguna guía) no tiene registros de los que deducir las columnas
+        df = pd.read_json(ruta, lines=True, dtype=False) if os.path.getsize(ruta) else pd.DataFrame()
+        if columnas is not None:
+            df = df[columnas]
+    elif formato == "parquet":
+        _importar_pyarrow()
+        return pd.read_parquet(ruta, columns=columnas)
+    elif formato == "feather":
+        _importar_pyarrow()
+        return pd.read_feather(ruta, columns=columnas)
+    else:
+        raise ValueError(f"Formato de salida desconocido: {formato}. Opciones: {', '.join(FORMATOS)}")
+    return compactar(df)
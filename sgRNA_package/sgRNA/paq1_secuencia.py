@@ -0,0 +1,145 @@
+import numpy as np
+
+# Código numérico de cada base: A=0, C=1, G=2, T=3; cualquier otro carácter = 4
+BASES = "ACGT"
+CODIGO_INVALIDO = 4
+
+_CODIGO_ASCII = np.full(256, CODIGO_INVALIDO, dtype=np.uint8)
+for _i, _base in enumerate(BASES):
+    _CODIGO_ASCII[ord(_base)] = _i
+
+# Fila one-hot de cada código (la fila del código inválido queda en cero)
+_ONE_HOT = np.zeros((CODIGO_INVALIDO + 1, 4), dtype=np.uint8)
+_ONE_HOT[np.arange(4), np.arange(4)] = 1
+
+# Es G o C, por código
+_ES_GC = np.array([0, 1, 1, 0, 0], dtype=np.int32)
+
+# Complemento por tabla de traducción, con los códigos IUPAC (N se conserva)
+_IUPAC = "ACGTRYSWKMBDHVN"
+_TABLA_COMPLEMENTO = str.maketrans(_IUPAC, "TGCAYRSWMKVHDBN")
+_TABLA_NO_IUPAC = str.maketrans("", "", _IUPAC)
+
+# Tablas de redondeo del %GC por longitud de ventana (se crean bajo demanda)
+_TABLAS_GC = {}
+
+
+def a_codigos(seq):
+    """
+    Convierte una secuencia en un arreglo uint8 de códigos (A=0, C=1, G=2, T=3, otro=4),
+    sin copiar más que la conversión a bytes.
+    """
+    return _CODIGO_ASCII[np.frombuffer(seq.encode("ascii"), dtype=np.uint8)]
+
+
+def complemento_inverso(seq):
+    """
+    Devuelve la secuencia complemento inversa de una secuencia de ADN, en mayúsculas (las
+    minúsculas de un FASTA con enmascarado suave se aceptan). Los códigos IUPAC se complementan;
+    cualquier otro carácter es un error.
+    """
+    seq = seq.upper()
+    invalidos = seq.translate(_TABLA_NO_IUPAC)
+    if invalidos:
+        raise ValueError(f"Carácter no válido en la secuencia de ADN: {invalidos[0]!r}")
+    return seq.translate(_TABLA_COMPLEMENTO)[::-1]
+
+
+def _tabla_gc(k):
+    """%GC redondeado para 0..k bases G/C en una ventana de k bases, igual que gc_content."""
+    tabla = _TABLAS_GC.get(k)
+    if tabla is None:
+        tabla = np.array([round((gc / k) * 100, 2) for gc in range(k + 1)])
+        _TABLAS_GC[k] = tabla
+    return tabla
+
+
+def gc_ventanas(seq, k):
+    """
+    Calcula el %GC de todas las ventanas de longitud `k` de una secuencia a la vez, con sumas
+    acumuladas.
+
+    Retorna:
+        np.ndarray: Arreglo de longitud len(seq) - k + 1; el elemento i es el %GC de seq[i:i+k],
+        redondeado a 2 decimales como en `gc_content`.
+    """
+    if len(seq) < k:
+        return np.zeros(0)
+    acumulado = np.zeros(len(seq) + 1, dtype=np.int64)
+    np.cumsum(_ES_GC[a_codigos(seq)], out=acumulado[1:])
+    return _tabla_gc(k)[acumulado[k:] - acumulado[:-k]]
+
+
+def gc_lote(secuencias):
+    """
+    Calcula el %GC de un lote de secuencias de igual longitud.
+
+    Retorna:
+        np.ndarray: %GC de cada secuencia, redondeado a 2 decimales como en `gc_content`.
+    """
+    if len(secuencias) == 0:
+        return np.zeros(0)
+    longitud = len(secuencias[0])
+    codigos = a_codigos("".join(secuencias))
+    if len(codigos) != longitud * len(secuencias):
+        raise ValueError("Todas las secuencias deben tener la misma longitud.")
+    return _tabla_gc(longitud)[_ES_GC[codigos.reshape(len(secuencias), longitud)].sum(axis=1)]
+
+
+def validas_lote(secuencias):
+    """
+    Indica qué secuencias de un lote (de igual longitud) tienen solo las bases A, C, G y T, las
+    únicas que los modelos pueden codificar.
+
+    Retorna:
+        np.ndarray: Máscara booleana, una posición por secuencia.
+    """
+    if len(secuencias) == 0:
+        return np.zeros(0, dtype=bool)
+    codigos = a_codigos("".join(secuencias)).reshape(len(secuencias), -1)
+    return ~(codigos == CODIGO_INVALIDO).any(axis=1)
+
+
+def gc_conteos(conteos, longitud):
+    """%GC de secuencias de `longitud` bases a partir de su número de bases G/C, igual que `gc_lote`."""
+    return _tabla_gc(longitud)[conteos]
+
+
+def one_hot_encode(seq):
+    """Codifica una secuencia en un vector one-hot de 4 * len(seq) posiciones (A, C, G, T)."""
+    codigos = a_codigos(seq)
+    if (codigos == CODIGO_INVALIDO).any():
+        raise ValueError("La secuencia solo puede contener las bases A, C, G y T.")
+    return _ONE_HOT[codigos].astype(int).ravel()
+
+
+def one_hot_encode_batch(secuencias, longitud=20, out=None):
+    """
+    Codifica un lote de secuencias en una única matriz one-hot mediante una tabla de consulta.
+
+    Parámetros:
+        secuencias (list[str]): Secuencias de ADN, todas de la misma longitud.
+        longitud (int): Longitud esperada de cada secuencia.
+        out (np.ndarray, opcional): Búfer preasignado de forma (n, 4 * longitud) donde escribir
+            el resultado, para reutilizarlo entre lotes.
+
+    Retorna:
+        np.ndarray: Matriz (float32 si no se da `out`) de forma (n, 4 * longitud), con el mismo
+        orden de columnas que `one_hot_encode`.
+    """
+    n = len(secuencias)
+    if out is None:
+        out = np.empty((n, 4 * longitud), dtype=np.float32)
+    elif out.shape != (n, 4 * longitud) or not out.flags.c_contiguous:
+        raise ValueError(f"El búfer debe ser contiguo y de forma {(n, 4 * longitud)}.")
+    if n == 0:
+        return out
+    if any(len(seq) != longitud for seq in secuencias):
+        raise ValueError(f"Todas las secuencias deben tener exactamente {longitud} nucleótidos.")
+
+    codigos = a_codigos("".join(secuencias))
+    if (codigos == CODIGO_INVALIDO).any():
+        raise ValueError("Las secuencias solo pueden contener las bases A, C, G y T.")
+
+    out.reshape(n * longitud, 4)[:] = _ONE_HOT[codigos]
+    return out
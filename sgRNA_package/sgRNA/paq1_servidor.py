@@ -0,0 +1,419 @@
+import argparse
+import asyncio
+import http.client
+import json
+import signal
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from sgRNA.paq1_percent import Puntuador, obtener_puntuador, precargar_modelos, modelos_requeridos, predecir_eficiencia_batch
+from sgRNA.paq1_secuencia import a_codigos, CODIGO_INVALIDO
+from sgRNA.paq1_cache import CacheEficiencias
+from sgRNA.paq1_alineamiento import BACKENDS_ALINEAMIENTO, SinAlineacion
+from sgRNA.paq1_nucleasa import obtener_nucleasas
+from sgRNA.paq1_soporte import design_sgRNAs, design_sgRNAs_multi, es_multi_target
+
+# Valores por defecto del servicio
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PUERTO = 8765
+DEFAULT_MAX_LOTE = 4096
+DEFAULT_LATENCIA_MS = 5.0
+DEFAULT_WORKERS_DISENO = 4
+
+# Tamaño máximo del cuerpo de una solicitud (bytes)
+MAX_CUERPO = 64 * 2 ** 20
+
+_MENSAJES_HTTP = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                  413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class SolicitudInvalida(ValueError):
+    """Error en los datos de una solicitud; se responde con HTTP 400."""
+
+
+class _ErrorHTTP(Exception):
+    """Error con un código de estado HTTP propio (404, 405, 413)."""
+
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def _validar_guias(guias):
+    """Comprueba que `guias` sea una lista de secuencias de 20 nt con solo A, C, G y T."""
+    if not isinstance(guias, list) or not all(isinstance(guia, str) for guia in guias):
+        raise SolicitudInvalida("'guias' debe ser una lista de secuencias.")
+    guias = [guia.upper() for guia in guias]
+    if any(len(guia) != 20 for guia in guias):
+        raise SolicitudInvalida("Todas las guías deben tener exactamente 20 nucleótidos.")
+    if guias and (a_codigos("".join(guias)) == CODIGO_INVALIDO).any():
+        raise SolicitudInvalida("Las guías solo pueden contener las bases A, C, G y T.")
+    return guias
+
+
+class LotificadorPredicciones:
+    """
+    Agrupa en micro-lotes las guías de solicitudes concurrentes para puntuarlas con una sola
+    llamada a predict por modelo.
+
+    La primera solicitud que llega para un modelo abre un lote que se despacha cuando pasa el
+    presupuesto de latencia o cuando acumula `max_lote` guías, lo que ocurra primero. Las
+    predicciones se ejecutan de a una en un hilo dedicado, así que los modelos nunca se usan
+    desde dos hilos a la vez.
+
+    Parámetros:
+        max_lote (int): Guías máximas por lote (y por llamada a predict).
+        latencia_ms (float): Tiempo máximo que una solicitud espera a que se llene su lote.
+        cache (paq1_cache.CacheEficiencias, opcional): Caché de puntajes consultado en cada lote.
+    """
+
+    def __init__(self, max_lote=DEFAULT_MAX_LOTE, latencia_ms=DEFAULT_LATENCIA_MS, cache=None):
+        if max_lote < 1:
+            raise ValueError("max_lote debe ser un entero positivo.")
+        self.max_lote = max_lote
+        self.latencia = latencia_ms / 1000
+        self.cache = cache
+        self.lotes = 0
+        self.guias = 0
+        self.solicitudes = 0
+        self._pendientes = {}
+        self._conteos = {}
+        self._temporizadores = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sgRNA-predict")
+
+    async def puntuar(self, guias, modelo):
+        """Devuelve las eficiencias (en %) de `guias`, puntuadas junto con otras solicitudes concurrentes."""
+        obtener_puntuador(modelo)
+        if not guias:
+            return np.zeros(0)
+        futuro = asyncio.get_running_loop().create_future()
+        self._pendientes.setdefault(modelo, []).append((guias, futuro))
+        self._conteos[modelo] = self._conteos.get(modelo, 0) + len(guias)
+        self.solicitudes += 1
+
+        if self._conteos[modelo] >= self.max_lote:
+            self._despachar(modelo)
+        elif modelo not in self._temporizadores:
+            self._temporizadores[modelo] = asyncio.get_running_loop().call_later(self.latencia, self._despachar, modelo)
+        return await futuro
+
+    def _despachar(self, modelo):
+        temporizador = self._temporizadores.pop(modelo, None)
+        if temporizador is not None:
+            temporizador.cancel()
+        pendientes = self._pendientes.pop(modelo, [])
+        self._conteos.pop(modelo, None)
+        if pendientes:
+            asyncio.ensure_future(self._ejecutar(modelo, pendientes))
+
+    def _predecir(self, guias, modelo):
+        return predecir_eficiencia_batch(guias, modelo, self.max_lote, cache=self.cache)
+
+    async def _ejecutar(self, modelo, pendientes):
+        guias = [guia for lote, _ in pendientes for guia in lote]
+        self.lotes += 1
+        self.guias += len(guias)
+        try:
+            eficiencias = await asyncio.get_running_loop().run_in_executor(self._executor, self._predecir, guias, modelo)
+        except Exception as e:
+            for _, futuro in pendientes:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+
+        inicio = 0
+        for lote, futuro in pendientes:
+            if not futuro.done():
+                futuro.set_result(eficiencias[inicio:inicio + len(lote)])
+            inicio += len(lote)
+
+    def estadisticas(self):
+        """Solicitudes, lotes, guías puntuadas y tamaño medio de lote desde el inicio."""
+        return {
+            "solicitudes": self.solicitudes,
+            "lotes": self.lotes,
+            "guias": self.guias,
+            "lote_medio": self.guias / self.lotes if self.lotes else 0.0,
+        }
+
+    def cerrar(self):
+        self._executor.shutdown(wait=True)
+
+
+class PuntuadorServidor(Puntuador):
+    """
+    Puntuador que envía las guías al lotificador del servidor, para que los diseños que se
+    ejecutan en hilos compartan los micro-lotes con las solicitudes de puntuación.
+    """
+
+    def __init__(self, lotificador, modelo, loop):
+        self.lotificador = lotificador
+        self.nombre = modelo
+        self.modelos = tuple(modelos_requeridos(modelo))
+        self._loop = loop
+
+    def puntuar(self, secuencias, batch_size=None):
+        return asyncio.run_coroutine_threadsafe(self.lotificador.puntuar(list(secuencias), self.nombre), self._loop).result()
+
+
+class ServidorSgRNA:
+    """
+    Servicio local de larga duración: mantiene los modelos cargados y atiende solicitudes JSON
+    sobre HTTP/1.1, por TCP o por un socket Unix.
+
+    Rutas:
+        GET  /salud     Estado, modelos cargados y estadísticas de los micro-lotes.
+        POST /puntuar   {"guias": [...], "modelo": "xgb"} -> {"eficiencias": [...]}
+        POST /disenar   {"gen_file": ..., "target_file": ..., "modelo": ..., "window_size": 20,
+                         "alineador": "blast", "nucleasas": ["SpCas9", ...]} -> {"guias": [{columna: valor, ...}, ...]}
+
+    En /disenar las rutas de los FASTA son rutas del equipo donde corre el servidor.
+
+    Parámetros:
+        host (str), puerto (int): Dirección TCP (ignorada si se da `socket_unix`).
+        socket_unix (str, opcional): Ruta del socket Unix donde escuchar.
+        modelos (list[str]): Modelos que se cargan al iniciar.
+        max_lote (int), latencia_ms (float): Parámetros de `LotificadorPredicciones`.
+        cache (str, opcional): Archivo SQLite del caché de puntajes.
+        workers_diseno (int): Diseños que se ejecutan a la vez.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, puerto=DEFAULT_PUERTO, socket_unix=None, modelos=("xgb",),
+                 max_lote=DEFAULT_MAX_LOTE, latencia_ms=DEFAULT_LATENCIA_MS, cache=None,
+                 workers_diseno=DEFAULT_WORKERS_DISENO):
+        self.host = host
+        self.puerto = puerto
+        self.socket_unix = socket_unix
+        self.modelos = list(modelos)
+        self.cache = CacheEficiencias(cache) if cache else None
+        self.lotificador = LotificadorPredicciones(max_lote, latencia_ms, self.cache)
+        self._executor_diseno = ThreadPoolExecutor(max_workers=workers_diseno, thread_name_prefix="sgRNA-diseno")
+        self._servidor = None
+
+    async def iniciar(self):
+        """Carga los modelos y empieza a escuchar; devuelve la dirección en la que escucha."""
+        loop = asyncio.get_running_loop()
+        requeridos = [nombre for modelo in self.modelos for nombre in modelos_requeridos(modelo)]
+        await loop.run_in_executor(self.lotificador._executor, precargar_modelos, list(dict.fromkeys(requeridos)))
+
+        if self.socket_unix:
+            self._servidor = await asyncio.start_unix_server(self._atender, path=self.socket_unix)
+            return self.socket_unix
+        self._servidor = await asyncio.start_server(self._atender, self.host, self.puerto)
+        self.puerto = self._servidor.sockets[0].getsockname()[1]
+        return f"http://{self.host}:{self.puerto}"
+
+    async def detener(self):
+        """Deja de aceptar conexiones y libera los hilos y el caché."""
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        self._executor_diseno.shutdown(wait=True)
+        self.lotificador.cerrar()
+        if self.cache is not None:
+            self.cache.cerrar()
+
+    async def _atender(self, reader, writer):
+        estado, respuesta = 500, {"error": "Error interno"}
+        try:
+            metodo, ruta, cuerpo = await self._leer_solicitud(reader)
+            estado, respuesta = 200, await self._despachar(metodo, ruta, cuerpo)
+        except SolicitudInvalida as e:
+            estado, respuesta = 400, {"error": str(e)}
+        except _ErrorHTTP as e:
+            estado, respuesta = e.estado, {"error": str(e)}
+        except Exception as e:
+            respuesta = {"error": f"{type(e).__name__}: {e}"}
+
+        datos = json.dumps(respuesta, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {estado} {_MENSAJES_HTTP.get(estado, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(datos)}\r\nConnection: close\r\n\r\n".encode("ascii") + datos)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _leer_solicitud(self, reader):
+        linea = (await reader.readline()).decode("latin-1").split()
+        if len(linea) != 3:
+            raise SolicitudInvalida("Solicitud HTTP mal formada.")
+        metodo, ruta, _ = linea
+        largo = 0
+        while True:
+            cabecera = (await reader.readline()).decode("latin-1").strip()
+            if not cabecera:
+                break
+            nombre, _, valor = cabecera.partition(":")
+            if nombre.strip().lower() == "content-length":
+                largo = int(valor)
+        if largo > MAX_CUERPO:
+            raise _ErrorHTTP(413, "Cuerpo de la solicitud demasiado grande.")
+        cuerpo = await reader.readexactly(largo) if largo else b""
+        try:
+            return metodo, urlsplit(ruta).path, json.loads(cuerpo) if cuerpo else {}
+        except json.JSONDecodeError:
+            raise SolicitudInvalida("El cuerpo de la solicitud no es JSON válido.")
+
+    async def _despachar(self, metodo, ruta, cuerpo):
+        rutas = {"/salud": ("GET", self._salud), "/puntuar": ("POST", self._puntuar), "/disenar": ("POST", self._disenar)}
+        if ruta not in rutas:
+            raise _ErrorHTTP(404, f"Ruta desconocida: {ruta}")
+        esperado, manejador = rutas[ruta]
+        if metodo != esperado:
+            raise _ErrorHTTP(405, f"{ruta} solo acepta {esperado}.")
+        return await manejador(cuerpo)
+
+    async def _salud(self, cuerpo):
+        return {"estado": "ok", "modelos": self.modelos, "lotes": self.lotificador.estadisticas()}
+
+    async def _puntuar(self, cuerpo):
+        guias = _validar_guias(cuerpo.get("guias"))
+        modelo = cuerpo.get("modelo", "xgb")
+        try:
+            obtener_puntuador(modelo)
+        except ValueError as e:
+            raise SolicitudInvalida(str(e))
+        eficiencias = await self.lotificador.puntuar(guias, modelo)
+        return {"modelo": modelo, "eficiencias": np.asarray(eficiencias, dtype=float).tolist()}
+
+    async def _disenar(self, cuerpo):
+        try:
+            gen_file, target_file = cuerpo["gen_file"], cuerpo["target_file"]
+        except KeyError as e:
+            raise SolicitudInvalida(f"Falta el campo {e}.")
+        modelo = cuerpo.get("modelo", "xgb")
+        alineador = cuerpo.get("alineador", "blast")
+        try:
+            window_size = int(cuerpo.get("window_size", 20))
+            obtener_puntuador(modelo)
+        except ValueError as e:
+            raise SolicitudInvalida(str(e))
+        if alineador not in BACKENDS_ALINEAMIENTO:
+            raise SolicitudInvalida(f"Backend de alineamiento desconocido: {alineador}")
+        try:
+            nucleasas = cuerpo.get("nucleasas")
+            if isinstance(nucleasas, str):
+                nucleasas = [nucleasas]
+            nucleasas = obtener_nucleasas(nucleasas) if nucleasas else None
+        except ValueError as e:
+            raise SolicitudInvalida(str(e))
+
+        loop = asyncio.get_running_loop()
+        puntuador = PuntuadorServidor(self.lotificador, modelo, loop)
+
+        def disenar():
+            if es_multi_target(target_file):
+                return design_sgRNAs_multi(gen_file, target_file, puntuador, window_size, alineador=alineador,
+                                           nucleasas=nucleasas)
+            return design_sgRNAs(gen_file, target_file, puntuador, window_size, alineador=alineador, nucleasas=nucleasas)
+
+        try:
+            df_sgRNA = await loop.run_in_executor(self._executor_diseno, disenar)
+        except (SinAlineacion, FileNotFoundError, ValueError) as e:
+            # Target sin alineaciones, archivos inexistentes o FASTA ilegibles: errores del cliente
+            raise SolicitudInvalida(str(e))
+        return {"modelo": modelo, "guias": json.loads(df_sgRNA.to_json(orient="records"))}
+
+
+class _ConexionUnix(http.client.HTTPConnection):
+    """Conexión HTTP sobre un socket Unix."""
+
+    def __init__(self, ruta, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.ruta = ruta
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.ruta)
+
+
+class ClienteSgRNA:
+    """
+    Cliente local del servicio `sgRNA-serve`.
+
+    Parámetros:
+        url (str): Dirección del servidor TCP, por ejemplo "http://127.0.0.1:8765".
+        socket_unix (str, opcional): Ruta del socket Unix (en lugar de `url`).
+        timeout (float): Tiempo máximo de espera de cada solicitud, en segundos.
+    """
+
+    def __init__(self, url=f"http://{DEFAULT_HOST}:{DEFAULT_PUERTO}", socket_unix=None, timeout=600):
+        self.url = urlsplit(url)
+        self.socket_unix = socket_unix
+        self.timeout = timeout
+
+    def _solicitar(self, metodo, ruta, datos=None):
+        if self.socket_unix:
+            conexion = _ConexionUnix(self.socket_unix, self.timeout)
+        else:
+            conexion = http.client.HTTPConnection(self.url.hostname, self.url.port, timeout=self.timeout)
+        try:
+            cuerpo = None if datos is None else json.dumps(datos).encode("utf-8")
+            conexion.request(metodo, ruta, body=cuerpo, headers={"Content-Type": "application/json"})
+            respuesta = conexion.getresponse()
+            resultado = json.loads(respuesta.read())
+        finally:
+            conexion.close()
+        if respuesta.status != 200:
+            raise RuntimeError(f"Error {respuesta.status} del servidor: {resultado.get('error')}")
+        return resultado
+
+    def salud(self):
+        """Estado del servidor y estadísticas de los micro-lotes."""
+        return self._solicitar("GET", "/salud")
+
+    def puntuar(self, guias, modelo="xgb"):
+        """Eficiencias (en %) de una lista de guías de 20 nt."""
+        return np.array(self._solicitar("POST", "/puntuar", {"guias": list(guias), "modelo": modelo})["eficiencias"])
+
+    def disenar(self, gen_file, target_file, modelo="xgb", window_size=20, alineador="blast", nucleasas=None):
+        """Diseña guías en el servidor y devuelve la tabla como DataFrame (`nucleasas`: nombres o especificaciones)."""
+        import pandas as pd
+        resultado = self._solicitar("POST", "/disenar", {"gen_file": gen_file, "target_file": target_file,
+                                                         "modelo": modelo, "window_size": window_size,
+                                                         "alineador": alineador, "nucleasas": nucleasas})
+        return pd.DataFrame(resultado["guias"])
+
+
+async def _servir(servidor):
+    direccion = await servidor.iniciar()
+    print(f"Servidor de sgRNAs escuchando en {direccion}")
+    detener = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(senal, detener.set)
+        except NotImplementedError:  # Windows
+            pass
+    try:
+        await detener.wait()
+    finally:
+        await servidor.detener()
+        print("Servidor detenido.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servicio local de diseño y puntuación de sgRNAs con los modelos precargados.')
+    parser.add_argument('--host', type=str, default=DEFAULT_HOST, help='Dirección TCP donde escuchar')
+    parser.add_argument('--puerto', type=int, default=DEFAULT_PUERTO, help='Puerto TCP donde escuchar')
+    parser.add_argument('--socket', type=str, default=None, metavar='RUTA', help='Escucha en un socket Unix en lugar de TCP')
+    parser.add_argument('--modelos', type=str, nargs='+', default=['xgb'], help='Modelos que se cargan al iniciar (rf, nn, xgb, combined)')
+    parser.add_argument('--max-lote', type=int, default=DEFAULT_MAX_LOTE, help='Guías máximas por llamada a predict')
+    parser.add_argument('--latencia-ms', type=float, default=DEFAULT_LATENCIA_MS, help='Tiempo máximo que una solicitud espera a que se llene su lote')
+    parser.add_argument('--cache', type=str, default=None, metavar='RUTA', help='Archivo SQLite del caché de puntajes')
+    parser.add_argument('--workers-diseno', type=int, default=DEFAULT_WORKERS_DISENO, help='Diseños que se ejecutan a la vez')
+    args = parser.parse_args()
+
+    servidor = ServidorSgRNA(args.host, args.puerto, args.socket, args.modelos, args.max_lote, args.latencia_ms,
+                             args.cache, args.workers_diseno)
+    asyncio.run(_servir(servidor))
+
+
+if __name__ == "__main__":
+    main()
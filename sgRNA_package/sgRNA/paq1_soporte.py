@@ -1,8 +1,36 @@
-import subprocess
+import math
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import repeat
+from bisect import bisect_left
 from Bio import SeqIO
+import numpy as np
 import pandas as pd
 import re
 from sgRNA.paq1_percent import predecir_eficiencia_nn,complemento_inverso, predecir_eficiencia, predecir_eficiencia_xgb
+from sgRNA.paq1_percent import predecir_eficiencia_batch, predecir_con_cache, precargar_modelos, modelos_requeridos, DEFAULT_BATCH_SIZE
+from sgRNA.paq1_percent import predecir_eficiencia_guia_batch
+from sgRNA.paq1_fasta import cargar_indice_fasta, extraer_rango
+from sgRNA.paq1_genoma import cargar_genoma_empaquetado
+from sgRNA.paq1_nucleasa import EscanerPAM, Nucleasa, nucleasa_por_defecto, regex_iupac
+from sgRNA.paq1_alineamiento import alinear, blast_align, COLUMNAS_ALINEAMIENTO, SinAlineacion
+from sgRNA.paq1_secuencia import gc_lote, validas_lote
+from sgRNA.paq1_perfil import etapa, contar, registrar_lote
+
+# Columnas de la tabla de resultados de los design_sgRNAs_*
+COLUMNAS_SGRNA = ["gRNA", "PAM", "GC_content", "position", "hebra", "Eficiencia"]
+
+# Columnas que se agregan (después de "hebra") cuando se eligen las nucleasas de forma explícita
+COLUMNAS_NUCLEASA = ["nucleasa", "corte"]
+
+# Extensiones reconocidas al leer un directorio de targets
+EXTENSIONES_FASTA = ('.fasta', '.fa', '.fna', '.fas')
+
+# Targets que se puntúan juntos al generar los resultados de forma incremental
+DEFAULT_TARGETS_POR_BLOQUE = 64
 
 def load_file(file_path, file_type="fasta"):
     """Carga secuencias desde un archivo, compatible con formatos FASTA."""
@@ -12,44 +40,6 @@ def load_file(file_path, file_type="fasta"):
     return sequences
 
 
-def blast_align(genome_sequence, target_sequence):
-    """Alinea una secuencia de consulta contra un archivo FASTA usando BLASTn y devuelve un DataFrame."""
-
-    # Ejecutar BLASTn con subprocess
-    command_blast = [
-        "blastn",
-        "-query", genome_sequence,
-        "-subject", target_sequence,
-        "-outfmt", "6 sacc qstart qend"
-    ]
-
-    try:
-        result = subprocess.run(command_blast, check=True, capture_output=True, text=True)
-
-        # Revisar si hay salida vacía (sin alineaciones)
-        output_lines = result.stdout.strip().split("\n")
-        if not output_lines or output_lines[0] == "":
-            print("No se encontraron alineaciones en BLAST.")
-            return None
-
-        # Convertir la salida en un DataFrame
-        df = pd.DataFrame([line.split("\t") for line in output_lines], columns=["sacc", "qstart", "qend"])
-        return df
-
-    except subprocess.CalledProcessError as e:
-        print(f"Error al ejecutar BLAST: {e}")
-        return None
-
-
-        # Convertir a DataFrame
-        df = pd.DataFrame([line.split("\t") for line in output_lines], columns=["sacc", "qstart", "qend"])
-        return df
-
-    except subprocess.CalledProcessError as e:
-        print(f"Error al ejecutar BLAST: {e}")
-        return None
-
-
 def gc_content(sequence_file):
     """
     Evalúa el contenido GC de una secuencia de nucleótidos.
@@ -90,18 +80,40 @@ def gc_content(sequence_file):
 
 
 
-def extract_range_fasta(secuence_file, start, end):
+def extract_range_fasta(secuence_file, start, end, record=None, empaquetado=False):
     """
     Extrae un rango específico de una secuencia en un archivo FASTA sin cargar toda la secuencia en memoria.
 
+    Usa un índice .fai (creado la primera vez y reutilizado después) para leer directamente el
+    rango del registro indicado, sin recorrer el archivo.
+
     Parámetros:
         file_path (str): Ruta al archivo FASTA.
         start (int): Posición inicial del rango (base 1).
         end (int): Posición final del rango (base 1).
+        record (str, opcional): Registro del que se extrae (columna qacc de BLAST). Si no se indica
+            y el archivo tiene un solo registro, se usa ese; con varios registros se recorre el
+            archivo como una única secuencia concatenada.
+        empaquetado (bool): Si es True, el rango se lee de la representación empaquetada del
+            genoma (ver `paq1_genoma`, se construye la primera vez), en mayúsculas y con N en las
+            bases que no son A, C, G ni T.
 
     Retorna:
         str: Fragmento de la secuencia correspondiente al rango [start, end].
     """
+    if empaquetado:
+        genoma = cargar_genoma_empaquetado(secuence_file)
+        if record is None and len(genoma.registros) == 1:
+            record = next(iter(genoma.registros))
+        if record is not None:
+            return genoma.extraer_rango(record, start, end)
+    if record is None:
+        indice = cargar_indice_fasta(secuence_file)
+        if len(indice) == 1:
+            record = next(iter(indice))
+    if record is not None:
+        return extraer_rango(secuence_file, record, start, end)
+
     fragment = ""
     current_position = 0  # Contador de posición actual en la secuencia
 
@@ -131,192 +143,690 @@ def extract_range_fasta(secuence_file, start, end):
     return fragment
 
 
+# Tamaño por defecto de los bloques del escáner de PAM en streaming
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+def _regex_pam(pam):
+    """Expresión regular (con lookahead, para encontrar sitios solapados) de un patrón PAM en código IUPAC."""
+    return re.compile("(?=(" + regex_iupac(pam) + "))")
+
+
 def find_pam_sites(dna_sequence, pam="NGG"):
-    """ Encuentra todos los sitios PAM en la secuencia de ADN. """
-    pam_regex = pam.replace("N", "[ATCG]")
-    matches = [(m.start(), m.group()) for m in re.finditer(pam_regex, dna_sequence)]
-    return matches
+    """ Encuentra todos los sitios PAM en la secuencia de ADN, incluidos los solapados (p. ej. en GGG). """
+    return [(m.start(), m.group(1)) for m in _regex_pam(pam).finditer(dna_sequence)]
+
+
+def _fragmentos(fuente, chunk_size):
+    """Divide una cadena en bloques de `chunk_size`; cualquier otro iterable se recorre tal cual."""
+    if isinstance(fuente, str):
+        for inicio in range(0, len(fuente), chunk_size):
+            yield fuente[inicio:inicio + chunk_size]
+    else:
+        yield from fuente
 
 
+def _sitios_por_bloque(fuente, escaner, chunk_size):
+    """
+    Recorre la secuencia en bloques solapados y genera, por bloque, los sitios de
+    `EscanerPAM.buscar` (con coordenadas globales) que ya no pueden aparecer en el bloque siguiente.
 
+    Entre bloques se conservan las últimas `huella - 1` bases (la huella más larga, guía + PAM,
+    de las nucleasas) y solo se entregan los sitios que empiezan antes de ese tramo; los demás se
+    vuelven a encontrar en el bloque siguiente, así que ningún sitio se pierde ni se repite.
+    """
+    pendiente = ""
+    offset = 0  # Coordenada global del primer carácter del bloque actual
+    for fragmento in _fragmentos(fuente, chunk_size):
+        bloque = pendiente + fragmento
+        corte = max(0, len(bloque) - (escaner.huella - 1))
+        sitios = escaner.buscar(bloque, offset)
+        yield sitios[:bisect_left(sitios, (corte,))]
+        pendiente = bloque[corte:]
+        offset += corte
+    # Sitios más cortos que la huella máxima que quedaron en el último tramo
+    yield escaner.buscar(pendiente, offset)
+
+
+def iter_sitios_nucleasas(fuente, nucleasas, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Escáner de PAM en streaming para una o varias nucleasas (ver `paq1_nucleasa.EscanerPAM`):
+    recorre la secuencia una sola vez, en bloques solapados, y genera de forma perezosa los
+    candidatos de todas las nucleasas en ambas hebras, sin construir el complemento inverso
+    completo. La memoria queda acotada por `chunk_size`.
+
+    Parámetros:
+        fuente (str | Iterable[str]): Secuencia completa o fragmentos consecutivos de ella (por
+            ejemplo, los generados por `paq1_fasta.iter_rango` o por
+            `paq1_genoma.GenomaEmpaquetado.iter_fragmentos`).
+        nucleasas (list[paq1_nucleasa.Nucleasa]): Nucleasas a buscar.
+        chunk_size (int): Tamaño de bloque cuando `fuente` es una cadena.
+
+    Genera:
+        tuple: (nucleasa, hebra, inicio, gRNA, PAM), donde `inicio` es la coordenada (base 0) sobre
+        la hebra directa de la base más a la izquierda de la guía, y gRNA y PAM están escritos
+        5'->3' sobre su propia hebra. Los sitios salen ordenados por el inicio de su huella,
+        luego por hebra ("+" primero) y luego por el orden de `nucleasas`; el orden no depende
+        del tamaño de bloque.
+    """
+    for sitios in _sitios_por_bloque(fuente, EscanerPAM(nucleasas), chunk_size):
+        for sitio in sitios:
+            yield sitio[3:]
 
-def design_sgRNAs_nn(gen_file,target_file, window_size=20):
-    """ Genera candidatos a sgRNA en base a la región del target y sitios PAM. """
 
-    target_ = blast_align(gen_file,target_file)
+def iter_pam_sites(fuente, pam="NGG", window_size=20, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Escáner de PAM en streaming para un único PAM en el extremo 3' de la guía (SpCas9 con NGG):
+    genera de forma perezosa los candidatos de ambas hebras (ver `iter_sitios_nucleasas`).
+
+    La hebra "-" se busca en la hebra directa con el complemento inverso del PAM (CCN para NGG)
+    y solo se invierte cada ventana de `window_size` bases.
+
+    Parámetros:
+        fuente (str | Iterable[str]): Secuencia completa o fragmentos consecutivos de ella.
+        pam (str): Patrón PAM, en código IUPAC (N como comodín).
+        window_size (int): Longitud de la guía.
+        chunk_size (int): Tamaño de bloque cuando `fuente` es una cadena.
+
+    Genera:
+        tuple: (hebra, inicio, gRNA, PAM), como en `iter_sitios_nucleasas`.
+    """
+    escaner = EscanerPAM([Nucleasa(pam, pam, "3", window_size, max(window_size - 3, 0))])
+    for sitios in _sitios_por_bloque(fuente, escaner, chunk_size):
+        for sitio in sitios:
+            yield sitio[4:]
+
+
+def _coordenadas_objetivo(gen_file, target_file, window_size=20, alineador="blast"):
+    """
+    Alinea el target contra el genoma y devuelve (registro, inicio, fin) de su región, en base 1,
+    con un margen de `window_size` bases (el largo de la guía) a cada lado.
+    """
+    with etapa("alineamiento"):
+        target_ = alinear(gen_file, target_file, alineador)
+    if target_ is None or target_.empty:
+        raise SinAlineacion(f"No se encontraron alineaciones para el target {target_file}.")
     qstart = target_.at[0, 'qstart']
     qend = target_.at[0, 'qend']
 
-    qstart = int(qstart) - 20
-    qend = int(qend) + 20
+    qstart = int(qstart) - window_size
+    qend = int(qend) + window_size
+    return target_.at[0, 'qacc'], qstart, qend
 
-    target_region = extract_range_fasta(gen_file,qstart,qend)
-    target_region_rvr_cmpl = complemento_inverso(target_region)
 
-    pam_sites_rvr_cmpl = find_pam_sites(target_region_rvr_cmpl)
+def _region_objetivo(gen_file, target_file, window_size=20, alineador="blast", empaquetado=False):
+    """Alinea el target contra el genoma y extrae la región con un margen de `window_size` bases (el largo de la guía)."""
+    record, qstart, qend = _coordenadas_objetivo(gen_file, target_file, window_size, alineador)
+    with etapa("extraccion"):
+        return extract_range_fasta(gen_file,qstart,qend, record=record, empaquetado=empaquetado)
 
 
-    pam_sites = find_pam_sites(target_region)
-    df_sgRNA = pd.DataFrame(columns=["gRNA", "PAM", "GC_content", "position"])
+def nucleasas_diseno(nucleasas, window_size=20):
+    """Nucleasas de un diseño: las indicadas o, sin ellas, SpCas9 con guías de `window_size` bases."""
+    return list(nucleasas) if nucleasas else [nucleasa_por_defecto(window_size)]
 
-    for site, pam_seq in pam_sites:
-        if site >= window_size:
-            candidate = target_region[site - window_size: site]
-            gc_content_ = gc_content(candidate)
-            eficiencia_ = round(predecir_eficiencia_nn(candidate),2)
-            hebra = "+"
-            #print(candidate)
 
-            if 40 <= gc_content_ <= 80:
-                new_row = pd.DataFrame([{
-                    "gRNA": candidate,
-                    "PAM": pam_seq,
-                    "GC_content": gc_content_,
-                    "position": site - window_size,
-                    "hebra": hebra,
-                    "Eficiencia": eficiencia_
-                }])
-                df_sgRNA = pd.concat([df_sgRNA, new_row], ignore_index=True)
+def _margen_region(nucleasas):
+    """Margen que se agrega a cada lado de la región alineada: la guía más larga de las nucleasas."""
+    return max(nucleasa.largo_guia for nucleasa in nucleasas)
 
 
-    for site, pam_seq in pam_sites_rvr_cmpl:
-        if site >= window_size:
-            candidate = target_region_rvr_cmpl[site - window_size: site]
-            gc_content_ = gc_content(candidate)
-            eficiencia_ = round(predecir_eficiencia_nn(candidate),2)
-            hebra = "-"
-            #print(candidate)
+def _recolectar_candidatos(target_region, window_size=20, chunk_size=DEFAULT_CHUNK_SIZE, nucleasas=None):
+    """
+    Recolecta todos los candidatos a sgRNA de ambas hebras de la región, con una sola pasada del
+    escáner para todas las nucleasas (sin `nucleasas`, SpCas9 con guías de `window_size` bases).
 
-            if 40 <= gc_content_ <= 80:
-                new_row = pd.DataFrame([{
-                    "gRNA": candidate,
-                    "PAM": pam_seq,
-                    "GC_content": gc_content_,
-                    "position": site - window_size,
-                    "hebra": hebra,
-                    "Eficiencia": eficiencia_
-                }])
-                df_sgRNA = pd.concat([df_sgRNA, new_row], ignore_index=True)
-    return df_sgRNA
+    Retorna:
+        list[tuple]: Tuplas (gRNA, PAM, posición, hebra, nucleasa), agrupadas por nucleasa en el
+        orden de `nucleasas`; dentro de cada una, primero la hebra "+" y luego la "-". En la hebra
+        "-" la posición se cuenta sobre el complemento inverso de la región.
+    """
+    nucleasas = nucleasas_diseno(nucleasas, window_size)
+    largo = len(target_region)
+    directas = {id(nucleasa): [] for nucleasa in nucleasas}
+    inversas = {id(nucleasa): [] for nucleasa in nucleasas}
+    with etapa("escaneo_pam"):
+        for nucleasa, hebra, inicio, candidate, pam_seq in iter_sitios_nucleasas(target_region, nucleasas, chunk_size):
+            if hebra == "+":
+                directas[id(nucleasa)].append((candidate, pam_seq, inicio, hebra, nucleasa))
+            else:
+                inversas[id(nucleasa)].append((candidate, pam_seq, largo - inicio - nucleasa.largo_guia, hebra, nucleasa))
+        candidatos = []
+        for nucleasa in nucleasas:
+            inversa = inversas[id(nucleasa)]
+            inversa.reverse()  # Orden creciente sobre el complemento inverso
+            candidatos += directas[id(nucleasa)] + inversa
+    contar("sitios_pam_directa", sum(len(directa) for directa in directas.values()))
+    contar("sitios_pam_inversa", sum(len(inversa) for inversa in inversas.values()))
+    return candidatos
+
+
+def _nuevo_acumulador():
+    """Crea un almacén columnar vacío (una lista por columna) para los candidatos aceptados."""
+    return {columna: [] for columna in COLUMNAS_SGRNA}
+
+
+def _acumulador_a_dataframe(acumulador):
+    """Construye el DataFrame final de una sola vez a partir del almacén columnar."""
+    return pd.DataFrame(acumulador, columns=COLUMNAS_SGRNA)
+
+
+def _filtrar_gc(candidatos):
+    """
+    Calcula el contenido GC de todos los candidatos a la vez y selecciona los que están entre 40% y 80%.
+    Las guías con bases que no son A, C, G ni T (N, códigos IUPAC) se descartan: los modelos no
+    pueden codificarlas, y la biblioteca (ver `paq1_biblioteca`) tampoco las guarda.
 
+    Retorna:
+        tuple[np.ndarray, np.ndarray]: %GC de cada candidato e índices de los aceptados.
+    """
+    with etapa("filtro_gc"):
+        largos = {len(c[0]) for c in candidatos}
+        if len(largos) <= 1:
+            guias = [c[0] for c in candidatos]
+            gc, validas = gc_lote(guias), validas_lote(guias)
+        else:
+            # Nucleasas con guías de distinto largo: el %GC se calcula por grupos de igual largo
+            gc = np.zeros(len(candidatos))
+            validas = np.zeros(len(candidatos), dtype=bool)
+            for largo in largos:
+                indices = [i for i, c in enumerate(candidatos) if len(c[0]) == largo]
+                guias = [candidatos[i][0] for i in indices]
+                gc[indices], validas[indices] = gc_lote(guias), validas_lote(guias)
+        aceptados = np.flatnonzero((gc >= 40) & (gc <= 80) & validas)
+    contar("guias_aceptadas", len(aceptados))
+    return gc, aceptados
+
+
+def _prefiltrar(candidatos, aceptados, umbral):
+    """
+    Descarta de `aceptados` las guías con puntaje heurístico (ver `predecir_eficiencia_guia_batch`)
+    menor que `umbral`, para no enviarlas al modelo. Las guías de nucleasas que el modelo no
+    puntúa (ver `Nucleasa.puntuable`) se conservan.
 
+    Retorna:
+        np.ndarray: Índices de los candidatos que siguen aceptados.
+    """
+    with etapa("prefiltro"):
+        puntuables = _puntuables(candidatos, aceptados)
+        puntajes = predecir_eficiencia_guia_batch([candidatos[i][0] for i in aceptados[puntuables]])
+        conservar = ~puntuables
+        conservar[puntuables] = puntajes >= umbral
+        conservados = aceptados[conservar]
+    contar("guias_prefiltradas", len(aceptados) - len(conservados))
+    return conservados
 
-def design_sgRNAs_xgb(gen_file,target_file, window_size=20):
-    """ Genera candidatos a sgRNA en base a la región del target y sitios PAM. """
 
-    target_ = blast_align(gen_file,target_file)
-    qstart = target_.at[0, 'qstart']
-    qend = target_.at[0, 'qend']
+def _puntuables(candidatos, aceptados):
+    """Máscara de los candidatos aceptados cuya nucleasa puntúan los modelos de eficiencia."""
+    return np.fromiter((candidatos[i][4].puntuable for i in aceptados), dtype=bool, count=len(aceptados))
 
-    qstart = int(qstart) - 20
-    qend = int(qend) + 20
 
-    target_region = extract_range_fasta(gen_file,qstart,qend)
-    target_region_rvr_cmpl = complemento_inverso(target_region)
+def _construir_tabla(candidatos, gc, aceptados, eficiencias, con_nucleasa=False):
+    """
+    Arma la tabla de resultados con los candidatos aceptados y sus eficiencias (alineadas con
+    `aceptados`). Con `con_nucleasa`, agrega el nombre de la nucleasa y el sitio de corte
+    (posición, sobre la misma hebra que "position", de la primera base después del corte).
+    """
+    acumulador = _nuevo_acumulador()
+    acumulador["gRNA"].extend(candidatos[i][0] for i in aceptados)
+    acumulador["PAM"].extend(candidatos[i][1] for i in aceptados)
+    acumulador["GC_content"].extend(gc[aceptados])
+    acumulador["position"].extend(candidatos[i][2] for i in aceptados)
+    acumulador["hebra"].extend(candidatos[i][3] for i in aceptados)
+    acumulador["Eficiencia"].extend(np.round(np.asarray(eficiencias), 2))
+    if not con_nucleasa:
+        return _acumulador_a_dataframe(acumulador)
+    acumulador["nucleasa"] = [candidatos[i][4].nombre for i in aceptados]
+    acumulador["corte"] = [candidatos[i][2] + candidatos[i][4].corte for i in aceptados]
+    return pd.DataFrame(acumulador, columns=_columnas_tabla(True))
 
-    pam_sites_rvr_cmpl = find_pam_sites(target_region_rvr_cmpl)
 
+def _columnas_tabla(con_nucleasa=False):
+    """Columnas de la tabla de resultados, con las de la nucleasa después de "hebra" si se piden."""
+    if not con_nucleasa:
+        return COLUMNAS_SGRNA
+    posicion = COLUMNAS_SGRNA.index("hebra") + 1
+    return COLUMNAS_SGRNA[:posicion] + COLUMNAS_NUCLEASA + COLUMNAS_SGRNA[posicion:]
 
-    pam_sites = find_pam_sites(target_region)
-    df_sgRNA = pd.DataFrame(columns=["gRNA", "PAM", "GC_content", "position"])
 
-    for site, pam_seq in pam_sites:
-        if site >= window_size:
-            candidate = target_region[site - window_size: site]
-            gc_content_ = gc_content(candidate)
-            eficiencia_ = round(predecir_eficiencia_xgb(candidate),2)
-            hebra = "+"
-            #print(candidate)
+def _inicializar_worker(modelo):
+    """Carga el modelo una sola vez en cada proceso del pool."""
+    precargar_modelos(modelos_requeridos(modelo))
 
-            if 40 <= gc_content_ <= 80:
-                new_row = pd.DataFrame([{
-                    "gRNA": candidate,
-                    "PAM": pam_seq,
-                    "GC_content": gc_content_,
-                    "position": site - window_size,
-                    "hebra": hebra,
-                    "Eficiencia": eficiencia_
-                }])
-                df_sgRNA = pd.concat([df_sgRNA, new_row], ignore_index=True)
 
+def _puntuar_bloque(secuencias, modelo, batch_size):
+    """ Puntúa un bloque contiguo de guías (se ejecuta en un proceso del pool). """
+    return predecir_eficiencia_batch(secuencias, modelo, batch_size)
 
-    for site, pam_seq in pam_sites_rvr_cmpl:
-        if site >= window_size:
-            candidate = target_region_rvr_cmpl[site - window_size: site]
-            gc_content_ = gc_content(candidate)
-            eficiencia_ = round(predecir_eficiencia_xgb(candidate),2)
-            hebra = "-"
-            #print(candidate)
 
-            if 40 <= gc_content_ <= 80:
-                new_row = pd.DataFrame([{
-                    "gRNA": candidate,
-                    "PAM": pam_seq,
-                    "GC_content": gc_content_,
-                    "position": site - window_size,
-                    "hebra": hebra,
-                    "Eficiencia": eficiencia_
-                }])
-                df_sgRNA = pd.concat([df_sgRNA, new_row], ignore_index=True)
-    return df_sgRNA
+@contextmanager
+def pool_puntuacion(modelo, workers=1):
+    """
+    Pool de `workers` procesos con el modelo ya cargado en cada uno, para compartirlo entre todas
+    las llamadas de una ejecución (ver `puntuar_guias`); entrega None con `workers` = 1. El pool se
+    cierra al salir del bloque `with`.
+    """
+    if workers < 1:
+        raise ValueError("workers debe ser un entero positivo.")
+    if workers == 1:
+        yield None
+        return
+    # "spawn" evita heredar por fork el estado de TensorFlow/XGBoost del proceso principal
+    contexto = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=contexto,
+                             initializer=_inicializar_worker, initargs=(modelo,)) as pool:
+        yield pool
+
+
+def puntuar_guias(secuencias, modelo, batch_size=DEFAULT_BATCH_SIZE, workers=1, pool=None):
+    """
+    Puntúa una lista de guías. Con `workers` = 1 se hace en un solo lote en este proceso; con más
+    workers la lista se divide en bloques contiguos que se reparten en un pool de procesos y se
+    vuelven a unir en su orden original, así que el resultado es idéntico al de la ejecución en serie.
+    Se usa el `pool` de la ejecución (ver `pool_puntuacion`) si se da; si no, uno solo para esta llamada.
+    """
+    if workers < 1:
+        raise ValueError("workers debe ser un entero positivo.")
+    if workers == 1 or not secuencias:
+        return predecir_eficiencia_batch(secuencias, modelo, batch_size)
+    if pool is None:
+        with pool_puntuacion(modelo, workers) as pool:
+            return puntuar_guias(secuencias, modelo, batch_size, workers, pool)
+
+    # Bloques lo bastante pequeños para ocupar a todos los workers, sin superar batch_size
+    tamano_bloque = max(1, min(batch_size, math.ceil(len(secuencias) / workers)))
+    bloques = [secuencias[inicio:inicio + tamano_bloque] for inicio in range(0, len(secuencias), tamano_bloque)]
+    for bloque in bloques:
+        for nombre in modelos_requeridos(modelo):
+            registrar_lote(nombre, len(bloque))
+    return np.concatenate(list(pool.map(_puntuar_bloque, bloques, repeat(modelo), repeat(batch_size))))
+
+
+def _disenar_grupos(grupos, modelo, batch_size=DEFAULT_BATCH_SIZE, workers=1, cache=None, prefiltro=None,
+                    con_nucleasa=False, precalculados=None, pool=None):
+    """
+    Motor de diseño común a todos los modelos: filtra por contenido GC, puntúa y arma las tablas
+    de varios grupos de candidatos (uno por target o región).
 
+    El filtro GC (y el prefiltro heurístico, si se pide) se aplica antes de puntuar, así que el
+    modelo solo recibe las guías que pueden llegar a la tabla. Las guías aceptadas de todos los
+    grupos se puntúan juntas (en serie o en paralelo, ver `puntuar_guias`); si se da un `cache`, solo
+    las que no estén en él llegan al modelo. Las guías de nucleasas que los modelos no puntúan
+    (ver `Nucleasa.puntuable`) quedan con eficiencia NaN.
 
+    Parámetros:
+        grupos (list[list[tuple]]): Candidatos de cada grupo (ver `_recolectar_candidatos`).
+        modelo (str | paq1_percent.Puntuador): Nombre del modelo o puntuador a utilizar.
+        prefiltro (float, opcional): Puntaje heurístico mínimo para que una guía llegue al modelo.
+        con_nucleasa (bool): Agrega a las tablas las columnas de `COLUMNAS_NUCLEASA`.
+        precalculados (list[tuple[np.ndarray, np.ndarray]], opcional): %GC y eficiencia de cada
+            candidato de cada grupo, ya calculados (ver `paq1_biblioteca.BibliotecaGuias.candidatos`);
+            con ellos no se calcula el GC ni se llama al modelo.
+        pool (concurrent.futures.ProcessPoolExecutor, opcional): Pool de la ejecución (ver `pool_puntuacion`).
 
-def design_sgRNAs_rf(gen_file,target_file, window_size=20):
-    """ Genera candidatos a sgRNA en base a la región del target y sitios PAM. """
+    Retorna:
+        list[pd.DataFrame]: Una tabla por grupo, en el mismo orden que `grupos`.
+    """
+    contar("candidatos", sum(len(candidatos) for candidatos in grupos))
+    if precalculados is not None:
+        return _disenar_precalculados(grupos, precalculados, prefiltro, con_nucleasa)
+    filtrados = [_filtrar_gc(candidatos) for candidatos in grupos]
+    if prefiltro is not None:
+        filtrados = [(gc, _prefiltrar(candidatos, aceptados, prefiltro))
+                     for candidatos, (gc, aceptados) in zip(grupos, filtrados)]
+    aceptadas = [candidatos[i][0] for candidatos, (_, aceptados) in zip(grupos, filtrados) for i in aceptados]
+    puntuables = np.concatenate([_puntuables(candidatos, aceptados) for candidatos, (_, aceptados)
+                                 in zip(grupos, filtrados)] or [np.zeros(0, dtype=bool)])
+    if not puntuables.all():
+        aceptadas = [guia for guia, puntuable in zip(aceptadas, puntuables) if puntuable]
+
+    with etapa("puntuacion"):
+        if cache is None:
+            eficiencias = puntuar_guias(aceptadas, modelo, batch_size, workers, pool)
+        else:
+            eficiencias = predecir_con_cache(aceptadas, modelo, cache, lambda pendientes: puntuar_guias(
+                pendientes, modelo, batch_size, workers, pool))
+    if not puntuables.all():
+        eficiencias = np.asarray(eficiencias)
+        completas = np.full(len(puntuables), np.nan, dtype=np.result_type(eficiencias.dtype, np.float32))
+        completas[puntuables] = eficiencias
+        eficiencias = completas
+
+    tablas = []
+    inicio = 0
+    for candidatos, (gc, aceptados) in zip(grupos, filtrados):
+        tablas.append(_construir_tabla(candidatos, gc, aceptados, eficiencias[inicio:inicio + len(aceptados)],
+                                       con_nucleasa))
+        inicio += len(aceptados)
+    return tablas
+
+
+def _disenar_precalculados(grupos, precalculados, prefiltro=None, con_nucleasa=False):
+    """Como `_disenar_grupos`, con el %GC y la eficiencia de cada candidato ya calculados."""
+    tablas = []
+    for candidatos, (gc, eficiencias) in zip(grupos, precalculados):
+        with etapa("filtro_gc"):
+            aceptados = np.flatnonzero((gc >= 40) & (gc <= 80))
+        contar("guias_aceptadas", len(aceptados))
+        if prefiltro is not None:
+            aceptados = _prefiltrar(candidatos, aceptados, prefiltro)
+        tablas.append(_construir_tabla(candidatos, gc, aceptados, eficiencias[aceptados], con_nucleasa))
+    return tablas
+
+
+def _disenar_region(target_region, modelo, window_size=20, batch_size=DEFAULT_BATCH_SIZE, workers=1, cache=None,
+                    prefiltro=None, nucleasas=None):
+    """ Filtra por contenido GC y puntúa los candidatos de la región. """
+    candidatos = _recolectar_candidatos(target_region, window_size, nucleasas=nucleasas)
+    return _disenar_grupos([candidatos], modelo, batch_size, workers, cache, prefiltro, bool(nucleasas))[0]
+
+
+def design_sgRNAs(gen_file, target_file, modelo="rf", window_size=20, batch_size=DEFAULT_BATCH_SIZE, workers=1, cache=None,
+                  alineador="blast", prefiltro=None, empaquetado=False, nucleasas=None, biblioteca=None):
+    """
+    Genera candidatos a sgRNA en base a la región del target y sitios PAM, con cualquier modelo.
+
+    Parámetros:
+        gen_file (str): Archivo FASTA del genoma de referencia.
+        target_file (str): Archivo FASTA del target.
+        modelo (str | paq1_percent.Puntuador): "rf", "nn", "xgb", "combined" (promedio de XGBoost y
+            la red neuronal), "heuristic" (reglas de `predecir_eficiencia_guia`) o un objeto puntuador.
+        window_size (int): Longitud de la guía.
+        batch_size (int): Número máximo de guías por llamada a predict.
+        workers (int): Número de procesos para puntuar en paralelo (1 = en serie).
+        cache (paq1_cache.CacheEficiencias, opcional): Caché de puntajes entre ejecuciones.
+        alineador (str): Backend de alineamiento: "blast", "blastdb" o "exacto".
+        prefiltro (float, opcional): Puntaje heurístico mínimo (ver `predecir_eficiencia_guia`);
+            las guías por debajo se descartan antes de llegar al modelo.
+        empaquetado (bool): Extrae la región de la representación empaquetada (2 bits por base)
+            del genoma en lugar del FASTA (ver `extract_range_fasta`).
+        nucleasas (list[paq1_nucleasa.Nucleasa], opcional): Nucleasas cuyos sitios se buscan, todas
+            en una sola pasada. Sin ellas se usa SpCas9 (NGG) con guías de `window_size` bases.
+        biblioteca (paq1_biblioteca.BibliotecaGuias, opcional): Biblioteca precalculada del genoma
+            con el mismo modelo y nucleasas; el target se sigue alineando, pero los candidatos y sus
+            puntajes se leen de la biblioteca en lugar de extraer, escanear y puntuar la región.
+            El resultado es el mismo que con `empaquetado`.
+
+    Retorna:
+        pd.DataFrame: Guías con GC entre 40% y 80%, con columnas gRNA, PAM, GC_content, position,
+        hebra y Eficiencia; con `nucleasas`, además "nucleasa" y "corte" (ver `_construir_tabla`).
+        Las guías que los modelos no puntúan (ver `Nucleasa.puntuable`) quedan con eficiencia NaN.
+    """
+    margen = _margen_region(nucleasas_diseno(nucleasas, window_size))
+    if biblioteca is not None:
+        biblioteca.verificar(gen_file, modelo, nucleasas, window_size)
+        record, qstart, qend = _coordenadas_objetivo(gen_file, target_file, margen, alineador)
+        return _disenar_biblioteca(biblioteca, record, qstart, qend, prefiltro, bool(nucleasas))
+    target_region = _region_objetivo(gen_file, target_file, margen, alineador, empaquetado)
+    return _disenar_region(target_region, modelo, window_size, batch_size, workers, cache, prefiltro, nucleasas)
+
+
+def _disenar_biblioteca(biblioteca, record, start, end, prefiltro=None, con_nucleasa=False):
+    """ Diseña la región [start, end] (base 1) del registro con los candidatos y puntajes de la biblioteca. """
+    candidatos, gc, eficiencias = biblioteca.candidatos(record, start, end, solo_aceptados=True)
+    return _disenar_grupos([candidatos], None, prefiltro=prefiltro, con_nucleasa=con_nucleasa,
+                           precalculados=[(gc, eficiencias)])[0]
+
+
+def design_sgRNAs_rango(biblioteca, record, start, end, prefiltro=None):
+    """
+    Diseña sgRNAs para una región del genoma dada por coordenadas, solo con una consulta por
+    rango a la biblioteca precalculada: sin alineamiento, escaneo de PAM ni modelo.
+
+    Parámetros:
+        biblioteca (paq1_biblioteca.BibliotecaGuias): Biblioteca del genoma.
+        record (str): Registro (cromosoma) del genoma.
+        start (int), end (int): Región en base 1, inclusiva; las guías deben caber completas en ella.
+        prefiltro (float, opcional): Puntaje heurístico mínimo (ver `design_sgRNAs`).
+
+    Retorna:
+        pd.DataFrame: La tabla de `design_sgRNAs` para la región, con las columnas de la nucleasa
+        si la biblioteca se construyó con nucleasas explícitas.
+    """
+    return _disenar_biblioteca(biblioteca, record, start, end, prefiltro, biblioteca.meta["con_nucleasa"])
+
+
+def design_sgRNAs_nn(gen_file,target_file, window_size=20, batch_size=DEFAULT_BATCH_SIZE, workers=1, cache=None, alineador="blast"):
+    """ Genera candidatos a sgRNA puntuados con la red neuronal (ver `design_sgRNAs`). """
+    return design_sgRNAs(gen_file, target_file, "nn", window_size, batch_size, workers, cache, alineador)
+
+
+def design_sgRNAs_xgb(gen_file,target_file, window_size=20, batch_size=DEFAULT_BATCH_SIZE, workers=1, cache=None, alineador="blast"):
+    """ Genera candidatos a sgRNA puntuados con XGBoost (ver `design_sgRNAs`). """
+    return design_sgRNAs(gen_file, target_file, "xgb", window_size, batch_size, workers, cache, alineador)
+
+
+def design_sgRNAs_rf(gen_file,target_file, window_size=20, batch_size=DEFAULT_BATCH_SIZE, workers=1, cache=None, alineador="blast"):
+    """ Genera candidatos a sgRNA puntuados con Random Forest (ver `design_sgRNAs`). """
+    return design_sgRNAs(gen_file, target_file, "rf", window_size, batch_size, workers, cache, alineador)
+
+
+def contar_registros_fasta(file_path):
+    """Cuenta los registros (líneas de cabecera '>') de un archivo FASTA."""
+    with open(file_path) as file:
+        return sum(1 for line in file if line.startswith('>'))
 
-    target_ = blast_align(gen_file,target_file)
-    qstart = target_.at[0, 'qstart']
-    qend = target_.at[0, 'qend']
 
-    qstart = int(qstart) - 20
-    qend = int(qend) + 20
-
-    target_region = extract_range_fasta(gen_file,qstart,qend)
-    target_region_rvr_cmpl = complemento_inverso(target_region)
-
-    pam_sites_rvr_cmpl = find_pam_sites(target_region_rvr_cmpl)
-
-
-    pam_sites = find_pam_sites(target_region)
-    df_sgRNA = pd.DataFrame(columns=["gRNA", "PAM", "GC_content", "position"])
-
-    for site, pam_seq in pam_sites:
-        if site >= window_size:
-            candidate = target_region[site - window_size: site]
-            gc_content_ = gc_content(candidate)
-            eficiencia_ = round(predecir_eficiencia(candidate),2)
-            hebra = "+"
-            #print(candidate)
-
-            if 40 <= gc_content_ <= 80:
-                new_row = pd.DataFrame([{
-                    "gRNA": candidate,
-                    "PAM": pam_seq,
-                    "GC_content": gc_content_,
-                    "position": site - window_size,
-                    "hebra": hebra,
-                    "Eficiencia": eficiencia_
-                }])
-                df_sgRNA = pd.concat([df_sgRNA, new_row], ignore_index=True)
-
-
-    for site, pam_seq in pam_sites_rvr_cmpl:
-        if site >= window_size:
-            candidate = target_region_rvr_cmpl[site - window_size: site]
-            gc_content_ = gc_content(candidate)
-            eficiencia_ = round(predecir_eficiencia(candidate),2)
-            hebra = "-"
-            #print(candidate)
-
-            if 40 <= gc_content_ <= 80:
-                new_row = pd.DataFrame([{
-                    "gRNA": candidate,
-                    "PAM": pam_seq,
-                    "GC_content": gc_content_,
-                    "position": site - window_size,
-                    "hebra": hebra,
-                    "Eficiencia": eficiencia_
-                }])
-                df_sgRNA = pd.concat([df_sgRNA, new_row], ignore_index=True)
-    return df_sgRNA
+def es_multi_target(target_path):
+    """Indica si `target_path` es un directorio de FASTA o un FASTA con varios registros."""
+    return os.path.isdir(target_path) or contar_registros_fasta(target_path) > 1
+
+
+def _archivos_target(target_path):
+    """Devuelve la lista ordenada de archivos FASTA de un directorio, o el propio archivo."""
+    if not os.path.isdir(target_path):
+        return [target_path]
+    archivos = sorted(
+        os.path.join(target_path, nombre) for nombre in os.listdir(target_path)
+        if nombre.lower().endswith(EXTENSIONES_FASTA)
+    )
+    if not archivos:
+        raise ValueError(f"No se encontraron archivos FASTA en el directorio {target_path}")
+    return archivos
+
+
+def leer_targets(target_path):
+    """
+    Lee los targets de un FASTA o de un directorio de archivos FASTA.
+
+    Retorna:
+        list[tuple[str, str]]: Pares (identificador, secuencia), en el orden de entrada.
+    """
+    targets = []
+    vistos = set()
+    for archivo in _archivos_target(target_path):
+        for record in SeqIO.parse(archivo, "fasta"):
+            if record.id in vistos:
+                raise ValueError(f"Identificador de target duplicado: {record.id}")
+            vistos.add(record.id)
+            targets.append((record.id, str(record.seq)))
+    return targets
+
+
+def _escribir_targets(targets, destino):
+    """ Escribe todos los targets en un único FASTA para alinearlos con una sola llamada a BLAST. """
+    with open(destino, "w") as salida:
+        for identificador, secuencia in targets:
+            salida.write(f">{identificador}\n{secuencia}\n")
+
+
+def design_sgRNAs_multi(gen_file, target_path, modelo="rf", window_size=20, batch_size=DEFAULT_BATCH_SIZE, workers=1, cache=None,
+                        alineador="blast", prefiltro=None, empaquetado=False, nucleasas=None, biblioteca=None):
+    """
+    Diseña sgRNAs para varios targets con una sola alineación y un único índice del genoma.
+
+    Parámetros:
+        gen_file (str): Archivo FASTA del genoma de referencia.
+        target_path (str): FASTA con uno o varios registros, o directorio de archivos FASTA.
+        modelo (str | paq1_percent.Puntuador): Modelo de eficiencia: "rf", "nn", "xgb", "combined" o un puntuador.
+        window_size (int): Longitud de la guía.
+        batch_size (int): Número máximo de guías por llamada a predict.
+        workers (int): Número de procesos para puntuar en paralelo (1 = en serie).
+        cache (paq1_cache.CacheEficiencias, opcional): Caché de puntajes entre ejecuciones.
+        alineador (str): Backend de alineamiento: "blast", "blastdb" o "exacto".
+        prefiltro (float, opcional): Puntaje heurístico mínimo para que una guía llegue al modelo.
+        empaquetado (bool): Extrae las regiones de la representación empaquetada del genoma.
+        nucleasas (list[paq1_nucleasa.Nucleasa], opcional): Nucleasas cuyos sitios se buscan (ver `design_sgRNAs`).
+        biblioteca (paq1_biblioteca.BibliotecaGuias, opcional): Biblioteca precalculada del genoma (ver `design_sgRNAs`).
+
+    Retorna:
+        pd.DataFrame: Guías de todos los targets, con una columna "target" con su identificador.
+    """
+    tablas = iter_design_sgRNAs_multi(gen_file, target_path, modelo, window_size, batch_size, workers, cache,
+                                      alineador, prefiltro, targets_por_bloque=None, empaquetado=empaquetado,
+                                      nucleasas=nucleasas, biblioteca=biblioteca)
+    return pd.concat(list(tablas), ignore_index=True)
+
+
+def tabla_vacia_multi(con_nucleasa=False):
+    """ Tabla sin guías con las columnas de `design_sgRNAs_multi` (con las de la nucleasa si se piden). """
+    return pd.DataFrame(columns=["target"] + _columnas_tabla(con_nucleasa))
+
+
+def iter_design_sgRNAs_multi(gen_file, target_path, modelo="rf", window_size=20, batch_size=DEFAULT_BATCH_SIZE, workers=1,
+                             cache=None, alineador="blast", prefiltro=None, targets_por_bloque=DEFAULT_TARGETS_POR_BLOQUE,
+                             empaquetado=False, nucleasas=None, biblioteca=None):
+    """
+    Versión incremental de `design_sgRNAs_multi`: entrega la tabla de cada target (con la columna
+    "target") a medida que se termina, para escribir los resultados sin reunirlos en memoria.
+
+    Los targets se extraen y puntúan por bloques de `targets_por_bloque` (todos juntos con None):
+    bloques más grandes aprovechan mejor los lotes del modelo y el pool de workers, y bloques
+    más chicos acotan la memoria. Si ningún target tiene alineaciones se entrega una única tabla
+    vacía, para que quien consuma los bloques conozca las columnas. El resto de los parámetros son
+    los de `design_sgRNAs_multi`.
+    """
+    entregados = 0
+    for identificador, tabla in iter_disenos_targets(gen_file, leer_targets(target_path), modelo, window_size, batch_size,
+                                                     workers, cache, alineador, prefiltro, targets_por_bloque,
+                                                     empaquetado, nucleasas, biblioteca):
+        if tabla is None:
+            print(f"No se encontraron alineaciones para el target {identificador}.")
+            continue
+        entregados += 1
+        yield tabla
+    if entregados == 0:
+        yield tabla_vacia_multi(bool(nucleasas))
+
+
+def iter_disenos_targets(gen_file, targets, modelo="rf", window_size=20, batch_size=DEFAULT_BATCH_SIZE, workers=1,
+                         cache=None, alineador="blast", prefiltro=None, targets_por_bloque=DEFAULT_TARGETS_POR_BLOQUE,
+                         empaquetado=False, nucleasas=None, biblioteca=None):
+    """
+    Motor de `iter_design_sgRNAs_multi` a partir de una lista de targets ya leída (ver `leer_targets`).
+
+    Entrega un par (identificador, tabla) por target, en el orden de `targets`; la tabla es None
+    si el target no tiene alineaciones (o si el alineador falló), para que quien consuma los
+    resultados pueda distinguir esos targets de los que no tienen guías. Con `biblioteca`, los
+    candidatos y sus puntajes se leen de ella (ver `design_sgRNAs`).
+
+    Con `workers` > 1 se abre un único pool de procesos para toda la ejecución. Sin `cache` ni
+    `biblioteca`, cada worker diseña completo un tramo contiguo de los targets del bloque
+    (extracción, escaneo de PAM y puntuación); con ellos, la extracción y el escaneo se hacen en
+    este proceso y el pool solo puntúa. Las etapas que corren en los workers no se miden en el perfil.
+    """
+    if biblioteca is not None:
+        biblioteca.verificar(gen_file, modelo, nucleasas, window_size)
+    with tempfile.TemporaryDirectory() as directorio:
+        targets_fasta = os.path.join(directorio, "targets.fasta")
+        _escribir_targets(targets, targets_fasta)
+        with etapa("alineamiento"):
+            alineaciones = alinear(gen_file, targets_fasta, alineador)
+    contar("targets", len(targets))
+
+    if alineaciones is None:
+        alineaciones = pd.DataFrame(columns=COLUMNAS_ALINEAMIENTO)
+    # Para cada target se usa su primera alineación, igual que en el modo de un solo target
+    primeras = alineaciones.drop_duplicates("sacc").set_index("sacc")
+    con_nucleasa = bool(nucleasas)
+    nucleasas = nucleasas_diseno(nucleasas, window_size)
+    margen = _margen_region(nucleasas)
+    en_workers = workers > 1 and cache is None and biblioteca is None
+    if en_workers and not primeras.empty:
+        # El índice (o el genoma empaquetado) se prepara antes, para que los workers no lo construyan a la vez
+        if empaquetado:
+            cargar_genoma_empaquetado(gen_file)
+        else:
+            cargar_indice_fasta(gen_file)
+
+    with pool_puntuacion(modelo, workers) as pool:
+        def disenar(bloque):
+            if en_workers:
+                return _disenar_targets_workers(bloque, pool, workers, gen_file, modelo, batch_size, prefiltro,
+                                                empaquetado, nucleasas, con_nucleasa)
+            return _disenar_targets(bloque, modelo, batch_size, workers, cache, prefiltro, con_nucleasa, pool)
+
+        bloque = []
+        alineados = 0
+        for identificador, _ in targets:
+            if identificador not in primeras.index:
+                bloque.append((identificador, None, None))
+                continue
+            registro = primeras.at[identificador, "qacc"]
+            qstart = int(primeras.at[identificador, "qstart"]) - margen
+            qend = int(primeras.at[identificador, "qend"]) + margen
+            if biblioteca is not None:
+                candidatos, gc, eficiencias = biblioteca.candidatos(registro, qstart, qend, solo_aceptados=True)
+                bloque.append((identificador, candidatos, (gc, eficiencias)))
+            elif en_workers:
+                # La región se extrae y se escanea en el worker
+                bloque.append((identificador, (registro, qstart, qend), None))
+            else:
+                with etapa("extraccion"):
+                    target_region = extract_range_fasta(gen_file, qstart, qend, record=registro, empaquetado=empaquetado)
+                bloque.append((identificador, _recolectar_candidatos(target_region, nucleasas=nucleasas), None))
+            alineados += 1
+            if targets_por_bloque is not None and alineados >= targets_por_bloque:
+                yield from disenar(bloque)
+                bloque = []
+                alineados = 0
+        yield from disenar(bloque)
+
+
+def _disenar_targets(bloque, modelo, batch_size, workers, cache, prefiltro, con_nucleasa=False, pool=None):
+    """
+    Puntúa juntos los candidatos de un bloque de targets y devuelve los pares (identificador, tabla),
+    con None en los targets sin alineaciones.
+    """
+    alineados = [(identificador, candidatos, precalculado) for identificador, candidatos, precalculado in bloque
+                 if candidatos is not None]
+    tablas = {}
+    if alineados:
+        precalculados = None
+        if all(precalculado is not None for _, _, precalculado in alineados):
+            precalculados = [precalculado for _, _, precalculado in alineados]
+        grupos = _disenar_grupos([candidatos for _, candidatos, _ in alineados], modelo, batch_size, workers, cache, prefiltro,
+                                 con_nucleasa, precalculados, pool)
+        for (identificador, _, _), tabla in zip(alineados, grupos):
+            tabla.insert(0, "target", identificador)
+            tablas[identificador] = tabla
+    return [(identificador, tablas.get(identificador)) for identificador, _, _ in bloque]
+
+
+def _disenar_regiones(gen_file, regiones, modelo, batch_size, prefiltro, empaquetado, nucleasas, con_nucleasa):
+    """ Extrae, escanea y puntúa las regiones (registro, inicio, fin) de varios targets (se ejecuta en un proceso del pool). """
+    grupos = [_recolectar_candidatos(extract_range_fasta(gen_file, inicio, fin, record=registro, empaquetado=empaquetado),
+                                     nucleasas=nucleasas)
+              for registro, inicio, fin in regiones]
+    return _disenar_grupos(grupos, modelo, batch_size, prefiltro=prefiltro, con_nucleasa=con_nucleasa)
+
+
+def _disenar_targets_workers(bloque, pool, workers, gen_file, modelo, batch_size, prefiltro, empaquetado, nucleasas,
+                             con_nucleasa=False):
+    """
+    Como `_disenar_targets`, con las regiones (registro, inicio, fin) de los targets en lugar de
+    sus candidatos: cada worker del pool diseña completo un tramo contiguo de ellas.
+    """
+    alineados = [(identificador, region) for identificador, region, _ in bloque if region is not None]
+    tablas = {}
+    if alineados:
+        tamano = math.ceil(len(alineados) / workers)
+        tramos = [alineados[inicio:inicio + tamano] for inicio in range(0, len(alineados), tamano)]
+        resultados = pool.map(_disenar_regiones, repeat(gen_file), [[region for _, region in tramo] for tramo in tramos],
+                              repeat(modelo), repeat(batch_size), repeat(prefiltro), repeat(empaquetado),
+                              repeat(nucleasas), repeat(con_nucleasa))
+        for tramo, grupos in zip(tramos, resultados):
+            for (identificador, _), tabla in zip(tramo, grupos):
+                tabla.insert(0, "target", identificador)
+                tablas[identificador] = tabla
+    return [(identificador, tablas.get(identificador)) for identificador, _, _ in bloque]
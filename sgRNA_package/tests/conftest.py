@@ -0,0 +1,53 @@
+"""
+Datos y modelos sintéticos compartidos por las pruebas: guías aleatorias y ensambles pequeños
+entrenados al vuelo, para no depender de los modelos entrenados del paquete.
+"""
+import numpy as np
+import pytest
+
+from sgRNA.paq1_inferencia import RedDensaNumpy
+from sgRNA.paq1_secuencia import BASES, one_hot_encode_batch
+
+
+def guias_aleatorias(rng, n, largo=20):
+    """Lista de `n` guías aleatorias de `largo` bases, más algunos casos de borde."""
+    guias = ["".join(rng.choice(list(BASES), size=largo)) for _ in range(n)]
+    return guias + ["G" * largo, "A" * largo, ("GC" * largo)[:largo], ("ACGT" * largo)[:largo]]
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.fixture(scope="session")
+def entrenamiento():
+    """Matriz one-hot (n, 80) de guías aleatorias y una respuesta en escala 0-1 que depende de ellas."""
+    rng = np.random.default_rng(1)
+    X = one_hot_encode_batch(guias_aleatorias(rng, 400))
+    y = (X @ rng.random(80, dtype=np.float32) + rng.normal(0, 0.5, len(X))).astype(np.float32)
+    return X, (y - y.min()) / (y.max() - y.min())
+
+
+@pytest.fixture(scope="session")
+def xgb_sintetico(entrenamiento):
+    """XGBRegressor pequeño (árboles de hasta 16 hojas)."""
+    xgboost = pytest.importorskip("xgboost")
+    modelo = xgboost.XGBRegressor(n_estimators=25, max_depth=4, learning_rate=0.3, random_state=0)
+    return modelo.fit(*entrenamiento)
+
+
+@pytest.fixture(scope="session")
+def rf_sintetico(entrenamiento):
+    """RandomForestRegressor pequeño con árboles profundos (más de 64 hojas)."""
+    ensemble = pytest.importorskip("sklearn.ensemble")
+    modelo = ensemble.RandomForestRegressor(n_estimators=10, random_state=0)
+    return modelo.fit(*entrenamiento)
+
+
+@pytest.fixture(scope="session")
+def red_sintetica():
+    """Red densa 80 -> 16 -> 1 con pesos aleatorios y salida sigmoide."""
+    rng = np.random.default_rng(2)
+    return RedDensaNumpy([(rng.normal(size=(80, 16)), rng.normal(size=16), "relu"),
+                          (rng.normal(size=(16, 1)) / 4, rng.normal(size=1), "sigmoid")])
@@ -0,0 +1,68 @@
+"""
+Equivalencia del motor de árboles en arreglos planos de `paq1_inferencia` con scikit-learn y
+XGBoost, por el camino de máscaras de hojas (árboles de hasta 64 hojas) y por el recorrido
+nivel por nivel.
+"""
+import numpy as np
+import pytest
+
+from sgRNA.paq1_inferencia import EnsambleArboles, _contar_bits
+from sgRNA.paq1_secuencia import one_hot_encode_batch
+from tests.conftest import guias_aleatorias
+
+
+@pytest.fixture
+def X(rng):
+    return one_hot_encode_batch(guias_aleatorias(rng, 1000))
+
+
+def test_xgboost_mascaras(X, xgb_sintetico):
+    ensamble = EnsambleArboles.desde_xgboost(xgb_sintetico)
+    assert ensamble._mascaras is not None
+    np.testing.assert_array_equal(ensamble.predict(X), xgb_sintetico.predict(X))
+
+
+def test_xgboost_profundo_niveles(X, entrenamiento):
+    xgboost = pytest.importorskip("xgboost")
+    modelo = xgboost.XGBRegressor(n_estimators=10, max_depth=8, min_child_weight=0, random_state=0).fit(*entrenamiento)
+    ensamble = EnsambleArboles.desde_xgboost(modelo)
+    assert ensamble._mascaras is None
+    np.testing.assert_array_equal(ensamble.predict(X), modelo.predict(X))
+
+
+def test_random_forest_niveles(X, rf_sintetico):
+    ensamble = EnsambleArboles.desde_random_forest(rf_sintetico)
+    assert ensamble._mascaras is None
+    np.testing.assert_array_equal(ensamble.predict(X), rf_sintetico.predict(X))
+
+
+def test_random_forest_mascaras(X, entrenamiento):
+    ensemble = pytest.importorskip("sklearn.ensemble")
+    modelo = ensemble.RandomForestRegressor(n_estimators=10, max_depth=5, random_state=0).fit(*entrenamiento)
+    ensamble = EnsambleArboles.desde_random_forest(modelo)
+    assert ensamble._mascaras is not None
+    np.testing.assert_array_equal(ensamble.predict(X), modelo.predict(X))
+
+
+def test_entrada_no_one_hot(rng, xgb_sintetico):
+    # Filas con 0 o 2 bases por posición: se recorren nivel por nivel
+    X = rng.integers(0, 2, size=(300, 80)).astype(np.float32)
+    ensamble = EnsambleArboles.desde_xgboost(xgb_sintetico)
+    np.testing.assert_array_equal(ensamble.predict(X), xgb_sintetico.predict(X))
+
+
+def test_guardar_y_cargar(tmp_path, X, xgb_sintetico, rf_sintetico):
+    for ensamble in (EnsambleArboles.desde_xgboost(xgb_sintetico), EnsambleArboles.desde_random_forest(rf_sintetico)):
+        ruta = str(tmp_path / "ensamble.npz")
+        ensamble.guardar(ruta)
+        np.testing.assert_array_equal(EnsambleArboles.cargar(ruta).predict(X), ensamble.predict(X))
+
+
+def test_contar_bits_sin_bitwise_count(monkeypatch, rng, X, xgb_sintetico):
+    valores = rng.integers(0, 2 ** 63, size=(50, 7), dtype=np.uint64) | np.uint64(2 ** 63)
+    esperado = np.array([[bin(int(valor)).count("1") for valor in fila] for fila in valores])
+    ensamble = EnsambleArboles.desde_xgboost(xgb_sintetico)
+    # Camino de NumPy < 2.0
+    monkeypatch.delattr(np, "bitwise_count", raising=False)
+    np.testing.assert_array_equal(_contar_bits(valores), esperado)
+    np.testing.assert_array_equal(ensamble.predict(X), xgb_sintetico.predict(X))
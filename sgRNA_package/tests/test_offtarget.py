@@ -0,0 +1,100 @@
+"""
+Conteo de off-targets con el índice de k-mers frente a una búsqueda exhaustiva sobre todas las
+posiciones del genoma.
+"""
+import numpy as np
+import pytest
+from numpy.lib.stride_tricks import sliding_window_view
+
+from benchmarks.sintetico import escribir_fasta, secuencia_aleatoria
+from sgRNA.paq1_nucleasa import complemento_inverso_iupac
+from sgRNA.paq1_offtarget import (MAX_MISMATCHES, _mascara_pam, cargar_indice_offtarget, contar_offtargets,
+                                  k_para_mismatches)
+from sgRNA.paq1_secuencia import a_codigos, complemento_inverso
+
+
+def contar_exhaustivo(genoma, guias, max_mismatches, pam, lado):
+    """Conteos (guías, max_mismatches + 1) comparando cada guía con todas las ventanas del genoma."""
+    largo, largo_pam = len(guias[0]), len(pam)
+    codigos = np.array([a_codigos(guia) for guia in guias])
+    ventanas = sliding_window_view(genoma, largo)
+    inicios = np.arange(len(ventanas))
+    conteos = np.zeros((len(guias), max_mismatches + 1), dtype=np.int64)
+    desde_pam = (largo, -largo_pam) if lado == "3" else (-largo_pam, largo)
+    for consultas, mascara, desde in ((codigos, _mascara_pam(pam), desde_pam[0]),
+                                      (3 - codigos[:, ::-1], _mascara_pam(complemento_inverso_iupac(pam)), desde_pam[1])):
+        validos = (inicios + desde >= 0) & (inicios + desde + largo_pam <= len(genoma)) & (ventanas != 4).all(axis=1)
+        pam_valido = mascara[np.arange(largo_pam), genoma[(inicios[validos] + desde)[:, None] + np.arange(largo_pam)]].all(axis=1)
+        sitios = ventanas[np.flatnonzero(validos)[pam_valido]]
+        mismatches = (consultas[:, None, :] != sitios[None, :, :]).sum(axis=2)
+        for m in range(max_mismatches + 1):
+            conteos[:, m] += (mismatches == m).sum(axis=1)
+    return conteos
+
+
+@pytest.fixture(scope="module")
+def genoma_con_copias(tmp_path_factory):
+    """Genoma de dos registros con tramos de N y copias de cada guía con 0 a 5 mutaciones, en ambas hebras."""
+    rng = np.random.default_rng(0)
+    secuencia = list(secuencia_aleatoria(rng, 12000))
+    guias = [secuencia_aleatoria(rng, 20) for _ in range(20)]
+    for guia in guias:
+        for _ in range(10):
+            copia = list(guia)
+            for posicion in rng.choice(20, rng.integers(0, 6), replace=False):
+                copia[posicion] = "ACGT"["ACGT".index(copia[posicion]) - int(rng.integers(1, 4))]
+            sitio = "TTTA" + "".join(copia) + "AGG"
+            if rng.random() < 0.5:
+                sitio = complemento_inverso(sitio)
+            inicio = int(rng.integers(0, len(secuencia) - len(sitio)))
+            secuencia[inicio:inicio + len(sitio)] = sitio
+    for inicio in rng.integers(0, len(secuencia) - 30, 5):
+        secuencia[inicio:inicio + 30] = "N" * 30
+    secuencia = "".join(secuencia)
+    gen_file = str(tmp_path_factory.mktemp("offtarget") / "genoma.fa")
+    escribir_fasta(gen_file, [("chr1", secuencia[:6000]), ("chr2", secuencia[6000:])])
+    return gen_file, guias
+
+
+@pytest.mark.parametrize("pam, lado", [("NGG", "3"), ("TTTV", "5")])
+@pytest.mark.parametrize("max_mismatches", [0, 1, 2, 3, 4])
+def test_conteos_iguales_a_busqueda_exhaustiva(genoma_con_copias, max_mismatches, pam, lado):
+    gen_file, guias = genoma_con_copias
+    indice = cargar_indice_offtarget(gen_file, k_para_mismatches(max_mismatches))
+    genoma = indice["genoma"][0:len(indice["genoma"])]
+    esperado = contar_exhaustivo(genoma, guias, max_mismatches, pam, lado)
+    assert esperado[:, -1].sum() > 0
+    # Pasadas pequeñas para recorrer varias veces las coincidencias de cada semilla
+    for max_candidatos in (7, 1 << 18):
+        np.testing.assert_array_equal(contar_offtargets(guias, indice, max_mismatches, pam, lado=lado,
+                                                        max_candidatos=max_candidatos), esperado)
+
+
+def test_indice_con_semilla_corta(genoma_con_copias):
+    # Un índice de k pequeño admite más tramos exactos; el resultado no cambia
+    gen_file, guias = genoma_con_copias
+    esperado = contar_offtargets(guias, cargar_indice_offtarget(gen_file, 10), 3)
+    np.testing.assert_array_equal(contar_offtargets(guias, cargar_indice_offtarget(gen_file, 5), 3), esperado)
+
+
+def test_semilla_no_se_acorta():
+    assert [k_para_mismatches(m) for m in range(6)] == [10] * 6
+
+
+def test_indice_se_reconstruye_si_cambia_el_fasta(tmp_path):
+    rng = np.random.default_rng(1)
+    guia = secuencia_aleatoria(rng, 20)
+    gen_file = str(tmp_path / "genoma.fa")
+    escribir_fasta(gen_file, [("chr1", secuencia_aleatoria(rng, 500))])
+    assert contar_offtargets([guia], cargar_indice_offtarget(gen_file, 10), 0)[0, 0] == 0
+
+    # Misma ruta, contenido nuevo: la caché del proceso no debe devolver el índice anterior
+    escribir_fasta(gen_file, [("chr1", secuencia_aleatoria(rng, 500) + guia + "TGG")])
+    assert contar_offtargets([guia], cargar_indice_offtarget(gen_file, 10), 0)[0, 0] == 1
+
+
+@pytest.mark.parametrize("max_mismatches", [-1, MAX_MISMATCHES + 1, 2.5])
+def test_mismatches_fuera_de_rango(genoma_con_copias, max_mismatches):
+    gen_file, guias = genoma_con_copias
+    with pytest.raises(ValueError, match="mismatches"):
+        contar_offtargets(guias, cargar_indice_offtarget(gen_file, 10), max_mismatches)
@@ -0,0 +1,89 @@
+"""
+Equivalencia entre las versiones por lotes y las versiones de una sola guía de la capa de
+secuencias y de las predicciones de eficiencia.
+"""
+import numpy as np
+import pytest
+
+from sgRNA import paq1_percent
+from sgRNA.paq1_inferencia import EnsambleArboles
+from sgRNA.paq1_percent import (predecir_eficiencia, predecir_eficiencia_batch, predecir_eficiencia_combined,
+                                predecir_eficiencia_guia, predecir_eficiencia_guia_batch, predecir_eficiencia_nn,
+                                predecir_eficiencia_xgb)
+from sgRNA.paq1_secuencia import (complemento_inverso, gc_lote, gc_ventanas, one_hot_encode, one_hot_encode_batch,
+                                  validas_lote)
+from sgRNA.paq1_soporte import _disenar_region, gc_content
+from tests.conftest import guias_aleatorias
+
+
+@pytest.mark.parametrize("largo", [1, 4, 20, 23])
+def test_one_hot_lote_igual_a_una_guia(rng, largo):
+    guias = guias_aleatorias(rng, 200, largo)
+    np.testing.assert_array_equal(one_hot_encode_batch(guias, largo), np.array([one_hot_encode(seq) for seq in guias]))
+
+
+def test_one_hot_rechaza_bases_invalidas():
+    with pytest.raises(ValueError):
+        one_hot_encode_batch(["ACGTN" * 4])
+    with pytest.raises(ValueError):
+        one_hot_encode("ACGTN" * 4)
+
+
+@pytest.mark.parametrize("largo", [1, 20, 23])
+def test_gc_lote_igual_a_gc_content(rng, largo):
+    guias = guias_aleatorias(rng, 200, largo)
+    assert gc_lote(guias).tolist() == [gc_content(seq) for seq in guias]
+
+
+def test_gc_ventanas_igual_a_gc_content(rng):
+    region = guias_aleatorias(rng, 1, 500)[0]
+    assert gc_ventanas(region, 20).tolist() == [gc_content(region[i:i + 20]) for i in range(len(region) - 19)]
+
+
+def test_heuristica_lote_igual_a_una_guia(rng):
+    guias = guias_aleatorias(rng, 500) + ["ACGTNACGTNACGTNACGTN"]
+    assert predecir_eficiencia_guia_batch(guias).tolist() == [predecir_eficiencia_guia(seq) for seq in guias]
+
+
+def test_complemento_inverso():
+    assert complemento_inverso("AACGTN") == "NACGTT"
+    # Enmascarado suave y códigos IUPAC
+    assert complemento_inverso("acgRy") == "RYCGT"
+    with pytest.raises(ValueError):
+        complemento_inverso("ACG-T")
+
+
+def test_validas_lote():
+    assert validas_lote(["ACGT", "ACNT", "acgt", "ARGT"]).tolist() == [True, False, False, False]
+    assert validas_lote([]).tolist() == []
+
+
+@pytest.fixture
+def modelos_sinteticos(monkeypatch, xgb_sintetico, rf_sintetico, red_sintetica):
+    """Reemplaza rf, xgb y nn del registro por los modelos sintéticos, con el motor de árboles propio."""
+    monkeypatch.setitem(paq1_percent._modelos_cargados, "rf", EnsambleArboles.desde_random_forest(rf_sintetico))
+    monkeypatch.setitem(paq1_percent._modelos_cargados, "xgb", EnsambleArboles.desde_xgboost(xgb_sintetico))
+    monkeypatch.setitem(paq1_percent._modelos_cargados, "nn", red_sintetica)
+
+
+@pytest.mark.parametrize("modelo, una_guia", [("rf", predecir_eficiencia), ("xgb", predecir_eficiencia_xgb)])
+def test_arboles_lote_igual_a_una_guia(rng, modelos_sinteticos, modelo, una_guia):
+    guias = guias_aleatorias(rng, 300)
+    esperado = [una_guia(seq) for seq in guias]
+    for batch_size in (1, 7, 4096):
+        np.testing.assert_array_equal(predecir_eficiencia_batch(guias, modelo, batch_size), esperado)
+
+
+@pytest.mark.parametrize("modelo, una_guia", [("nn", predecir_eficiencia_nn), ("combined", predecir_eficiencia_combined)])
+def test_red_lote_igual_a_una_guia(rng, modelos_sinteticos, modelo, una_guia):
+    guias = guias_aleatorias(rng, 300)
+    # La multiplicación de matrices en float32 puede diferir en el último bit según el tamaño del lote
+    np.testing.assert_allclose(predecir_eficiencia_batch(guias, modelo), [una_guia(seq) for seq in guias], rtol=1e-5)
+
+
+@pytest.mark.parametrize("modelo", ["heuristic", "rf", "xgb", "nn"])
+def test_diseno_descarta_guias_con_n(modelos_sinteticos, modelo):
+    # La guía con N tiene GC en rango: antes llegaba al modelo y la codificación one-hot fallaba
+    region = "AAAATTTTAAAA" + "GCGCAGCNGCATGCAGCGCA" + "TGG" + "AAAATTTTAAAA" + "GCGCAGCAGCATGCAGCGCA" + "TGG"
+    tabla = _disenar_region(region, modelo)
+    assert tabla["gRNA"].tolist() == ["GCGCAGCAGCATGCAGCGCA"]